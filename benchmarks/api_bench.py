@@ -0,0 +1,254 @@
+"""
+API benchmark suite.
+
+Drives the real endpoints in-process (Django test client, full middleware and
+DRF stack) at a fixed concurrency and reports p50/p95/p99 latency, throughput
+and SQL queries per request for each scenario as JSON. Seed data first:
+
+    python manage.py seed_scale --users 100000 --events 20000 --enrollments 1000000 --seed 1
+    python benchmarks/api_bench.py --tag s1 --concurrency 8 --requests 200 --output bench.json
+
+Run the same command against SQLite and PostgreSQL (DATABASE_URL) or on two
+commits and diff the JSON files to compare them.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+# Keep emails (console backend by default) out of the timings and the JSON on stdout
+os.environ.setdefault('EMAIL_BACKEND', 'django.core.mail.backends.dummy.EmailBackend')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from events.models import Event, Enrollment  # noqa: E402
+
+SCALE_DOMAIN = 'scale.test'
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))], 3)
+
+
+class QueryCounter:
+    """execute_wrapper that counts queries on the current thread's connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Fixtures:
+    """Accounts, tokens and sample filter values drawn from the seeded data"""
+
+    def __init__(self, tag, password, pool_size, seed):
+        email_filter = f'.{tag}@{SCALE_DOMAIN}' if tag else f'@{SCALE_DOMAIN}'
+        users = User.objects.filter(email__endswith=email_filter, profile__is_verified=True)
+        # Sampled with --seed (not ORDER BY RANDOM()), so every run uses the same accounts
+        rng = random.Random(seed)
+        self.seekers = self.sample(users.filter(profile__role='SEEKER'), pool_size, rng)
+        self.facilitators = self.sample(users.filter(profile__role='FACILITATOR'), pool_size, rng)
+        if not self.seekers or not self.facilitators:
+            raise SystemExit("No seeded accounts found; run `manage.py seed_scale` first (and check --tag).")
+
+        self.password = password
+        self.tokens = {
+            user.pk: str(RefreshToken.for_user(user).access_token)
+            for user in self.seekers + self.facilitators
+        }
+        self.languages = list(Event.objects.order_by('language').values_list('language', flat=True).distinct()[:20])
+        self.locations = list(Event.objects.order_by('location').values_list('location', flat=True).distinct()[:50])
+        self.words = [
+            word for title in Event.objects.order_by('pk').values_list('title', flat=True)[:200]
+            for word in title.split() if len(word) > 4
+        ] or ['event']
+        self.upcoming_event_ids = list(
+            Event.objects.filter(starts_at__gt=timezone.now(), capacity__isnull=True)
+            .order_by('pk').values_list('id', flat=True)[:500]
+        )
+
+    @staticmethod
+    def sample(users, size, rng):
+        pks = list(users.order_by('pk').values_list('pk', flat=True))
+        pks = rng.sample(pks, min(size, len(pks)))
+        by_pk = User.objects.in_bulk(pks)
+        return [by_pk[pk] for pk in pks]
+
+
+def make_scenarios(fixtures):
+    """Each scenario is (name, prepare(client, rng) -> callable issuing the timed request)"""
+
+    def auth(user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {fixtures.tokens[user.pk]}'}
+
+    def events_list_filters(client, rng):
+        params = {
+            'language': rng.choice(fixtures.languages),
+            'starts_after': timezone.now().isoformat(),
+            'ordering': 'starts_at',
+        }
+        if rng.random() < 0.5:
+            params['location'] = rng.choice(fixtures.locations)
+        return lambda: client.get('/events/events/', params, **auth(rng.choice(fixtures.seekers)))
+
+    def events_search(client, rng):
+        query = {'q': rng.choice(fixtures.words)}
+        return lambda: client.get('/events/events/', query, **auth(rng.choice(fixtures.seekers)))
+
+    def enroll(client, rng):
+        # Clear any earlier enrollment so every timed request is a fresh enroll
+        seeker = rng.choice(fixtures.seekers)
+        event_id = rng.choice(fixtures.upcoming_event_ids)
+        Enrollment.objects.filter(event_id=event_id, seeker=seeker).delete()
+        return lambda: client.post(f'/events/events/{event_id}/enroll/', **auth(seeker))
+
+    def my_events(client, rng):
+        return lambda: client.get('/events/events/my_events/', **auth(rng.choice(fixtures.facilitators)))
+
+    def upcoming(client, rng):
+        return lambda: client.get('/events/enrollments/upcoming/', **auth(rng.choice(fixtures.seekers)))
+
+    def past(client, rng):
+        return lambda: client.get('/events/enrollments/past/', **auth(rng.choice(fixtures.seekers)))
+
+    def login(client, rng):
+        seeker = rng.choice(fixtures.seekers)
+        return lambda: client.post(
+            '/auth/login/', {'email': seeker.email, 'password': fixtures.password},
+            content_type='application/json',
+        )
+
+    scenarios = [
+        ('events-list-filters', events_list_filters),
+        ('events-search', events_search),
+        ('my-events', my_events),
+        ('enrollments-upcoming', upcoming),
+        ('enrollments-past', past),
+        ('login', login),
+    ]
+    if fixtures.upcoming_event_ids:
+        scenarios.insert(2, ('event-enroll', enroll))
+    return scenarios
+
+
+def run_scenario(scenario, requests, concurrency, seed):
+    name, prepare = scenario
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        client = Client()
+        counter = QueryCounter()
+        try:
+            with connection.execute_wrapper(counter):
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    issue_request = prepare(client, rng)
+                    counter.count = 0
+                    started = time.perf_counter()
+                    response = issue_request()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+                        queries.append(counter.count)
+                        if response.status_code >= 400:
+                            errors.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': round(statistics.mean(latencies), 3) if latencies else None,
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tag', default=None, help="seed_scale tag to draw accounts from")
+    parser.add_argument('--password', default='scale-pass-123')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario")
+    parser.add_argument('--scenario', action='append', help="Only run these scenarios (repeatable)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    fixtures = Fixtures(args.tag, args.password, pool_size=max(50, args.concurrency * 4), seed=args.seed)
+    scenarios = make_scenarios(fixtures)
+    if args.scenario:
+        scenarios = [scenario for scenario in scenarios if scenario[0] in args.scenario]
+
+    report = {
+        'commit': git_commit(),
+        'database': connection.vendor,
+        'concurrency': args.concurrency,
+        'dataset': {
+            'users': User.objects.count(),
+            'events': Event.objects.count(),
+            'enrollments': Enrollment.objects.count(),
+        },
+        'scenarios': {},
+    }
+    connection.close()
+    for scenario in scenarios:
+        report['scenarios'][scenario[0]] = run_scenario(scenario, args.requests, args.concurrency, args.seed)
+        print(f"{scenario[0]}: {report['scenarios'][scenario[0]]}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
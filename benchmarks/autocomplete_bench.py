@@ -0,0 +1,106 @@
+"""
+Autocomplete index benchmark at scale, in memory (no database).
+
+Builds the PrefixIndex behind /events/events/autocomplete/ from --events
+synthetic (title, location) rows and reports the build time, the memory it
+holds (tracemalloc) and lookup latency for typed prefixes of 1-6 characters,
+plus the cost of the incremental add/remove an Event save triggers.
+
+    python benchmarks/autocomplete_bench.py --events 1000000 --lookups 20000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from faker import Faker  # noqa: E402
+
+from events.autocomplete import PrefixIndex  # noqa: E402
+
+
+def make_rows(count, fake):
+    # A pool of generated phrases and cities, combined so titles repeat like real series do
+    phrases = [fake.catch_phrase() for _ in range(min(count, 200_000))]
+    cities = [fake.city() for _ in range(2000)]
+    rng = random.Random(1)
+    return [
+        (f"{rng.choice(phrases)} {rng.choice(('Workshop', 'Meetup', 'Class', 'Talk', ''))}".strip(),
+         rng.choice(cities))
+        for _ in range(count)
+    ]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        'p50_us': round(statistics.median(samples), 1),
+        'p99_us': round(samples[int(len(samples) * 0.99)], 1),
+        'max_us': round(samples[-1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--max-suggestions', type=int, default=100_000)
+    args = parser.parse_args()
+
+    fake = Faker()
+    Faker.seed(1)
+    rows = make_rows(args.events, fake)
+
+    started = time.perf_counter()
+    index = PrefixIndex.build(rows, args.max_suggestions)
+    build_seconds = time.perf_counter() - started
+    # Tracing slows the build down, so memory is measured on a second one
+    del index
+    tracemalloc.start()
+    index = PrefixIndex.build(rows, args.max_suggestions)
+    memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    rng = random.Random(2)
+    samples = {length: [] for length in range(1, 7)}
+    for _ in range(args.lookups):
+        title = rng.choice(rows)[rng.random() < 0.3]
+        length = rng.randint(1, 6)
+        began = time.perf_counter()
+        index.search(title[:length], 10)
+        samples[length].append((time.perf_counter() - began) * 1e6)
+
+    changes = []
+    for title, location in rng.sample(rows, 2000):
+        began = time.perf_counter()
+        index.remove(title, location)
+        index.add(title + " II", location)
+        changes.append((time.perf_counter() - began) * 1e6)
+
+    report = {
+        'events': args.events,
+        'suggestions': len(index.suggestions),
+        'keys': len(index.entries),
+        'build_seconds': round(build_seconds, 2),
+        'index_memory_mb': round(memory_mb, 1),
+        'lookup_by_prefix_length': {length: percentiles(values) for length, values in samples.items()},
+        'lookup_all': percentiles([value for values in samples.values() for value in values]),
+        'save_update': percentiles(changes),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
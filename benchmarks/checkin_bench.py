@@ -0,0 +1,76 @@
+"""
+Check-in token benchmark, in memory (no database).
+
+Signs --tokens check-in tokens as the enrollment listings do, then verifies
+them as POST /events/check-in/ and /events/check-in/sync/ do, reporting the
+token size, per-token latency and single-core throughput. A sync of
+CHECKIN_SYNC_MAX_SCANS scans spends this on verification before its
+bulk inserts.
+
+    python benchmarks/checkin_bench.py --tokens 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from events.checkin import token_for, verify  # noqa: E402
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        'p50_us': round(statistics.median(samples), 1),
+        'p99_us': round(samples[int(len(samples) * 0.99)], 1),
+        'max_us': round(samples[-1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    ends_at = timezone.now() + timedelta(hours=3)
+    ids = [(rng.randint(1, 50_000_000), rng.randint(1, 2_000_000)) for _ in range(args.tokens)]
+
+    started = time.perf_counter()
+    tokens = [token_for(enrollment_id, event_id, ends_at) for enrollment_id, event_id in ids]
+    sign_seconds = time.perf_counter() - started
+
+    samples = []
+    started = time.perf_counter()
+    for token in tokens:
+        began = time.perf_counter()
+        verify(token)
+        samples.append((time.perf_counter() - began) * 1e6)
+    verify_seconds = time.perf_counter() - started
+
+    report = {
+        'tokens': args.tokens,
+        'token_length_max': max(map(len, tokens)),
+        'sign_per_second': round(args.tokens / sign_seconds),
+        'verify_per_second': round(args.tokens / verify_seconds),
+        'verify': percentiles(samples),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Cold-start benchmark for the web and Celery workers.
+
+Each measurement runs in a fresh interpreter and times what a new worker does
+before it can serve its first request / task:
+
+    web     import events_platform.wsgi (django.setup) + load the URLconf
+    schema  web + first GET /api/schema/
+    celery  import the Celery app + autodiscover task modules
+
+    python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --importtime web   # slowest imports
+
+Prints the median and min per target in milliseconds as JSON.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    'web': (
+        "import events_platform.wsgi\n"
+        "from django.urls import get_resolver; get_resolver().url_patterns\n"
+    ),
+    'schema': (
+        "import events_platform.wsgi\n"
+        "from django.test import Client\n"
+        "assert Client().get('/api/schema/').status_code == 200\n"
+    ),
+    'celery': (
+        "from events_platform.celery import app\n"
+        "app.loader.import_default_modules()\n"
+    ),
+}
+
+TIMED = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "{code}"
+    "print((time.perf_counter() - started) * 1000)\n"
+)
+
+
+def run(code, extra_args=()):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='events_platform.settings', PYTHONDONTWRITEBYTECODE='')
+    return subprocess.run(
+        [sys.executable, *extra_args, '-c', code], cwd=BASE_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+
+
+def measure(target, runs):
+    run(TARGETS[target])  # warm the bytecode cache and the schema file
+    samples = [float(run(TIMED.format(code=TARGETS[target])).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    return {'median_ms': round(statistics.median(samples), 1), 'min_ms': round(min(samples), 1)}
+
+
+def slowest_imports(target, limit):
+    """Modules imported directly by the target or one level below, by cumulative time"""
+    rows = []
+    for line in run(TARGETS[target], ['-X', 'importtime']).stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', help=f"Any of {', '.join(TARGETS)} (default: all)")
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--importtime', action='store_true', help="Show the slowest imports instead of timings")
+    parser.add_argument('--limit', type=int, default=15)
+    args = parser.parse_args()
+    args.targets = args.targets or list(TARGETS)
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    if args.importtime:
+        for target in args.targets:
+            print(f"{target}:")
+            for cumulative, name in slowest_imports(target, args.limit):
+                print(f"  {cumulative / 1000:8.1f} ms  {name}")
+        return
+
+    print(json.dumps({target: measure(target, args.runs) for target in args.targets}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Request latency with and without database connection reuse.
+
+Runs GET /events/events/ in-process through Django's test client, which fires
+the same request_started/request_finished signals as a real server, so the
+connection is closed, kept or returned to the pool exactly as in production.
+Compare modes by changing the environment:
+
+    DB_CONN_MAX_AGE=0 python benchmarks/db_connections.py          # new connection per request
+    DB_CONN_MAX_AGE=60 python benchmarks/db_connections.py         # persistent connection
+    DB_POOL_MODE=pool python benchmarks/db_connections.py          # in-process pool
+    DB_POOL_MODE=pgbouncer DATABASE_URL=postgres://...:6432/... python benchmarks/db_connections.py
+
+Point DATABASE_URL at a PostgreSQL server reached over the network; with a
+local SQLite file connecting is nearly free and the modes look the same.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+from users.models import Profile  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))], 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--path', default='/events/events/')
+    args = parser.parse_args()
+
+    profile = Profile.objects.filter(is_verified=True).select_related('user').first()
+    if profile is None:
+        raise SystemExit("Need at least one verified user in the database.")
+    token = RefreshToken.for_user(profile.user).access_token
+    connection.close()
+
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+    client.get(args.path)  # warm up imports and caches
+
+    latencies = []
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        response = client.get(args.path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"{args.path} returned {response.status_code}")
+
+    db = settings.DATABASES['default']
+    print(json.dumps({
+        'engine': db['ENGINE'],
+        'pool_mode': settings.DB_POOL_MODE,
+        'conn_max_age': db['CONN_MAX_AGE'],
+        'requests': args.requests,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': round(statistics.mean(latencies), 3),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
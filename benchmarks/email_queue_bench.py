@@ -0,0 +1,136 @@
+"""
+Throughput benchmark for the 'email' Celery queue.
+
+Runs everything in one process over the memory:// broker, with an email
+backend that sleeps --smtp-ms per message to stand in for an SMTP round trip:
+
+    inline   send_followup_email run in the caller, as CELERY_TASK_ALWAYS_EAGER
+             did on every web request
+    enqueue  cost to the caller of .delay() onto the email queue
+    worker   emails/s drained by an embedded worker on the email queue, per
+             --concurrency value (thread pool, as in docker-compose.yml)
+
+The memory transport only refills a worker's prefetch window when its poll
+times out (every 2 s), so the worker runs with an unlimited window here; on
+Redis the email queue's prefetch setting applies without that stall.
+
+    python benchmarks/email_queue_bench.py --emails 400 --smtp-ms 20 --concurrency 1 4 16
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+os.environ['CELERY_BROKER_URL'] = 'memory://'
+os.environ['CELERY_TASK_ALWAYS_EAGER'] = 'False'
+os.environ['EMAIL_BACKEND'] = '__main__.SlowEmailBackend'
+
+import django  # noqa: E402
+
+django.setup()
+
+
+from celery.contrib.testing.worker import start_worker  # noqa: E402
+from celery.signals import task_postrun  # noqa: E402
+from django.core.mail.backends.base import BaseEmailBackend  # noqa: E402
+
+from events.tasks import send_followup_email  # noqa: E402
+from events_platform.celery import app  # noqa: E402
+
+# The memory transport polls for messages once a second by default
+app.conf.update(CELERY_BROKER_TRANSPORT_OPTIONS={'polling_interval': 0.001})
+
+SMTP_SECONDS = 0.0
+
+
+class SlowEmailBackend(BaseEmailBackend):
+    """Discards messages after sleeping as long as an SMTP send would take"""
+
+    def send_messages(self, email_messages):
+        for _ in email_messages:
+            time.sleep(SMTP_SECONDS)
+        return len(email_messages)
+
+
+def inline(count):
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        send_followup_email.apply(args=[f'user{i}@example.com', 'Benchmark'])
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def enqueue(count):
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        send_followup_email.delay(f'user{i}@example.com', 'Benchmark')
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def drain(count, concurrency):
+    """Seconds for a worker on the email queue to send `count` queued emails"""
+    done = threading.Semaphore(0)
+
+    def finished(sender=None, **kwargs):
+        done.release()
+
+    task_postrun.connect(finished, weak=False)
+    try:
+        enqueue(count)
+        with start_worker(app, pool='threads', concurrency=concurrency, queues=['email'], prefetch_multiplier=0,
+                          perform_ping_check=False, shutdown_timeout=60):
+            started = time.perf_counter()
+            for _ in range(count):
+                done.acquire()
+            return time.perf_counter() - started
+    finally:
+        task_postrun.disconnect(finished)
+
+
+def summary(samples):
+    return {
+        'p50_ms': round(statistics.median(samples), 3),
+        'p99_ms': round(statistics.quantiles(samples, n=100)[98], 3),
+    }
+
+
+def main():
+    global SMTP_SECONDS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=400)
+    parser.add_argument('--smtp-ms', type=float, default=20.0, help="Simulated time per SMTP send")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+    SMTP_SECONDS = args.smtp_ms / 1000
+
+    report = {
+        'emails': args.emails,
+        'smtp_ms': args.smtp_ms,
+        'inline': summary(inline(min(args.emails, 100))),
+        'enqueue': summary(enqueue(args.emails)),
+        'worker': {},
+    }
+    with app.connection_for_write() as connection:
+        connection.default_channel.queue_purge('email')  # left by the enqueue run
+
+    for concurrency in args.concurrency:
+        seconds = drain(args.emails, concurrency)
+        report['worker'][f'concurrency={concurrency}'] = {
+            'seconds': round(seconds, 3),
+            'emails_per_second': round(args.emails / seconds, 1),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Proximity search benchmark: "events within r km of a point" over --events
+events, in a scratch SQLite database (--database, reused between runs).
+
+Events are clustered around the gazetteer's cities (70%) or scattered
+uniformly (30%). Each query point is near a random city, and each radius is
+timed with three strategies, which must return the same ids:
+
+    fetch-all  every event's coordinates, haversine in Python (what "events
+               near me" cost before: fetching everything)
+    sql-scan   the haversine filter in SQL over every row, no index
+    geohash    EventFilter's near=: geohash prefix ranges on the index, then
+               the haversine refine on the candidates (events/geo.py)
+
+    python benchmarks/geo_bench.py --events 1000000 --queries 50 --radius 5 25 100
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=50, help="Query points per radius (geohash, sql-scan)")
+    parser.add_argument('--fetch-all-queries', type=int, default=5, help="Query points per radius for fetch-all")
+    parser.add_argument('--radius', type=float, nargs='+', default=[5, 25, 100])
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'geo_bench.sqlite3'))
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+os.environ['DATABASE_URL'] = f'sqlite:///{ARGS.database}'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from events import geo  # noqa: E402
+from events.models import Event  # noqa: E402
+
+
+def seed(total, rng):
+    existing = Event.objects.count()
+    if existing >= total:
+        return existing
+    user, _ = User.objects.get_or_create(username='geo-bench', defaults={'email': 'geo-bench@example.com'})
+    cities = list(geo.GAZETTEER.items())
+    now = timezone.now()
+    for start in range(existing, total, 20000):
+        events = []
+        for _ in range(start, min(total, start + 20000)):
+            if rng.random() < 0.7:
+                name, (lat, lon) = rng.choice(cities)
+                lat, lon = lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3)
+            else:
+                name, lat, lon = 'Elsewhere', rng.uniform(-60, 70), rng.uniform(-180, 180)
+            events.append(Event(
+                title='Bench', description='', language='English', location=name.title(),
+                latitude=lat, longitude=lon, geohash=geo.geohash_for(lat, lon),
+                starts_at=now + timedelta(days=1), ends_at=now + timedelta(days=1, hours=2), created_by=user,
+            ))
+        with transaction.atomic():
+            Event.objects.bulk_create(events)
+        print(f"events: {start + len(events)}/{total}", file=sys.stderr)
+    return total
+
+
+def fetch_all(lat, lon, radius):
+    hits = []
+    for pk, event_lat, event_lon in Event.objects.filter(latitude__isnull=False).values_list(
+        'id', 'latitude', 'longitude'
+    ).iterator(chunk_size=10000):
+        distance = geo.haversine_km(lat, lon, event_lat, event_lon)
+        if distance <= radius:
+            hits.append((distance, pk))
+    return [pk for _, pk in sorted(hits)]
+
+
+def sql_scan(lat, lon, radius):
+    return list(
+        Event.objects.annotate(distance_km=geo.distance_km(lat, lon)).filter(distance_km__lte=radius)
+        .order_by('distance_km', 'pk').values_list('id', flat=True)
+    )
+
+
+def geohash(lat, lon, radius):
+    return list(geo.near(Event.objects.all(), lat, lon, radius).values_list('id', flat=True))
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+    }
+
+
+def main():
+    rng = random.Random(ARGS.seed)
+    call_command('migrate', verbosity=0)
+    started = time.perf_counter()
+    total = seed(ARGS.events, rng)
+    report = {'events': total, 'seed_seconds': round(time.perf_counter() - started, 1), 'radius_km': {}}
+
+    cities = list(geo.GAZETTEER.values())
+    for radius in ARGS.radius:
+        points = [
+            (lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2))
+            for lat, lon in (rng.choice(cities) for _ in range(ARGS.queries))
+        ]
+        timings = {'fetch-all': [], 'sql-scan': [], 'geohash': []}
+        matches, candidates = [], []
+        for index, (lat, lon) in enumerate(points):
+            strategies = [('geohash', geohash), ('sql-scan', sql_scan)]
+            if index < ARGS.fetch_all_queries:
+                strategies.append(('fetch-all', fetch_all))
+            results = {}
+            for name, strategy in strategies:
+                began = time.perf_counter()
+                results[name] = strategy(lat, lon, radius)
+                timings[name].append((time.perf_counter() - began) * 1000)
+            assert results['sql-scan'] == results['geohash'], "strategies disagree"
+            # Python and SQL round the last bits differently: compare fetch-all as a set
+            assert set(results.get('fetch-all', results['geohash'])) == set(results['geohash'])
+            matches.append(len(results['geohash']))
+            candidates.append(Event.objects.filter(geo.within_q(lat, lon, radius)).count())
+        report['radius_km'][radius] = {
+            'mean_matches': round(statistics.mean(matches), 1),
+            'mean_geohash_candidates': round(statistics.mean(candidates), 1),
+            **{name: summary(samples) for name, samples in timings.items() if samples},
+        }
+        print(f"{radius} km: {report['radius_km'][radius]}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
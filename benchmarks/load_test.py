@@ -0,0 +1,148 @@
+"""
+Mixed read/enroll load test against a running server.
+
+Drives the event list/detail and upcoming/past enrollment endpoints plus
+enroll/cancel writes at a fixed concurrency and prints latency percentiles
+and throughput as JSON. Run it once against a WSGI server and once against
+an ASGI server to compare them:
+
+    SERVER_MODE=wsgi gunicorn -c gunicorn.conf.py
+    python benchmarks/load_test.py --email seeker@test.com --password secret
+
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+    python benchmarks/load_test.py --email seeker@test.com --password secret --async-reads
+
+Only the standard library is used so it can run from any machine.
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return round(values[index], 2)
+
+
+class Client:
+    def __init__(self, base_url, token=None):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        req.add_header('Content-Type', 'application/json')
+        if self.token:
+            req.add_header('Authorization', f'Bearer {self.token}')
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def login(self, email, password):
+        status, body = self.request('POST', '/auth/login/', {'email': email, 'password': password})
+        if status != 200:
+            raise SystemExit(f"Login failed ({status}): {body[:200]!r}")
+        self.token = json.loads(body)['access']
+
+
+def run(args):
+    client = Client(args.base_url)
+    client.login(args.email, args.password)
+
+    status, body = client.request('GET', '/events/events/')
+    event_ids = [event['id'] for event in json.loads(body)['results']]
+    if not event_ids:
+        raise SystemExit("No events to test against; seed some first.")
+
+    prefix = '/events/async' if args.async_reads else '/events'
+    reads = [
+        ('event-list', lambda: f'{prefix}/events/?page={random.randint(1, args.max_page)}'),
+        ('event-retrieve', lambda: f'{prefix}/events/{random.choice(event_ids)}/'),
+        ('enrollment-upcoming', lambda: f'{prefix}/enrollments/upcoming/'),
+        ('enrollment-past', lambda: f'{prefix}/enrollments/past/'),
+    ]
+
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def record(name, started, status):
+        elapsed = (time.monotonic() - started) * 1000
+        with lock:
+            latencies[name].append(elapsed)
+            statuses[name][status] += 1
+
+    def worker():
+        while time.monotonic() < deadline:
+            if random.random() < args.read_ratio:
+                name, path = random.choice(reads)
+                started = time.monotonic()
+                status, _ = client.request('GET', path())
+                record(name, started, status)
+            else:
+                event_id = random.choice(event_ids)
+                started = time.monotonic()
+                status, _ = client.request('POST', f'/events/events/{event_id}/enroll/')
+                record('event-enroll', started, status)
+                started = time.monotonic()
+                status, _ = client.request('DELETE', f'/events/events/{event_id}/cancel_enrollment/')
+                record('event-cancel-enrollment', started, status)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(worker)
+    wall = time.monotonic() - started
+
+    total = sum(len(values) for values in latencies.values())
+    report = {
+        'base_url': args.base_url,
+        'async_reads': args.async_reads,
+        'concurrency': args.concurrency,
+        'duration_s': round(wall, 2),
+        'requests': total,
+        'throughput_rps': round(total / wall, 2),
+        'endpoints': {
+            name: {
+                'count': len(values),
+                'p50_ms': percentile(values, 50),
+                'p95_ms': percentile(values, 95),
+                'p99_ms': percentile(values, 99),
+                'mean_ms': round(statistics.mean(values), 2),
+                'statuses': dict(statuses[name]),
+            }
+            for name, values in sorted(latencies.items())
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--email', required=True, help="A verified seeker account")
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run")
+    parser.add_argument('--read-ratio', type=float, default=0.9, help="Share of iterations that are reads")
+    parser.add_argument('--max-page', type=int, default=5, help="Highest event list page to request")
+    parser.add_argument('--async-reads', action='store_true', help="Use the /events/async/ read endpoints")
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
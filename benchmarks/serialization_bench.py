@@ -0,0 +1,127 @@
+"""
+Serialization throughput benchmark for EventSerializer list pages.
+
+Builds in-memory Event pages (no database; the enrollment annotations are set
+on the instances as the list view's queryset would) and times, per page:
+serializing with EventSerializer and with the .values() fast path
+(event_rows, fed equivalent dicts), rendering with DRF's stdlib JSONRenderer vs
+the orjson ORJSONRenderer, and gzip/brotli compression of the result.
+
+    python benchmarks/serialization_bench.py --page-size 100 --pages 200
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from faker import Faker  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from events.models import Event  # noqa: E402
+from events.serializers import EventSerializer, event_rows  # noqa: E402
+from events_platform.renderers import ORJSONRenderer  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_page(fake, page_size, description_words):
+    now = timezone.now()
+    events = []
+    for i in range(page_size):
+        starts_at = now + timedelta(days=i % 30, hours=i % 24)
+        event = Event(
+            id=i + 1, title=fake.sentence(nb_words=5), description=fake.text(max_nb_chars=description_words * 6),
+            language='English', location=fake.city(), starts_at=starts_at, ends_at=starts_at + timedelta(hours=2),
+            capacity=50 if i % 3 else None, created_by=User(id=1, email=fake.email()),
+            created_at=now, updated_at=now,
+        )
+        event.num_enrolled = i % 40
+        event.num_held = i % 3
+        event.user_is_enrolled = i % 7 == 0
+        events.append(event)
+    return events
+
+
+def as_rows(page):
+    """The dicts event_rows.values() would fetch for these events"""
+    return [
+        {
+            **{field.name: getattr(event, field.attname) for field in Event._meta.concrete_fields},
+            'created_by__email': event.created_by.email,
+            'num_enrolled': event.num_enrolled,
+            'num_held': event.num_held,
+            'user_is_enrolled': event.user_is_enrolled,
+        }
+        for event in page
+    ]
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--pages', type=int, default=200, help="Timed repetitions per step")
+    parser.add_argument('--description-words', type=int, default=300)
+    parser.add_argument('--brotli-quality', type=int, default=4)
+    args = parser.parse_args()
+
+    fake = Faker()
+    Faker.seed(1)
+    request = RequestFactory().get('/events/events/')
+    request.user = User(id=2, username='bench')
+    page = make_page(fake, args.page_size, args.description_words)
+
+    serialize_ms, data = timed(lambda: EventSerializer(page, many=True, context={'request': request}).data, args.pages)
+    rows = as_rows(page)
+    rows_ms, row_data = timed(lambda: event_rows.serialize(rows), args.pages)
+    assert JSONRenderer().render(row_data) == JSONRenderer().render(data), "row serializer disagrees"
+    stdlib_ms, stdlib_body = timed(lambda: JSONRenderer().render(data), args.pages)
+    orjson_ms, orjson_body = timed(lambda: ORJSONRenderer().render(data), args.pages)
+    assert json.loads(stdlib_body) == json.loads(orjson_body), "renderers disagree"
+
+    report = {
+        'page_size': args.page_size,
+        'body_bytes': len(orjson_body),
+        'serialize_ms': {'serializer': round(serialize_ms, 3), 'rows': round(rows_ms, 3)},
+        'render_ms': {'json': round(stdlib_ms, 3), 'orjson': round(orjson_ms, 3)},
+        'pages_per_second': {
+            'json': round(1000 / (serialize_ms + stdlib_ms), 1),
+            'orjson': round(1000 / (serialize_ms + orjson_ms), 1),
+            'rows+orjson': round(1000 / (rows_ms + orjson_ms), 1),
+        },
+        'identical_bytes': stdlib_body == orjson_body,
+    }
+    gzip_ms, gzipped = timed(lambda: gzip.compress(orjson_body, compresslevel=6), args.pages)
+    report['gzip'] = {'ms': round(gzip_ms, 3), 'bytes': len(gzipped)}
+    if brotli is not None:
+        brotli_ms, compressed = timed(lambda: brotli.compress(orjson_body, quality=args.brotli_quality), args.pages)
+        report['brotli'] = {'ms': round(brotli_ms, 3), 'bytes': len(compressed), 'quality': args.brotli_quality}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Archival of past events.
+
+Events that ended more than EVENT_ARCHIVE_AFTER_DAYS ago are moved, with
+their enrollments, from the hot Event/Enrollment tables into ArchivedEvent/
+ArchivedEnrollment (events.tasks.archive_past_events runs this in batches).
+Upcoming listings, reminders and capacity checks then only ever scan recent
+rows, while past-enrollment listings read both (past_enrollments()).
+
+On PostgreSQL the archive tables are range-partitioned by month of the event
+start (see migration 0002); ensure_partitions() creates the monthly
+partitions a batch needs before inserting into them.
+"""
+from datetime import timezone as dt_timezone
+
+from django.db import connections, transaction
+from django.db.models import F
+
+from .models import ArchivedEnrollment, ArchivedEvent, Enrollment, Event
+
+# Soft-deleted events are never archived (they are purged instead), archived
+# events are not searched by proximity, and past occurrences are no longer
+# tied to their series (which only expands future ones)
+EVENT_FIELDS = [
+    field.attname for field in Event._meta.concrete_fields
+    if field.name not in ('deleted_at', 'geohash', 'series', 'occurrence_start')
+]
+
+# RowSerializer lookups of enrollment_rows -> the same values on ArchivedEnrollment
+ARCHIVED_ENROLLMENT_LOOKUPS = {
+    'id': 'id',
+    'event': 'event',
+    'event__title': 'event_title',
+    'event__starts_at': 'event_starts_at',
+    'event__ends_at': 'event_ends_at',
+    'status': 'status',
+    'created_at': 'created_at',
+}
+
+
+def is_partitioned(model, using='default'):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [model._meta.db_table]
+        )
+        return cursor.fetchone() is not None
+
+
+def month_range(value):
+    start = value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+def ensure_partitions(model, values, using='default'):
+    """Create the monthly partitions of `model`'s table covering these datetimes"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        for start, end in sorted({month_range(value) for value in values}):
+            partition = f'{table}_{start:%Y_%m}'
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(partition)} "
+                f"PARTITION OF {connection.ops.quote_name(table)} FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+
+
+def archive_events(event_ids, cutoff, using='default', chunk_size=1000):
+    """
+    Move these events (those still ended before `cutoff`) and their
+    enrollments into the archive tables in one transaction.
+    Returns (events archived, enrollments archived).
+    """
+    with transaction.atomic(using=using):
+        events = list(
+            Event.objects.using(using).select_for_update()
+            .filter(pk__in=event_ids, ends_at__lt=cutoff).values(*EVENT_FIELDS)
+        )
+        if not events:
+            return 0, 0
+        ids = [event['id'] for event in events]
+        by_id = {event['id']: event for event in events}
+
+        if is_partitioned(ArchivedEvent, using):
+            ensure_partitions(ArchivedEvent, [event['starts_at'] for event in events], using)
+        if is_partitioned(ArchivedEnrollment, using):
+            ensure_partitions(ArchivedEnrollment, [event['starts_at'] for event in events], using)
+
+        ArchivedEvent.objects.using(using).bulk_create(
+            [ArchivedEvent(**event) for event in events], batch_size=chunk_size
+        )
+
+        enrollments = Enrollment.objects.using(using).filter(event_id__in=ids).values(
+            'id', 'event_id', 'seeker_id', 'status', 'created_at', 'updated_at',
+            checked_in_at=F('attendance__checked_in_at'),
+        )
+        archived, chunk = 0, []
+        for enrollment in enrollments.iterator(chunk_size=chunk_size):
+            event = by_id[enrollment['event_id']]
+            chunk.append(ArchivedEnrollment(
+                **enrollment, event_title=event['title'],
+                event_starts_at=event['starts_at'], event_ends_at=event['ends_at'],
+            ))
+            if len(chunk) == chunk_size:
+                ArchivedEnrollment.objects.using(using).bulk_create(chunk)
+                archived += len(chunk)
+                chunk = []
+        if chunk:
+            ArchivedEnrollment.objects.using(using).bulk_create(chunk)
+            archived += len(chunk)
+
+        Enrollment.objects.using(using).filter(event_id__in=ids).delete()
+        Event.objects.using(using).filter(pk__in=ids).delete()
+    return len(events), archived
+
+
+def past_enrollments(hot_queryset, user, rows):
+    """
+    `rows.values()` of the user's past enrollments from both the hot table
+    (`hot_queryset`, already filtered to ended events) and the archive,
+    most recent event first
+    """
+    lookups = list(dict.fromkeys([*rows.lookups, 'event__starts_at', 'id']))
+    hot = hot_queryset.values(*lookups)
+    archived = ArchivedEnrollment.objects.filter(seeker=user).values(
+        *(ARCHIVED_ENROLLMENT_LOOKUPS[lookup] for lookup in lookups)
+    )
+    return hot.union(archived, all=True).order_by('-event__starts_at', '-id')
@@ -0,0 +1,313 @@
+"""
+Async versions of the read-heavy endpoints, for use under ASGI.
+
+They reuse the DRF serializers, filters and permissions of the viewsets in
+views.py but fetch rows with Django's async ORM, so a worker can keep serving
+other requests while it waits on the database.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import exceptions, filters, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import live, series as event_series
+from .filters import EventFilter
+from .models import Event, Enrollment
+from .permissions import IsSeeker
+from .archive import past_enrollments
+from .serializers import (
+    EventSerializer, EnrollmentSerializer, RowSerializer, enrollment_rows, event_rows, requested_fields,
+)
+from .views import enrollment_queryset_for, event_queryset_for
+
+
+class AsyncReadView(View):
+    """Minimal async counterpart of a DRF read-only view: JWT auth, permissions, pagination"""
+    http_method_names = ['get', 'options']
+    permission_classes = []
+    authentication = JWTAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        drf_request = Request(request, authenticators=())
+        try:
+            user = await self.authenticate(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+            drf_request.user = user
+            for permission in self.permission_classes:
+                if not await sync_to_async(permission().has_permission)(drf_request, self):
+                    raise exceptions.PermissionDenied()
+            return await super().dispatch(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        result = await sync_to_async(self.authentication.authenticate)(request)
+        if result is None:
+            return None
+        user, _ = result
+        return user
+
+    def handle_exception(self, exc):
+        response = self.render(
+            exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail},
+            exc.status_code,
+        )
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            response['WWW-Authenticate'] = self.authentication.authenticate_header(None)
+        return response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        return HttpResponse(renderer.render(data), status=status_code, content_type='application/json')
+
+    async def paginate(self, request, queryset, serializer_class):
+        """
+        Async equivalent of PageNumberPagination: same params and response shape.
+        `serializer_class` may also be a RowSerializer for a values() queryset.
+        """
+        page_size = api_settings.PAGE_SIZE
+        try:
+            page_number = int(request.query_params.get('page', 1))
+        except ValueError:
+            raise exceptions.NotFound('Invalid page.')
+
+        # Or a lazy sequence that queries when counted and sliced (series.Occurrences)
+        lazy = not isinstance(queryset, QuerySet)
+        count = await (sync_to_async(len)(queryset) if lazy else queryset.acount())
+        offset = (page_number - 1) * page_size
+        if page_number < 1 or (page_number > 1 and offset >= count):
+            raise exceptions.NotFound('Invalid page.')
+
+        if lazy:
+            rows = await sync_to_async(queryset.__getitem__)(slice(offset, offset + page_size))
+        else:
+            rows = [row async for row in queryset[offset:offset + page_size]]
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page_number + 1) if offset + page_size < count else None
+        if page_number == 1:
+            previous_url = None
+        elif page_number == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page_number - 1)
+
+        return self.render({
+            'count': count,
+            'next': next_url,
+            'previous': previous_url,
+            'results': (
+                serializer_class.serialize(rows) if isinstance(serializer_class, RowSerializer)
+                else serializer_class(rows, many=True, context={'request': request}).data
+            ),
+        })
+
+
+class AsyncEventListView(AsyncReadView):
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = EventFilter
+    ordering_fields = ['starts_at', 'created_at']
+
+    def get_queryset(self, request):
+        fields = requested_fields(request, EventSerializer)
+        return event_queryset_for(Event.objects.all().order_by('starts_at'), request.user, fields)
+
+    async def get(self, request):
+        queryset = self.get_queryset(request)
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        # As EventViewSet.list: with the occurrences of recurring series not stored yet
+        rows = event_rows.subset(requested_fields(request, EventSerializer))
+        values = await sync_to_async(event_series.with_occurrences)(queryset, request, rows)
+        return await self.paginate(request, values, rows)
+
+
+class AsyncEventDetailView(AsyncEventListView):
+    async def get(self, request, pk):
+        try:
+            event = await self.get_queryset(request).aget(pk=pk)
+        except Event.DoesNotExist:
+            raise exceptions.NotFound('No Event matches the given query.')
+        return self.render(EventSerializer(event, context={'request': request}).data)
+
+
+class AsyncEnrollmentListView(AsyncReadView):
+    permission_classes = [IsSeeker]
+
+    def get_queryset(self, request):
+        fields = requested_fields(request, EnrollmentSerializer)
+        return enrollment_queryset_for(
+            Enrollment.objects.filter(seeker=request.user, event__deleted_at__isnull=True), fields
+        )
+
+
+class AsyncUpcomingEnrollmentsView(AsyncEnrollmentListView):
+    async def get(self, request):
+        enrollments = self.get_queryset(request).filter(
+            event__starts_at__gt=timezone.now()
+        ).order_by('event__starts_at')
+        return await self.paginate(request, enrollments, EnrollmentSerializer)
+
+
+class AsyncPastEnrollmentsView(AsyncEnrollmentListView):
+    async def get(self, request):
+        enrollments = self.get_queryset(request).filter(event__ends_at__lt=timezone.now())
+        rows = enrollment_rows.subset(requested_fields(request, EnrollmentSerializer))
+        return await self.paginate(request, past_enrollments(enrollments, request.user, rows), rows)
+
+
+class LiveView(AsyncReadView):
+    """Shared parameters of the live-update endpoints (events/live.py)"""
+
+    def event_ids(self, request):
+        """?events=1,2,3 limits the deltas to those events"""
+        value = request.query_params.get('events')
+        if not value:
+            return None
+        try:
+            return {int(pk) for pk in value.split(',') if pk.strip()}
+        except ValueError:
+            raise exceptions.ValidationError({'events': 'Expected a comma-separated list of event ids.'})
+
+    def cursor(self, request):
+        """Id of the last delta the client has seen (?after= or SSE Last-Event-ID), None if new"""
+        value = request.query_params.get('after') or request.headers.get('Last-Event-ID')
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise exceptions.ValidationError({'after': 'Expected a delta id.'})
+
+
+class LiveUpdatesView(LiveView):
+    """
+    Server-sent event stream of deltas (`event: delta`). Reconnecting with
+    Last-Event-ID (or ?after=) first replays what was missed from the outbox;
+    too much to replay sends `event: reset` and the client should refetch.
+    Requires an ASGI server.
+
+    `id:` is the outbox cursor (live.replay()), not each delta's id: deltas
+    pushed live may be ahead of a transaction still committing, so they carry
+    no id, and a stream that pushed any re-reads the outbox every
+    LIVE_UPDATES_HEARTBEAT_SECONDS to move the cursor past them.
+    """
+
+    async def get(self, request):
+        event_ids = self.event_ids(request)
+        after = self.cursor(request)
+        # Subscribe before reading the outbox, so nothing committed in between is lost
+        subscription = live.subscribe(event_ids)
+        try:
+            if after is None:
+                after = await sync_to_async(live.last_id)()
+            backlog = await sync_to_async(live.replay)(after, event_ids, settings.LIVE_UPDATES_REPLAY_LIMIT + 1)
+        except BaseException:
+            live.hub.unsubscribe(subscription)
+            raise
+
+        response = StreamingHttpResponse(
+            self.stream(subscription, event_ids, after, backlog), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+        return response
+
+    @staticmethod
+    def replayed(backlog, sent, after):
+        """SSE frames of a live.Replay from `after`: deltas not superseded by one already sent, then its cursor"""
+        last = after
+        for message in backlog.deltas:
+            if message['id'] > sent.get(message['event'], 0):
+                sent[message['event']] = last = message['id']
+                yield f"id: {last}\nevent: delta\ndata: {live.encode(message)}\n\n".encode()
+        if backlog.cursor > last:
+            yield f"id: {backlog.cursor}\n\n".encode()
+
+    async def stream(self, subscription, event_ids, after, backlog):
+        try:
+            yield f"retry: {settings.LIVE_UPDATES_RETRY_MS}\n\n".encode()
+            if len(backlog.deltas) > settings.LIVE_UPDATES_REPLAY_LIMIT:
+                yield f"event: reset\ndata: {live.encode({'id': backlog.cursor})}\n\n".encode()
+                return
+            sent = {}  # event id -> id of the last delta sent for it
+            for frame in self.replayed(backlog, sent, after):
+                yield frame
+            cursor = backlog.cursor
+            # Pushed deltas past the cursor, or entries the replay held back
+            behind = backlog.held
+
+            # Streams end after a while; EventSource reconnects with Last-Event-ID
+            deadline = time.monotonic() + settings.LIVE_UPDATES_STREAM_SECONDS
+            synced_at = time.monotonic()
+            while (remaining := deadline - time.monotonic()) > 0:
+                item = await subscription.get(min(remaining, settings.LIVE_UPDATES_HEARTBEAT_SECONDS))
+                if subscription.overflowed:
+                    return
+                if item is not None:
+                    message, frame = item
+                    # Per event: a delta committed late is still news for its own event
+                    if message['id'] > sent.get(message['event'], 0):
+                        sent[message['event']] = message['id']
+                        yield frame
+                    behind = behind or message['id'] > cursor
+                if behind and time.monotonic() - synced_at >= settings.LIVE_UPDATES_HEARTBEAT_SECONDS:
+                    backlog = await sync_to_async(live.replay)(cursor, event_ids, settings.LIVE_UPDATES_REPLAY_LIMIT)
+                    for frame in self.replayed(backlog, sent, cursor):
+                        yield frame
+                    cursor, synced_at = backlog.cursor, time.monotonic()
+                    behind = backlog.held or cursor < max(sent.values(), default=0)
+                if item is None:
+                    yield b": keep-alive\n\n"
+        finally:
+            live.hub.unsubscribe(subscription)
+
+
+class LivePollView(LiveView):
+    """
+    Long-poll fallback: returns {"last_id", "deltas"} as soon as there are
+    deltas after ?after=, or empty after ?timeout= seconds. Without ?after=
+    it returns the cursor to start polling from at once. Deltas are read from
+    the outbox (live.replay()), so last_id never passes a transaction that is
+    still committing; a pushed delta only wakes the poll up.
+    """
+
+    async def get(self, request):
+        event_ids = self.event_ids(request)
+        after = self.cursor(request)
+        if after is None:
+            return self.render({'last_id': await sync_to_async(live.last_id)(), 'deltas': []})
+        try:
+            timeout = min(float(request.query_params.get('timeout', settings.LIVE_UPDATES_POLL_SECONDS)),
+                          settings.LIVE_UPDATES_POLL_SECONDS)
+        except ValueError:
+            raise exceptions.ValidationError({'timeout': 'Expected a number of seconds.'})
+
+        subscription = live.subscribe(event_ids)
+        try:
+            limit = settings.LIVE_UPDATES_REPLAY_LIMIT
+            backlog = await sync_to_async(live.replay)(after, event_ids, limit)
+            deadline = time.monotonic() + timeout
+            while not backlog.deltas and (remaining := deadline - time.monotonic()) > 0:
+                if await subscription.get(remaining) is None and not subscription.overflowed:
+                    break
+                # Whatever else arrived with it is read from the outbox too
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                backlog = await sync_to_async(live.replay)(backlog.cursor, event_ids, limit)
+                if subscription.overflowed:
+                    break
+        finally:
+            live.hub.unsubscribe(subscription)
+        return self.render({'last_id': backlog.cursor, 'deltas': backlog.deltas})
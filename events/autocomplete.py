@@ -0,0 +1,277 @@
+"""
+Typeahead for event titles and locations: GET /events/events/autocomplete/?q=.
+
+Each process keeps a sorted in-memory index of normalized keys (lower-cased,
+accents and punctuation stripped) -> suggestion. A title is indexed from the
+start of each of its first few words, so "work" finds "Django Workshop". A
+lookup is a binary search to the first key >= the prefix plus a short scan,
+with no database query.
+
+The index is built from one .values_list() pass over the listed events (in
+the gunicorn master with GUNICORN_PRELOAD, otherwise on first use) and holds at
+most AUTOCOMPLETE_MAX_SUGGESTIONS distinct suggestions, preferring the latest
+events. Event saves and deletes update it in place in the process that made
+them. Other processes notice through a version counter in the cache, checked
+every AUTOCOMPLETE_CHECK_SECONDS, and rebuild in a background thread. That
+needs a cache shared by all processes (CACHE_URL): with the per-process memory
+cache, each process rebuilds every AUTOCOMPLETE_REBUILD_SECONDS instead.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'autocomplete:version'
+# Title keys start at each of the first TITLE_WORDS words
+TITLE_WORDS = 4
+# Keys scanned per lookup before ranking
+SCAN_LIMIT = 200
+
+re_separators = re.compile(r'[^\w]+')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    return ' '.join(re_separators.sub(' ', text).replace('_', ' ').split())
+
+
+def keys_for(kind, text):
+    key = normalize(text)
+    if not key:
+        return []
+    if kind == 'location':
+        return [key]
+    words = key.split(' ')
+    return [' '.join(words[start:]) for start in range(min(len(words), TITLE_WORDS))]
+
+
+class Suggestion:
+    """A title or location offered by the index, with the number of listed events that have it"""
+    __slots__ = ('kind', 'text', 'count')
+
+    def __init__(self, kind, text):
+        self.kind, self.text, self.count = kind, text, 0
+
+    def __lt__(self, other):
+        # Orders index entries whose keys are equal; equality and hashing stay by identity
+        return (self.kind, self.text) < (other.kind, other.text)
+
+    def rank(self):
+        return -self.count, self.text
+
+
+class PrefixIndex:
+    """Sorted (key, Suggestion) entries; every key of a suggestion shares the one object"""
+
+    def __init__(self, max_suggestions):
+        self.max_suggestions = max_suggestions
+        self.entries = []
+        self.suggestions = {}  # (kind, text) -> Suggestion
+
+    @classmethod
+    def build(cls, rows, max_suggestions):
+        """From (title, location) rows, most important first"""
+        index = cls(max_suggestions)
+        for title, location in rows:
+            for kind, text in (('title', title), ('location', location)):
+                suggestion = index.suggestions.get((kind, text))
+                if suggestion is None:
+                    if len(index.suggestions) >= max_suggestions:
+                        continue
+                    suggestion = index.suggestions[kind, text] = Suggestion(kind, text)
+                suggestion.count += 1
+        index.entries = sorted(
+            (key, suggestion) for suggestion in index.suggestions.values()
+            for key in keys_for(suggestion.kind, suggestion.text)
+        )
+        return index
+
+    def add(self, title, location):
+        for kind, text in (('title', title), ('location', location)):
+            suggestion = self.suggestions.get((kind, text))
+            if suggestion is None:
+                if len(self.suggestions) >= self.max_suggestions:
+                    continue
+                suggestion = self.suggestions[kind, text] = Suggestion(kind, text)
+                for key in keys_for(kind, text):
+                    bisect.insort(self.entries, (key, suggestion))
+            suggestion.count += 1
+
+    def remove(self, title, location):
+        for kind, text in (('title', title), ('location', location)):
+            suggestion = self.suggestions.get((kind, text))
+            if suggestion is None:
+                continue
+            suggestion.count -= 1
+            if suggestion.count > 0:
+                continue
+            del self.suggestions[kind, text]
+            for key in keys_for(kind, text):
+                position = bisect.bisect_left(self.entries, (key, suggestion))
+                if position < len(self.entries) and self.entries[position][1] is suggestion:
+                    del self.entries[position]
+
+    def search(self, prefix, limit=10, kind=None):
+        """[(kind, text, count)], most events first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        entries = self.entries
+        found = {}  # by identity: a title can match on two of its keys
+        position = bisect.bisect_left(entries, (prefix,))
+        for key, suggestion in entries[position:position + SCAN_LIMIT]:
+            if not key.startswith(prefix):
+                break
+            # count is 0 for an entry another thread is about to remove
+            if suggestion.count and (kind is None or suggestion.kind == kind):
+                found[suggestion] = None
+        return [
+            (suggestion.kind, suggestion.text, suggestion.count)
+            for suggestion in heapq.nsmallest(limit, found, key=Suggestion.rank)
+        ]
+
+
+class Autocomplete:
+    """The process's index, kept in step with the database"""
+
+    def __init__(self):
+        self.index = None
+        self.version = None
+        self.checked_at = 0.0
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def reset(self):
+        self.index, self.version, self.checked_at, self.built_at = None, None, 0.0, 0.0
+
+    def current_version(self):
+        cache.add(VERSION_KEY, 0, None)
+        return cache.get(VERSION_KEY)
+
+    def build(self):
+        version = self.current_version()
+        rows = (
+            Event.objects.using('default').order_by('-starts_at').values_list('title', 'location')
+            .iterator(chunk_size=10000)
+        )
+        index = PrefixIndex.build(rows, settings.AUTOCOMPLETE_MAX_SUGGESTIONS)
+        with self._lock:
+            self.index, self.version = index, version
+            self.checked_at = self.built_at = time.monotonic()
+        logger.info(
+            "Autocomplete index built: %d suggestions, %d keys", len(index.suggestions), len(index.entries)
+        )
+        return index
+
+    def get_index(self):
+        if self.index is None:
+            return self.build()
+        if time.monotonic() - self.checked_at > settings.AUTOCOMPLETE_CHECK_SECONDS:
+            self.checked_at = time.monotonic()
+            if self.current_version() != self.version or self.expired():
+                self.rebuild_in_background()
+        return self.index
+
+    def expired(self):
+        """Due for a rebuild on the timer (AUTOCOMPLETE_REBUILD_SECONDS, 0 for never)"""
+        rebuild_seconds = settings.AUTOCOMPLETE_REBUILD_SECONDS
+        return bool(rebuild_seconds) and time.monotonic() - self.built_at > rebuild_seconds
+
+    def rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            try:
+                self.build()
+            except Exception:
+                logger.exception("Autocomplete index rebuild failed")
+            finally:
+                self._rebuilding = False
+                connections.close_all()  # this thread's
+
+        threading.Thread(target=run, name='autocomplete-rebuild', daemon=True).start()
+
+    def changed(self, old, new, known=True):
+        """
+        Apply one event's change: (title, location) before and after, None
+        when not listed. known=False when the old values weren't loaded.
+        """
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 0, None)
+            version = cache.incr(VERSION_KEY)
+        with self._lock:
+            if self.index is None:
+                return
+            if old is not None:
+                self.index.remove(*old)
+            if new is not None:
+                self.index.add(*new)
+            if known and self.version is not None and version == self.version + 1:
+                self.version = version
+            # Otherwise another process changed events too, or the change is
+            # only partly known: the next check rebuilds
+
+
+autocomplete = Autocomplete()
+
+UNKNOWN = object()
+
+
+def listed_values(instance):
+    """(title, location) as loaded, None if not listed (soft-deleted), UNKNOWN if deferred"""
+    values = instance.__dict__
+    if 'title' not in values or 'location' not in values or 'deleted_at' not in values:
+        return UNKNOWN
+    if values['deleted_at'] is not None:
+        return None
+    return values['title'], values['location']
+
+
+@receiver(post_init, sender=Event)
+def remember_values(instance, **kwargs):
+    instance._autocomplete_values = listed_values(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Event)
+def event_saved(instance, **kwargs):
+    old, new = instance._autocomplete_values, listed_values(instance)
+    instance._autocomplete_values = new
+    if old == new:
+        return
+    if old is UNKNOWN or new is UNKNOWN:
+        # Can't tell what changed: let every process rebuild
+        known_new = None if new is UNKNOWN else new
+        transaction.on_commit(lambda: autocomplete.changed(None, known_new, known=False))
+        return
+    transaction.on_commit(lambda: autocomplete.changed(old, new))
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(instance, **kwargs):
+    old = instance._autocomplete_values
+    if old is None:
+        return
+    if old is UNKNOWN:
+        transaction.on_commit(lambda: autocomplete.changed(None, None, known=False))
+    else:
+        transaction.on_commit(lambda: autocomplete.changed(old, None))
@@ -0,0 +1,322 @@
+"""
+Check-in at the door with signed tokens.
+
+Every active enrollment carries a check-in token (EnrollmentSerializer
+"checkin_token", shown to the seeker as a QR code):
+
+    <enrollment id>.<event id>.<expiry>.<signature>
+
+The ids and the expiry (Unix time, CHECKIN_TOKEN_GRACE_HOURS after the event
+ends) are base36. The signature is a truncated HMAC-SHA256 of the rest, keyed
+from SECRET_KEY. A scan (POST /events/check-in/) verifies the token on its own,
+without reading the enrollment, and only checks in the cache that the staff
+member owns the event, that the enrollment wasn't canceled (revoke()) and that
+the token wasn't scanned before. Attendance rows are buffered in the process
+and inserted in bulk (AttendanceWriter). Enrollments canceled other than
+through the API are dropped when the rows are written.
+
+Cancellations and earlier scans are only seen across processes with a shared
+cache (CACHE_URL). With the per-process memory cache, a scan served by another
+worker than the cancellation lets the canceled ticket in, and a rescan on
+another worker reports a first check-in.
+
+Scanners that lost the connection upload their scans later in one request
+(POST /events/check-in/sync/). Those are verified the same way and written at
+once, each at the time it was scanned.
+"""
+import atexit
+import logging
+import threading
+from base64 import urlsafe_b64encode
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.dateparse import parse_datetime
+from django.utils.http import base36_to_int, int_to_base36
+
+from .models import Attendance, Enrollment, Event
+
+logger = logging.getLogger(__name__)
+
+KEY_SALT = 'events.checkin'
+# 96 bits of HMAC-SHA256: 16 characters, keeping the token small enough for a low-density QR code
+SIGNATURE_BYTES = 12
+
+INVALID = "Invalid check-in token."
+EXPIRED = "This check-in token has expired."
+NOT_YOUR_EVENT = "This ticket is for another facilitator's event."
+CANCELED = "This enrollment was canceled."
+
+CheckInPass = namedtuple('CheckInPass', 'enrollment_id event_id expires_at')
+
+
+def signature(payload):
+    digest = salted_hmac(KEY_SALT, payload, algorithm='sha256').digest()[:SIGNATURE_BYTES]
+    return urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def expiry(ends_at):
+    return ends_at + timedelta(hours=settings.CHECKIN_TOKEN_GRACE_HOURS)
+
+
+def token_for(enrollment_id, event_id, ends_at):
+    """The check-in token of an enrollment in an event ending at `ends_at`"""
+    payload = '.'.join(
+        int_to_base36(value) for value in (enrollment_id, event_id, int(expiry(ends_at).timestamp()))
+    )
+    return f'{payload}.{signature(payload)}'
+
+
+def verify(token, at=None):
+    """
+    The CheckInPass of a token valid at `at` (default now), or ValueError
+    with a message for the API. Reads nothing but the token.
+    """
+    try:
+        payload, signed = token.rsplit('.', 1)
+        enrollment_id, event_id, expires = (base36_to_int(part) for part in payload.split('.'))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(INVALID)
+    if not constant_time_compare(signed, signature(payload)):
+        raise ValueError(INVALID)
+    expires_at = datetime.fromtimestamp(expires, dt_timezone.utc)
+    if expires_at <= (at or timezone.now()):
+        raise ValueError(EXPIRED)
+    return CheckInPass(enrollment_id, event_id, expires_at)
+
+
+def seen_key(enrollment_id):
+    return f'checkin:seen:{enrollment_id}'
+
+
+def revoked_key(enrollment_id):
+    return f'checkin:revoked:{enrollment_id}'
+
+
+def revoke(enrollment_id, ends_at):
+    """Refuse live scans of a canceled enrollment's token, until the token expires"""
+    timeout = max(int((expiry(ends_at) - timezone.now()).total_seconds()), 1)
+    cache.set(revoked_key(enrollment_id), True, timeout)
+
+
+def reinstate(enrollment_id):
+    """Accept the token again: a re-enrollment keeps the enrollment, and so its token"""
+    cache.delete(revoked_key(enrollment_id))
+
+
+def owner_id(event_id):
+    """created_by of an event, cached: check-ins reuse it for every scan at the door"""
+    return cache.get_or_set(
+        f'checkin:owner:{event_id}',
+        lambda: Event.all_objects.filter(pk=event_id).values_list('created_by_id', flat=True).first(),
+        settings.CHECKIN_OWNER_CACHE_SECONDS,
+    )
+
+
+def check_owner(checkin_pass, user):
+    if owner_id(checkin_pass.event_id) != user.pk:
+        raise ValueError(NOT_YOUR_EVENT)
+
+
+def write_attendance(attendances, batch_size=None):
+    """
+    Insert Attendance rows (unsaved instances, at most one per enrollment),
+    skipping enrollments that are no longer active and those already checked
+    in. Returns {'created', 'duplicate', 'not_enrolled'}: enrollment ids.
+    """
+    batch_size = batch_size or settings.CHECKIN_WRITE_BATCH_SIZE
+    outcome = {'created': [], 'duplicate': [], 'not_enrolled': []}
+    for i in range(0, len(attendances), batch_size):
+        batch = attendances[i:i + batch_size]
+        ids = [attendance.enrollment_id for attendance in batch]
+        with transaction.atomic():
+            active = set(
+                Enrollment.objects.filter(pk__in=ids, status='ENROLLED').values_list('pk', flat=True)
+            )
+            present = set(
+                Attendance.objects.filter(enrollment_id__in=active).values_list('enrollment_id', flat=True)
+            )
+            new = [attendance for attendance in batch if attendance.enrollment_id in active - present]
+            # A concurrent writer may have inserted some since: the first row stays
+            Attendance.objects.bulk_create(new, ignore_conflicts=True)
+        for enrollment_id in ids:
+            if enrollment_id not in active:
+                outcome['not_enrolled'].append(enrollment_id)
+            else:
+                outcome['duplicate' if enrollment_id in present else 'created'].append(enrollment_id)
+    return outcome
+
+
+class AttendanceWriter:
+    """
+    Attendance rows of live scans, buffered in the process and written with
+    write_attendance() once CHECKIN_BUFFER_SIZE are pending or
+    CHECKIN_FLUSH_SECONDS after the first one, whichever comes first
+    """
+
+    def __init__(self):
+        self._pending = {}  # enrollment id -> Attendance
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, attendance):
+        with self._lock:
+            self._pending.setdefault(attendance.enrollment_id, attendance)
+            full = len(self._pending) >= settings.CHECKIN_BUFFER_SIZE
+            if not full:
+                self._schedule()
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                # The rows stay pending and the retry is scheduled: the scan itself succeeded
+                logger.exception("Attendance flush failed")
+
+    def _schedule(self):
+        """Start the flush timer unless it is running (with the lock held)"""
+        if self._timer is None:
+            self._timer = threading.Timer(settings.CHECKIN_FLUSH_SECONDS, self.flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def take(self):
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return pending
+
+    def flush(self):
+        """Write the pending rows now; returns write_attendance()'s outcome"""
+        attendances = self.take()
+        if not attendances:
+            return {'created': [], 'duplicate': [], 'not_enrolled': []}
+        try:
+            return write_attendance(attendances)
+        except Exception:
+            # Kept, and retried CHECKIN_FLUSH_SECONDS later
+            with self._lock:
+                for attendance in attendances:
+                    self._pending.setdefault(attendance.enrollment_id, attendance)
+                self._schedule()
+            raise
+
+    def flush_in_background(self):
+        try:
+            outcome = self.flush()
+            if outcome['not_enrolled']:
+                logger.info("Dropped %d check-ins of canceled enrollments", len(outcome['not_enrolled']))
+        except Exception:
+            logger.exception("Attendance flush failed")
+        finally:
+            connections.close_all()  # this thread's
+
+
+attendance_writer = AttendanceWriter()
+
+
+@atexit.register
+def flush_on_exit():
+    if len(attendance_writer):
+        try:
+            attendance_writer.flush()
+        except Exception:
+            logger.exception("Attendance flush at exit failed")
+
+
+def check_in(token, user):
+    """
+    A live scan: verify the token, then queue its Attendance. Returns
+    (CheckInPass, checked_in_at, first) where first is False for a token
+    scanned before; ValueError for a token not to be let in.
+    """
+    checkin_pass = verify(token)
+    check_owner(checkin_pass, user)
+    if cache.get(revoked_key(checkin_pass.enrollment_id)):
+        raise ValueError(CANCELED)
+    now = timezone.now()
+    timeout = max(int((checkin_pass.expires_at - now).total_seconds()), 1)
+    first = cache.add(seen_key(checkin_pass.enrollment_id), now, timeout)
+    checked_in_at = now if first else cache.get(seen_key(checkin_pass.enrollment_id)) or now
+    # Queued on a rescan too: the first scan's row may have died with its
+    # process's buffer. write_attendance() skips it if it was stored.
+    attendance_writer.add(Attendance(
+        enrollment_id=checkin_pass.enrollment_id, event_id=checkin_pass.event_id,
+        checked_in_at=checked_in_at, checked_in_by=user, source='SCAN',
+    ))
+    return checkin_pass, checked_in_at, first
+
+
+def scan_time(value, now):
+    """A scan's ISO 8601 scanned_at (naive: UTC), now when missing"""
+    if value is None:
+        return now
+    try:
+        scanned_at = parse_datetime(value)
+    except (TypeError, ValueError):
+        scanned_at = None
+    if scanned_at is None:
+        raise ValueError("Invalid scanned_at.")
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at, dt_timezone.utc)
+    # A scanner's clock running ahead doesn't move check-ins into the future
+    return min(scanned_at, now)
+
+
+def sync(scans, user):
+    """
+    Offline scans, [(token, scanned_at)] as the scanner recorded them: each
+    verified as of its scan time and written at once, the earliest scan of
+    an enrollment winning. Returns {'checked_in', 'already_checked_in',
+    'rejected': [{'index', 'error'}]}.
+    """
+    now = timezone.now()
+    rejected, earliest, owners = [], {}, {}
+    for index, (token, scanned_at) in enumerate(scans):
+        try:
+            scanned_at = scan_time(scanned_at, now)
+            checkin_pass = verify(token, at=scanned_at)
+            if checkin_pass.event_id not in owners:
+                owners[checkin_pass.event_id] = owner_id(checkin_pass.event_id)
+            if owners[checkin_pass.event_id] != user.pk:
+                raise ValueError(NOT_YOUR_EVENT)
+        except ValueError as error:
+            rejected.append({'index': index, 'error': str(error)})
+            continue
+        previous = earliest.get(checkin_pass.enrollment_id)
+        if previous is None or scanned_at < previous[1]:
+            earliest[checkin_pass.enrollment_id] = (checkin_pass, scanned_at, index)
+
+    # Live scans still buffered in this process go in first
+    attendance_writer.flush()
+    outcome = write_attendance([
+        Attendance(
+            enrollment_id=checkin_pass.enrollment_id, event_id=checkin_pass.event_id,
+            checked_in_at=scanned_at, checked_in_by=user, source='SYNC',
+        )
+        for checkin_pass, scanned_at, _ in earliest.values()
+    ])
+    repeated = len(scans) - len(rejected) - len(earliest)
+    for enrollment_id in outcome['not_enrolled']:
+        rejected.append({'index': earliest[enrollment_id][2], 'error': CANCELED})
+    if outcome['created']:
+        # Later live scans of these tickets are reported as repeated
+        expires_at = max(earliest[enrollment_id][0].expires_at for enrollment_id in outcome['created'])
+        cache.set_many(
+            {seen_key(enrollment_id): earliest[enrollment_id][1] for enrollment_id in outcome['created']},
+            max(int((expires_at - now).total_seconds()), 1),
+        )
+    return {
+        'checked_in': len(outcome['created']),
+        'already_checked_in': len(outcome['duplicate']) + repeated,
+        'rejected': sorted(rejected, key=lambda item: item['index']),
+    }
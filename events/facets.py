@@ -0,0 +1,68 @@
+"""
+Facet counts for the event search UI: GET /events/events/facets/.
+
+For the events matching the current EventFilter params, counts per language,
+per location and per start month, each one grouped aggregate (top
+FACETS_LIMIT values). Results are cached under the normalized filter params
+plus a version token that any Event save or delete replaces, so a change is
+visible on the next request and facet panels otherwise cost a cache hit.
+That holds across processes only with a shared cache (CACHE_URL): with the
+per-process memory cache, other processes keep their counts until
+FACETS_CACHE_SECONDS runs out, which then defaults to 30 seconds.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .filters import EventFilter
+from .models import Event
+
+VERSION_KEY = 'facets:version'
+
+
+def version():
+    return cache.get_or_set(VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate(**kwargs):
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def cache_key(params):
+    """Key for these query params: only EventFilter's, sorted and stripped (page, ordering etc. don't matter)"""
+    filters = sorted(
+        (name, value.strip()) for name in EventFilter.base_filters
+        for value in params.getlist(name) if value.strip()
+    )
+    digest = hashlib.sha256(repr(filters).encode()).hexdigest()
+    return f'facets:{version()}:{digest}'
+
+
+def grouped(queryset, field, limit):
+    return (
+        queryset.order_by().values(value=F(field)).annotate(count=Count('pk'))
+        .order_by('-count', 'value')[:limit]
+    )
+
+
+def facet_counts(queryset, limit=None):
+    """{'total', 'language': [...], 'location': [...], 'month': [...]} of [{'value', 'count'}]"""
+    limit = limit or settings.FACETS_LIMIT
+    months = list(
+        queryset.order_by().values(month=TruncMonth('starts_at')).annotate(count=Count('pk')).order_by('month')
+    )
+    return {
+        # Every event falls in one month, so no separate COUNT(*)
+        'total': sum(row['count'] for row in months),
+        'language': list(grouped(queryset, 'language', limit)),
+        'location': list(grouped(queryset, 'location', limit)),
+        'month': [{'value': row['month'].strftime('%Y-%m'), 'count': row['count']} for row in months],
+    }
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+import factory
+from django.utils import timezone
+
+from users.factories import UserFactory
+from .models import Event, Enrollment
+
+
+class EventFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Event
+
+    title = factory.Faker('catch_phrase')
+    description = factory.Faker('paragraph', nb_sentences=5)
+    language = 'English'
+    location = factory.Faker('city')
+    starts_at = factory.LazyFunction(lambda: timezone.now() + timedelta(days=7))
+    ends_at = factory.LazyAttribute(lambda o: o.starts_at + timedelta(hours=2))
+    capacity = 50
+    created_by = factory.SubFactory(UserFactory)
+
+
+class EnrollmentFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Enrollment
+
+    event = factory.SubFactory(EventFactory)
+    seeker = factory.SubFactory(UserFactory)
+    status = 'ENROLLED'
@@ -1,14 +1,72 @@
 import django_filters
-from .models import Event
+from django import forms
+from django.conf import settings
+from django.db.models import Q
+from . import geo
+from .models import Event, EventSeries
+
+
+class PointField(forms.CharField):
+    """'lat,lon' -> (lat, lon)"""
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return None
+        try:
+            latitude, longitude = (float(part) for part in value.split(','))
+        except ValueError:
+            raise forms.ValidationError("Expected latitude,longitude, e.g. 18.52,73.85.")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise forms.ValidationError("Latitude must be within ±90 and longitude within ±180.")
+        return latitude, longitude
+
+
+class PointFilter(django_filters.Filter):
+    field_class = PointField
+
 
 class EventFilter(django_filters.FilterSet):
     starts_after = django_filters.DateTimeFilter(field_name='starts_at', lookup_expr='gte')
     starts_before = django_filters.DateTimeFilter(field_name='starts_at', lookup_expr='lte')
     q = django_filters.CharFilter(method='filter_search')
-    
+    # Events within radius_km of near=lat,lon, nearest first (unless ?ordering= is given)
+    near = PointFilter(method='filter_near')
+    radius_km = django_filters.NumberFilter(method='filter_radius', min_value=0, max_value=settings.GEO_MAX_RADIUS_KM)
+
     class Meta:
         model = Event
         fields = ['location', 'language', 'starts_after', 'starts_before']
 
     def filter_search(self, queryset, name, value):
-        return queryset.filter(title__icontains=value) | queryset.filter(description__icontains=value)
+        return queryset.filter(Q(title__icontains=value) | Q(description__icontains=value))
+
+    def filter_near(self, queryset, name, value):
+        latitude, longitude = value
+        radius_km = self.form.cleaned_data.get('radius_km')
+        if radius_km is None:
+            radius_km = settings.GEO_DEFAULT_RADIUS_KM
+        return geo.near(queryset, latitude, longitude, float(radius_km))
+
+    def filter_radius(self, queryset, name, value):
+        # Applied by filter_near
+        return queryset
+
+
+class SeriesFilter(EventFilter):
+    """
+    EventFilter's params applied to recurring series, for listing their
+    occurrences (events/series.py): the date window and the distance are
+    applied to the occurrences themselves
+    """
+    starts_after = django_filters.DateTimeFilter(method='filter_occurrences')
+    starts_before = django_filters.DateTimeFilter(method='filter_occurrences')
+
+    class Meta(EventFilter.Meta):
+        model = EventSeries
+
+    def filter_near(self, queryset, name, value):
+        return queryset
+
+    def filter_occurrences(self, queryset, name, value):
+        return queryset
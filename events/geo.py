@@ -0,0 +1,255 @@
+"""
+Proximity search without PostGIS.
+
+Events with coordinates also store their geohash (GEOHASH_PRECISION
+characters, ~5 m cells), indexed like any string column. Points in the same
+geohash cell share its prefix, so "events within r km" becomes:
+
+1. coarse: the geohash cells covering the circle's bounding box (at most
+   MAX_CELLS, as coarse as needed), each a prefix range scan on the index:
+   geohash >= 'tdr1' AND geohash < 'tdr1~' (adjacent cells are merged into
+   one range);
+2. exact: the haversine distance, computed in SQL for the candidates only,
+   filtered to the radius and used for ordering.
+
+Coordinates come from the client, or from geocode(): an offline gazetteer of
+city names (GAZETTEER, plus the CSV file at GEO_GAZETTEER_FILE if set).
+"""
+import csv
+import functools
+import math
+
+from django.conf import settings
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+MAX_CELLS = 16
+EARTH_RADIUS_KM = 6371.0088
+
+# Offline gazetteer: lower-cased place name -> (latitude, longitude)
+GAZETTEER = {
+    'ahmedabad': (23.0225, 72.5714),
+    'amsterdam': (52.3676, 4.9041),
+    'bangalore': (12.9716, 77.5946),
+    'bengaluru': (12.9716, 77.5946),
+    'barcelona': (41.3874, 2.1686),
+    'beijing': (39.9042, 116.4074),
+    'berlin': (52.5200, 13.4050),
+    'bhubaneswar': (20.2961, 85.8245),
+    'boston': (42.3601, -71.0589),
+    'buenos aires': (-34.6037, -58.3816),
+    'cairo': (30.0444, 31.2357),
+    'chandigarh': (30.7333, 76.7794),
+    'chennai': (13.0827, 80.2707),
+    'chicago': (41.8781, -87.6298),
+    'delhi': (28.6139, 77.2090),
+    'new delhi': (28.6139, 77.2090),
+    'dubai': (25.2048, 55.2708),
+    'dublin': (53.3498, -6.2603),
+    'goa': (15.2993, 74.1240),
+    'gurgaon': (28.4595, 77.0266),
+    'gurugram': (28.4595, 77.0266),
+    'hong kong': (22.3193, 114.1694),
+    'hyderabad': (17.3850, 78.4867),
+    'istanbul': (41.0082, 28.9784),
+    'jaipur': (26.9124, 75.7873),
+    'jakarta': (-6.2088, 106.8456),
+    'kochi': (9.9312, 76.2673),
+    'kolkata': (22.5726, 88.3639),
+    'lagos': (6.5244, 3.3792),
+    'lisbon': (38.7223, -9.1393),
+    'london': (51.5074, -0.1278),
+    'los angeles': (34.0522, -118.2437),
+    'lucknow': (26.8467, 80.9462),
+    'madrid': (40.4168, -3.7038),
+    'melbourne': (-37.8136, 144.9631),
+    'mexico city': (19.4326, -99.1332),
+    'mumbai': (19.0760, 72.8777),
+    'nairobi': (-1.2921, 36.8219),
+    'new york': (40.7128, -74.0060),
+    'noida': (28.5355, 77.3910),
+    'paris': (48.8566, 2.3522),
+    'pune': (18.5204, 73.8567),
+    'rishikesh': (30.0869, 78.2676),
+    'rome': (41.9028, 12.4964),
+    'san francisco': (37.7749, -122.4194),
+    'sao paulo': (-23.5505, -46.6333),
+    'seattle': (47.6062, -122.3321),
+    'seoul': (37.5665, 126.9780),
+    'singapore': (1.3521, 103.8198),
+    'sydney': (-33.8688, 151.2093),
+    'tokyo': (35.6762, 139.6503),
+    'toronto': (43.6532, -79.3832),
+    'varanasi': (25.3176, 82.9739),
+    'vancouver': (49.2827, -123.1207),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def gazetteer():
+    """GAZETTEER plus GEO_GAZETTEER_FILE (CSV rows: name, latitude, longitude)"""
+    places = dict(GAZETTEER)
+    if settings.GEO_GAZETTEER_FILE:
+        with open(settings.GEO_GAZETTEER_FILE, newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                try:
+                    places[row[0].strip().lower()] = (float(row[1]), float(row[2]))
+                except (IndexError, ValueError):
+                    continue  # header or malformed row
+    return places
+
+
+def geocode(location):
+    """(latitude, longitude) for a free-text location such as 'Pune' or 'Pune, India', or None"""
+    places = gazetteer()
+    name = ' '.join(location.lower().split())
+    return places.get(name) or places.get(name.split(',')[0].strip())
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, interval = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def geohash_for(latitude, longitude):
+    """The geohash stored for a point; '' when it has no coordinates"""
+    if latitude is None or longitude is None:
+        return ''
+    return encode(latitude, longitude)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lon_bits
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """[(min_lat, min_lon, max_lat, max_lon)] around the circle, split at the antimeridian"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - dlat, latitude + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle contains a pole: every longitude
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+    spread = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    dlon = math.degrees(math.asin(min(1.0, spread)))
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180:
+        return [(min_lat, min_lon + 360, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon - 360)]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def _cells(box, precision):
+    """(row, column) indexes of the cells covering `box` at `precision`"""
+    height, width = cell_size(precision)
+    rows, columns = int(180 / height), int(360 / width)
+    min_lat, min_lon, max_lat, max_lon = box
+    first_row = min(int((min_lat + 90) // height), rows - 1)
+    last_row = min(int((max_lat + 90) // height), rows - 1)
+    first_column = min(int((min_lon + 180) // width), columns - 1)
+    last_column = min(int((max_lon + 180) // width), columns - 1)
+    return range(first_row, last_row + 1), range(first_column, last_column + 1)
+
+
+def covering_cells(boxes, max_cells=MAX_CELLS):
+    """The finest geohash cells (at most max_cells of them) that cover `boxes`"""
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        cells = [_cells(box, precision) for box in boxes]
+        if sum(len(rows) * len(columns) for rows, columns in cells) > max_cells:
+            break
+        best = precision, cells
+    if best is None:
+        return ['']  # more than max_cells even at one character: scan everything
+    precision, cells = best
+    height, width = cell_size(precision)
+    return sorted({
+        encode(-90 + (row + 0.5) * height, -180 + (column + 0.5) * width, precision)
+        for rows, columns in cells for row in rows for column in columns
+    })
+
+
+def prefix_ranges(prefixes):
+    """[(low, high)] with geohash >= low AND geohash < high matching the prefixes; adjacent ones merged"""
+    if prefixes == ['']:
+        return [('', '~')]
+    ranges = []
+    for prefix in prefixes:  # sorted, all the same length
+        if ranges and _next(ranges[-1][1]) == prefix:
+            ranges[-1][1] = prefix
+        else:
+            ranges.append([prefix, prefix])
+    # '~' sorts after every geohash character
+    return [(low, last + '~') for low, last in ranges]
+
+
+def _next(prefix):
+    """The geohash immediately after `prefix` at its length, or None"""
+    value = 0
+    for char in prefix:
+        value = value * 32 + BASE32.index(char)
+    value += 1
+    if value >= 32 ** len(prefix):
+        return None
+    chars = []
+    for _ in prefix:
+        value, digit = divmod(value, 32)
+        chars.append(BASE32[digit])
+    return ''.join(reversed(chars))
+
+
+def within_q(latitude, longitude, radius_km, max_cells=MAX_CELLS):
+    """Q() for the geohash ranges covering the circle (a superset of it)"""
+    q = Q()
+    boxes = bounding_boxes(latitude, longitude, radius_km)
+    for low, high in prefix_ranges(covering_cells(boxes, max_cells)):
+        q |= Q(geohash__gte=low, geohash__lt=high)
+    return q
+
+
+def distance_km(latitude, longitude):
+    """Haversine distance from the point to each row's latitude/longitude, as a query expression"""
+    lat = Radians(F('latitude'))
+    a = (
+        Power(Sin((lat - Value(math.radians(latitude))) / 2), 2)
+        + Value(math.cos(math.radians(latitude))) * Cos(lat)
+        * Power(Sin((Radians(F('longitude')) - Value(math.radians(longitude))) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
+
+
+def near(queryset, latitude, longitude, radius_km):
+    """Rows of `queryset` within radius_km of the point, annotated with distance_km, nearest first"""
+    return (
+        queryset.filter(within_q(latitude, longitude, radius_km))
+        .annotate(distance_km=distance_km(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', 'pk')
+    )
@@ -0,0 +1,249 @@
+"""
+Live seat counts and event changes.
+
+Enroll, cancel, seat holds, edit and delete write an OutboxEntry in the same transaction
+as the change (record()). Once the transaction commits the entry is published
+as a compact delta ({"id", "type", "event", "enrolled", "available_seats",
+"changed"}) to every process's Hub, which fans it out to the SSE and long-poll
+subscribers of that process (async_views.LiveUpdatesView/LivePollView)
+without touching the database.
+
+Across processes deltas travel over Redis pub/sub when LIVE_UPDATES_REDIS_URL
+is set (one PUBLISH per write, one listener thread per process); otherwise
+they only reach subscribers of the process that made the write. Either way a
+client that reconnects with its last delta id catches up from the outbox.
+
+Entry ids are taken when a row is inserted, but transactions commit in any
+order: entry 101 can commit after 102 was delivered. So deltas are deduplicated
+per event (each is a snapshot of its event), not by one global id, and the
+cursor a client resumes from only passes ids known to be committed (replay()).
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Enrollment, OutboxEntry, SeatHold
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'events:live'
+
+
+def delta(entry):
+    """The message clients receive for an OutboxEntry"""
+    return {'id': entry.id, 'type': entry.kind, 'event': entry.event_id, **entry.payload}
+
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':'))
+
+
+def record(kind, event, changed=None):
+    """
+    Write an OutboxEntry for this change to `event`, in the caller's
+    transaction, and publish it once that commits
+    """
+    payload = {}
+    if kind != 'event.deleted':
+        # One count per write, so viewers never have to re-query
+        enrolled = Enrollment.objects.filter(event=event, status='ENROLLED').count()
+        held = SeatHold.objects.active().filter(event=event).count() if event.capacity is not None else 0
+        payload = {
+            'enrolled': enrolled,
+            'available_seats': None if event.capacity is None else event.capacity - enrolled - held,
+        }
+    if changed:
+        payload['changed'] = changed
+    entry = OutboxEntry.objects.create(kind=kind, event_id=event.pk, payload=payload)
+    message = delta(entry)
+    transaction.on_commit(lambda: publish(message))
+    return entry
+
+
+Replay = namedtuple('Replay', 'deltas cursor held')
+
+
+def replay(after, event_ids=None, limit=None):
+    """
+    Deltas recorded after the delta id `after`, oldest first, out of at most
+    `limit` entries. Stops before a missing id, which a transaction still
+    running may commit, unless the entry after it is older than
+    LIVE_UPDATES_GAP_SECONDS (the id's transaction rolled back). Returns
+    Replay(deltas, cursor: the id to resume from, held: whether it stopped early).
+    """
+    entries = OutboxEntry.objects.using('default').filter(id__gt=after).order_by('id')
+    if limit is not None:
+        entries = entries[:limit]
+    committed_before = timezone.now() - timedelta(seconds=settings.LIVE_UPDATES_GAP_SECONDS)
+    deltas, cursor, scanned = [], after, 0
+    # All events' entries are read: gaps are in the one id sequence
+    for entry in entries:
+        if entry.id != cursor + 1 and entry.created_at > committed_before:
+            return Replay(deltas, cursor, True)
+        cursor, scanned = entry.id, scanned + 1
+        if not event_ids or entry.event_id in event_ids:
+            deltas.append(delta(entry))
+    return Replay(deltas, cursor, limit is not None and scanned == limit)
+
+
+def last_id():
+    """
+    The cursor new clients start from: the last entry older than
+    LIVE_UPDATES_GAP_SECONDS, as newer ones may still have gaps before them
+    """
+    committed_before = timezone.now() - timedelta(seconds=settings.LIVE_UPDATES_GAP_SECONDS)
+    entry = (
+        OutboxEntry.objects.using('default').filter(created_at__lte=committed_before)
+        .order_by('-id').values_list('id', flat=True).first()
+    )
+    return entry or 0
+
+
+class Subscription:
+    """One client's queue of deltas, read on the event loop that created it"""
+
+    def __init__(self, event_ids=None, limit=None):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.event_ids = set(event_ids) if event_ids else None
+        self.limit = limit or settings.LIVE_UPDATES_QUEUE_SIZE
+        self.overflowed = False
+
+    def wants(self, message):
+        return self.event_ids is None or message['event'] in self.event_ids
+
+    def put(self, message, frame):
+        # A client too slow to keep up is cut off; it reconnects and catches up from the outbox
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.limit:
+            self.overflowed = True
+            self.queue.put_nowait(None)
+        else:
+            self.queue.put_nowait((message, frame))
+
+    async def get(self, timeout=None):
+        """(message, SSE frame), or None on timeout or overflow"""
+        if not self.queue.empty():
+            # Also with a timeout of 0, which wait_for() would spend before the first get
+            return self.queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Hub:
+    """In-process fan-out of deltas to subscriptions, callable from any thread"""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_ids=None):
+        subscription = Subscription(event_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def dispatch(self, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            return
+        # No id: a delta's id is no cursor (see replay()); streams send those themselves
+        frame = f"event: delta\ndata: {encode(message)}\n\n".encode()
+        # One hop onto each event loop, which then feeds all of its subscriptions
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            if subscription.wants(message):
+                by_loop[subscription.loop].append(subscription)
+        for loop, targets in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, targets, message, frame)
+            except RuntimeError:  # loop closed
+                for subscription in targets:
+                    self.unsubscribe(subscription)
+
+
+def _deliver(subscriptions, message, frame):
+    for subscription in subscriptions:
+        subscription.put(message, frame)
+
+
+hub = Hub()
+
+
+class RedisRelay:
+    """Carries deltas between processes over Redis pub/sub into each process's hub"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        self.client.publish(CHANNEL, encode(message))
+
+    def listen(self):
+        """Start this process's listener thread (once)"""
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._run, name='live-updates', daemon=True)
+                self._listener.start()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for item in pubsub.listen():
+                    hub.dispatch(json.loads(item['data']))
+            except Exception:
+                logger.exception("Live updates listener lost its Redis connection; reconnecting")
+                threading.Event().wait(1)
+
+
+_relay = None
+
+
+def get_relay():
+    global _relay
+    if _relay is None and settings.LIVE_UPDATES_REDIS_URL:
+        _relay = RedisRelay(settings.LIVE_UPDATES_REDIS_URL)
+    return _relay
+
+
+def publish(message):
+    relay = get_relay()
+    if relay is None:
+        hub.dispatch(message)
+        return
+    try:
+        relay.publish(message)
+    except Exception:
+        # Clients still catch up from the outbox when they reconnect
+        logger.exception("Could not publish live update %s", message['id'])
+
+
+def subscribe(event_ids=None):
+    relay = get_relay()
+    if relay is not None:
+        relay.listen()
+    return hub.subscribe(event_ids)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from events_platform.schema import build_schema_files, code_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema for the current code version into SCHEMA_CACHE_DIR, "
+        "so /api/schema/ serves it without introspecting the API. Run at build/deploy time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--code-version', help="Code version to build for (default: CODE_VERSION or source hash)")
+
+    def handle(self, *args, **options):
+        version = options['code_version'] or code_version()
+        for path in build_schema_files(version):
+            self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events import geo
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in latitude/longitude (and the geohash) of events without coordinates by looking "
+        "their location up in the gazetteer (events/geo.py). Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        located = missed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Event.objects.using('default').filter(pk__gt=last_pk, latitude__isnull=True)
+                .order_by('pk').only('id', 'location')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            updated = []
+            for event in batch:
+                point = geo.geocode(event.location)
+                if point is None:
+                    missed += 1
+                    continue
+                event.latitude, event.longitude = point
+                event.geohash = geo.geohash_for(*point)
+                updated.append(event)
+            with transaction.atomic():
+                Event.objects.bulk_update(updated, ['latitude', 'longitude', 'geohash'])
+            located += len(updated)
+        self.stdout.write(self.style.SUCCESS(
+            f"Geocoded {located} events; {missed} locations not found in the gazetteer."
+        ))
@@ -0,0 +1,173 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+import factory
+import factory.random
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from events import geo
+from events.factories import EventFactory
+from events.models import Event, Enrollment
+from users.factories import UserFactory
+from users.models import Profile
+
+SCALE_DOMAIN = 'scale.test'
+
+LANGUAGES = {
+    'English': 55, 'Spanish': 12, 'Hindi': 10, 'French': 8,
+    'German': 5, 'Portuguese': 4, 'Japanese': 3, 'Arabic': 3,
+}
+DURATIONS_HOURS = [1, 1.5, 2, 2, 3, 8]
+CAPACITIES = [None, 10, 20, 30, 50, 50, 100, 200, 500]
+
+
+def zipf_cum_weights(n, s=1.1):
+    """Cumulative Zipf weights so a few items are picked far more often than the tail"""
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset (users, events, enrollments) with bulk_create, "
+        "for load testing and benchmarks. All accounts use @scale.test emails."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--enrollments', type=int, default=50000)
+        parser.add_argument('--facilitator-ratio', type=float, default=0.05)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default='scale-pass-123', help="Password of every generated account")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for a reproducible dataset")
+        parser.add_argument('--tag', default=None, help="Email tag so several datasets can coexist")
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 32)
+        random.seed(seed)
+        factory.random.reseed_random(seed)
+        self.tag = options['tag'] or f's{seed}'
+        if User.objects.filter(email__endswith=f'.{self.tag}@{SCALE_DOMAIN}').exists():
+            raise CommandError(f"A dataset tagged {self.tag!r} already exists; pass another --tag or --seed.")
+
+        started = time.monotonic()
+        seekers, facilitators = self.create_users(
+            options['users'], options['facilitator_ratio'], options['password']
+        )
+        events = self.create_events(options['events'], facilitators)
+        enrolled = self.create_enrollments(options['enrollments'], events, seekers)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(seekers) + len(facilitators)} users, {len(events)} events and "
+            f"{enrolled} enrollments in {time.monotonic() - started:.1f}s (seed {seed}, tag {self.tag}). "
+            f"Sample logins: seeker0.{self.tag}@{SCALE_DOMAIN} / "
+            f"facilitator0.{self.tag}@{SCALE_DOMAIN}, password {options['password']!r}"
+        ))
+
+    def create_users(self, total, facilitator_ratio, password):
+        # One hash shared by every account: hashing per user would dominate the run
+        password_hash = factory.Transformer.Force(make_password(password))
+        facilitator_count = max(1, int(total * facilitator_ratio))
+        roles = [('FACILITATOR', facilitator_count), ('SEEKER', max(0, total - facilitator_count))]
+
+        ids = {'SEEKER': [], 'FACILITATOR': []}
+        for role, count in roles:
+            prefix = role.lower()
+            for start in range(0, count, self.batch_size):
+                users = [
+                    UserFactory.build(email=f'{prefix}{i}.{self.tag}@{SCALE_DOMAIN}', password=password_hash)
+                    for i in range(start, min(count, start + self.batch_size))
+                ]
+                with transaction.atomic():
+                    User.objects.bulk_create(users)
+                    if users[0].pk is None:
+                        # Backend can't return ids from bulk inserts
+                        by_email = dict(
+                            User.objects.filter(email__in=[u.email for u in users]).values_list('email', 'id')
+                        )
+                        for user in users:
+                            user.pk = by_email[user.email]
+                    Profile.objects.bulk_create([
+                        Profile(user_id=user.pk, role=role, is_verified=True) for user in users
+                    ])
+                ids[role].extend(user.pk for user in users)
+                self.stdout.write(f"{role.lower()}s: {len(ids[role])}/{count}")
+        return ids['SEEKER'], ids['FACILITATOR']
+
+    def create_events(self, total, facilitators):
+        """Returns [(event id, capacity)]"""
+        fake = Faker()
+        cities = ['Online'] + list({fake.city() for _ in range(400)})
+        city_weights = zipf_cum_weights(len(cities), s=0.9)
+        # Faker's cities are fictional: place each one at random, events scattered within ~20 km
+        centers = {city: (random.uniform(-60, 70), random.uniform(-180, 180)) for city in cities[1:]}
+        # Unsaved stand-ins are enough for bulk_create to fill created_by_id
+        creators = [User(pk=pk) for pk in facilitators]
+        creator_weights = zipf_cum_weights(len(creators))
+        languages, language_weights = list(LANGUAGES), list(LANGUAGES.values())
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        created = []
+        for start in range(0, total, self.batch_size):
+            events = []
+            for _ in range(start, min(total, start + self.batch_size)):
+                # Mostly past events with a healthy upcoming tail, on the hour
+                starts_at = now + timedelta(hours=random.randint(-365 * 24, 180 * 24))
+                location = random.choices(cities, cum_weights=city_weights)[0]
+                latitude = longitude = None
+                if location in centers:
+                    latitude = centers[location][0] + random.gauss(0, 0.1)
+                    longitude = centers[location][1] + random.gauss(0, 0.1)
+                events.append(EventFactory.build(
+                    language=random.choices(languages, weights=language_weights)[0],
+                    location=location,
+                    latitude=latitude,
+                    longitude=longitude,
+                    # bulk_create skips Event.save(), which derives it
+                    geohash=geo.geohash_for(latitude, longitude),
+                    starts_at=starts_at,
+                    ends_at=starts_at + timedelta(hours=random.choice(DURATIONS_HOURS)),
+                    capacity=random.choice(CAPACITIES),
+                    created_by=random.choices(creators, cum_weights=creator_weights)[0],
+                ))
+            Event.objects.bulk_create(events)
+            if events[0].pk is None:
+                events = list(Event.objects.order_by('-pk')[:len(events)])[::-1]
+            created.extend((event.pk, event.capacity) for event in events)
+            self.stdout.write(f"events: {len(created)}/{total}")
+        return created
+
+    def create_enrollments(self, total, events, seekers):
+        if not events or not seekers:
+            return 0
+        # Heavy-tailed popularity: most events get a handful of seekers, a few get crowds
+        popularity = [random.paretovariate(1.2) for _ in events]
+        scale = total / sum(popularity)
+
+        created = 0
+        batch = []
+        for (event_id, capacity), weight in zip(events, popularity):
+            count = min(len(seekers), round(weight * scale))
+            for position, seeker_id in enumerate(random.sample(seekers, count)):
+                full = capacity is not None and position >= capacity
+                canceled = full or random.random() < 0.08
+                batch.append(Enrollment(
+                    event_id=event_id, seeker_id=seeker_id, status='CANCELED' if canceled else 'ENROLLED'
+                ))
+            if len(batch) >= self.batch_size:
+                Enrollment.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+                self.stdout.write(f"enrollments: {created}/~{total}")
+        if batch:
+            Enrollment.objects.bulk_create(batch)
+            created += len(batch)
+        return created
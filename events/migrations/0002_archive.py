@@ -0,0 +1,141 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# On PostgreSQL the archive tables are recreated as declaratively partitioned
+# tables (RANGE by month of the event start). Monthly partitions are created
+# on demand by events.archive.ensure_partitions(). The primary keys include
+# the partition key, as PostgreSQL requires.
+PARTITIONED_TABLES_SQL = """
+DROP TABLE events_archivedenrollment;
+DROP TABLE events_archivedevent;
+
+CREATE TABLE events_archivedevent (
+    id bigint NOT NULL,
+    title varchar(255) NOT NULL,
+    description text NOT NULL,
+    language varchar(50) NOT NULL,
+    location varchar(255) NOT NULL,
+    starts_at timestamp with time zone NOT NULL,
+    ends_at timestamp with time zone NOT NULL,
+    capacity integer NULL CHECK (capacity >= 0),
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL,
+    created_by_id integer NOT NULL REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED,
+    PRIMARY KEY (id, starts_at)
+) PARTITION BY RANGE (starts_at);
+CREATE INDEX events_archivedevent_created_by_id ON events_archivedevent (created_by_id);
+
+CREATE TABLE events_archivedenrollment (
+    id bigint NOT NULL,
+    status varchar(20) NOT NULL,
+    event_title varchar(255) NOT NULL,
+    event_starts_at timestamp with time zone NOT NULL,
+    event_ends_at timestamp with time zone NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL,
+    event_id bigint NOT NULL,
+    seeker_id integer NOT NULL REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED,
+    PRIMARY KEY (id, event_starts_at)
+) PARTITION BY RANGE (event_starts_at);
+CREATE INDEX events_archivedenrollment_event_id ON events_archivedenrollment (event_id);
+CREATE INDEX events_archivedenrollment_seeker_id ON events_archivedenrollment (seeker_id);
+CREATE INDEX events_arch_seeker__8c64e5_idx ON events_archivedenrollment (seeker_id, event_starts_at);
+"""
+
+
+def partition_archive_tables(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql' and getattr(settings, 'EVENT_ARCHIVE_PARTITIONED', True):
+        schema_editor.execute(PARTITIONED_TABLES_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("events", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedEvent",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("title", models.CharField(max_length=255)),
+                ("description", models.TextField()),
+                ("language", models.CharField(max_length=50)),
+                ("location", models.CharField(max_length=255)),
+                ("starts_at", models.DateTimeField()),
+                ("ends_at", models.DateTimeField()),
+                ("capacity", models.PositiveIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_events_created",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedEnrollment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("ENROLLED", "Enrolled"), ("CANCELED", "Canceled")],
+                        max_length=20,
+                    ),
+                ),
+                ("event_title", models.CharField(max_length=255)),
+                ("event_starts_at", models.DateTimeField()),
+                ("event_ends_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="enrollments",
+                        to="events.archivedevent",
+                    ),
+                ),
+                (
+                    "seeker",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_enrollments",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["seeker", "event_starts_at"],
+                        name="events_arch_seeker__8c64e5_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(partition_archive_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0002_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_deleted_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("enrollment.created", "Enrollment created"),
+                            ("enrollment.canceled", "Enrollment canceled"),
+                            ("event.updated", "Event updated"),
+                            ("event.deleted", "Event deleted"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("event_id", models.BigIntegerField(db_index=True)),
+                ("payload", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
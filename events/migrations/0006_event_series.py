@@ -0,0 +1,90 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("events", "0005_event_coordinates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("description", models.TextField()),
+                ("language", models.CharField(max_length=50)),
+                ("location", models.CharField(max_length=255)),
+                ("latitude", models.FloatField(blank=True, null=True)),
+                ("longitude", models.FloatField(blank=True, null=True)),
+                ("capacity", models.PositiveIntegerField(blank=True, null=True)),
+                ("starts_at", models.DateTimeField()),
+                ("ends_at", models.DateTimeField()),
+                ("rule", models.CharField(max_length=255)),
+                ("timezone", models.CharField(default="UTC", max_length=64)),
+                ("excluded", models.JSONField(blank=True, default=list)),
+                ("materialized_until", models.DateTimeField(editable=False)),
+                (
+                    "last_starts_at",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "event series",
+            },
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="occurrence_start",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="eventseries",
+            name="created_by",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="event_series_created",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="events",
+                to="events.eventseries",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventseries",
+            index=models.Index(
+                fields=["materialized_until"], name="events_even_materia_d06efa_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="event",
+            constraint=models.UniqueConstraint(
+                fields=("series", "occurrence_start"),
+                name="events_event_occurrence_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("events", "0006_event_series"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="outboxentry",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("enrollment.created", "Enrollment created"),
+                    ("enrollment.canceled", "Enrollment canceled"),
+                    ("event.updated", "Event updated"),
+                    ("event.deleted", "Event deleted"),
+                    ("hold.created", "Seat held"),
+                    ("hold.released", "Seat hold released"),
+                ],
+                max_length=32,
+            ),
+        ),
+        migrations.CreateModel(
+            name="SeatHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_holds",
+                        to="events.event",
+                    ),
+                ),
+                (
+                    "seeker",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_holds",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["event", "expires_at"],
+                        name="events_seat_event_i_3da391_idx",
+                    ),
+                    models.Index(
+                        fields=["expires_at"], name="events_seat_expires_7405e0_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="seathold",
+            constraint=models.UniqueConstraint(
+                fields=("event", "seeker"), name="events_seathold_event_seeker_uniq"
+            ),
+        ),
+    ]
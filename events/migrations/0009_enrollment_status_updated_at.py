@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0008_attendance"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["status", "updated_at"], name="events_enro_status_ebd184_idx"
+            ),
+        ),
+    ]
@@ -1,7 +1,44 @@
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from . import geo, recurrence
+
+
+class EventQuerySet(models.QuerySet):
+    def with_enrollment_stats(self, user=None, counts=True):
+        """
+        Annotate enrolled and held seat counts (and whether `user` is enrolled)
+        so serializing a page of events doesn't cost extra queries per row.
+        """
+        enrolled = Enrollment.objects.filter(event=OuterRef('pk'), status='ENROLLED')
+        held = SeatHold.objects.active().filter(event=OuterRef('pk'))
+        queryset = self
+        if counts:
+            queryset = queryset.annotate(
+                num_enrolled=Coalesce(
+                    Subquery(enrolled.order_by().values('event').annotate(c=Count('pk')).values('c')),
+                    Value(0),
+                ),
+                num_held=Coalesce(
+                    Subquery(held.order_by().values('event').annotate(c=Count('pk')).values('c')),
+                    Value(0),
+                ),
+            )
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(user_is_enrolled=Exists(enrolled.filter(seeker=user)))
+        return queryset
+
+
+class EventManager(models.Manager.from_queryset(EventQuerySet)):
+    """Hides soft-deleted events (pending purge by events.tasks.purge_deleted_event)"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Event(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -10,31 +47,153 @@ class Event(models.Model):
     starts_at = models.DateTimeField()
     ends_at = models.DateTimeField()
     capacity = models.PositiveIntegerField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Derived from latitude/longitude on save; '' without coordinates (see events/geo.py)
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='events_created')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    # An occurrence of a recurring series, materialized as this row (events/series.py).
+    # occurrence_start is its start in the series schedule, even if starts_at is later moved
+    series = models.ForeignKey(
+        'EventSeries', on_delete=models.SET_NULL, null=True, blank=True, related_name='events'
+    )
+    occurrence_start = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = EventManager()
+    all_objects = EventQuerySet.as_manager()  # including soft-deleted events
 
     class Meta:
         indexes = [
             models.Index(fields=['starts_at']),
             models.Index(fields=['language']),
             models.Index(fields=['location']),
+            models.Index(fields=['geohash']),
+            # Only deleted rows: the purge sweep looks them up, while every
+            # listing filters deleted_at IS NULL, which an index over all rows
+            # (nearly all NULL) would only tempt the planner into using
+            models.Index(
+                fields=['deleted_at'], name='events_event_deleted_idx', condition=models.Q(deleted_at__isnull=False)
+            ),
+        ]
+        constraints = [
+            # One row per occurrence, however many requests materialize it at once
+            models.UniqueConstraint(fields=['series', 'occurrence_start'], name='events_event_occurrence_uniq'),
         ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.geohash = geo.geohash_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+    @property
+    def enrolled_count(self):
+        # Prefer the with_enrollment_stats() annotation when the row came from one
+        count = getattr(self, 'num_enrolled', None)
+        if count is None:
+            count = self.enrollments.filter(status='ENROLLED').count()
+        return count
+
+    @property
+    def held_count(self):
+        count = getattr(self, 'num_held', None)
+        if count is None:
+            count = self.seat_holds.active().count()
+        return count
+
     @property
     def check_capacity(self):
+        return self.has_seat_for(None)
+
+    def has_seat_for(self, seeker):
+        """Whether `seeker` can take a seat: one is free, or they hold one"""
         if self.capacity is None:
             return True
-        return self.enrollments.filter(status='ENROLLED').count() < self.capacity
+        held = self.seat_holds.active()
+        if seeker is not None:
+            held = held.exclude(seeker=seeker)
+        return self.enrollments.filter(status='ENROLLED').count() + held.count() < self.capacity
 
     @property
     def available_seats(self):
         if self.capacity is None:
             return None
-        return self.capacity - self.enrollments.filter(status='ENROLLED').count()
+        return self.capacity - self.enrolled_count - self.held_count
+
+
+class EventSeries(models.Model):
+    """
+    A recurring event: the fields its occurrences share, the first
+    occurrence's times and a recurrence rule (events/recurrence.py).
+
+    Occurrences starting before materialized_until are Event rows (created
+    SERIES_HORIZON_DAYS ahead by events.tasks.materialize_series); later ones
+    exist only as rule expansions in listings until someone enrolls in one.
+    Deleted occurrences are kept out of the expansion by `excluded`.
+    """
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    language = models.CharField(max_length=50)
+    location = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    starts_at = models.DateTimeField()  # of the first occurrence
+    ends_at = models.DateTimeField()
+    rule = models.CharField(max_length=255)  # e.g. FREQ=WEEKLY;BYDAY=TU,TH;COUNT=20
+    timezone = models.CharField(max_length=64, default='UTC')  # occurrences keep their wall-clock time here
+    excluded = models.JSONField(default=list, blank=True)  # recurrence.key() of deleted occurrences
+    materialized_until = models.DateTimeField(editable=False)
+    last_starts_at = models.DateTimeField(null=True, blank=True, editable=False)  # None: never ends
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='event_series_created')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'event series'
+        indexes = [
+            models.Index(fields=['materialized_until']),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # Recurrence rules expand in whole seconds: a sub-second first start would
+        # fall before materialized_until and never be listed
+        self.starts_at = self.starts_at.replace(microsecond=0)
+        self.ends_at = self.ends_at.replace(microsecond=0)
+        self.last_starts_at = recurrence.last_start(self.rule, self.starts_at, self.timezone)
+        if self.materialized_until is None:
+            self.materialized_until = self.starts_at
+        super().save(*args, **kwargs)
+
+    @property
+    def duration(self):
+        return self.ends_at - self.starts_at
+
+    def occurrences(self, after, before):
+        """Start times of the (not deleted) occurrences in [after, before), a generator"""
+        return recurrence.occurrences(self.rule, self.starts_at, self.timezone, after, before, set(self.excluded))
+
+    def is_occurrence(self, start):
+        return recurrence.is_occurrence(self.rule, self.starts_at, self.timezone, start, set(self.excluded))
+
+    def occurrence_fields(self, start):
+        """Event field values of the occurrence starting at `start`"""
+        return {
+            'title': self.title, 'description': self.description, 'language': self.language,
+            'location': self.location, 'latitude': self.latitude, 'longitude': self.longitude,
+            'capacity': self.capacity, 'starts_at': start, 'ends_at': start + self.duration,
+            'created_by_id': self.created_by_id, 'series': self, 'occurrence_start': start,
+        }
 
 
 class Enrollment(models.Model):
@@ -57,6 +216,155 @@ class Enrollment(models.Model):
         # Or we allow multiple rows (history)?
         # Spec says: "cannot enroll the same seeker twice in the same event (active)."
         # Better to just use unique_together and update the rows.
+        indexes = [
+            # The events_enrollments_last_minute gauge, counted on every /metrics scrape
+            models.Index(fields=['status', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.seeker.email} -> {self.event.title}"
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+
+class SeatHold(models.Model):
+    """
+    A seat kept for a seeker for a few minutes (SEAT_HOLD_MINUTES) while they
+    complete a checkout step. It counts toward the event's capacity until
+    expires_at, then simply stops counting, so expiry needs no timer;
+    confirming it enrolls the seeker. Expired rows are deleted in bulk by
+    events.tasks.expire_seat_holds.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='seat_holds')
+    seeker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seat_holds')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'seeker'], name='events_seathold_event_seeker_uniq'),
+        ]
+        indexes = [
+            # Counting an event's unexpired holds, and the expiry sweep
+            models.Index(fields=['event', 'expires_at']),
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.seeker_id} holds {self.event_id} until {self.expires_at}"
+
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
+
+
+class Attendance(models.Model):
+    """
+    A seeker checked in at the door with their enrollment's check-in token.
+    Rows are written in bulk by events.checkin (one per enrollment, the
+    earliest scan wins), from live scans and offline syncs alike.
+    """
+    SOURCE_CHOICES = (
+        ('SCAN', 'Scanned'),
+        ('SYNC', 'Synced offline'),
+    )
+
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='attendance')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='attendances')
+    checked_in_at = models.DateTimeField()
+    checked_in_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='check_ins')
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='SCAN')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'checked_in_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.enrollment_id} checked in at {self.checked_in_at}"
+
+
+class ArchivedEvent(models.Model):
+    """
+    An Event that ended more than EVENT_ARCHIVE_AFTER_DAYS ago, moved out of
+    the hot table by events.tasks.archive_past_events (same id). On PostgreSQL
+    the table is range-partitioned by starts_at month (events/archive.py).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    language = models.CharField(max_length=50)
+    location = models.CharField(max_length=255)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_events_created')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedEnrollment(models.Model):
+    """
+    Enrollment of an ArchivedEvent. The event's title and times are copied in,
+    so past-enrollment listings never join the archived events (and the table
+    can be partitioned by event_starts_at, which rules out a DB foreign key).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(
+        ArchivedEvent, on_delete=models.CASCADE, related_name='enrollments', db_constraint=False
+    )
+    seeker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_enrollments')
+    status = models.CharField(max_length=20, choices=Enrollment.STATUS_CHOICES)
+    event_title = models.CharField(max_length=255)
+    event_starts_at = models.DateTimeField()
+    event_ends_at = models.DateTimeField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['seeker', 'event_starts_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.seeker_id} -> {self.event_title}"
+
+
+class OutboxEntry(models.Model):
+    """
+    A change to an event (enrollment, cancellation, edit, deletion), written
+    in the same transaction as the change and published to live-update
+    subscribers after commit (events/live.py). Its id is the cursor clients
+    resume from; pruned after LIVE_UPDATES_RETENTION_HOURS.
+    """
+    KIND_CHOICES = (
+        ('enrollment.created', 'Enrollment created'),
+        ('enrollment.canceled', 'Enrollment canceled'),
+        ('event.updated', 'Event updated'),
+        ('event.deleted', 'Event deleted'),
+        ('hold.created', 'Seat held'),
+        ('hold.released', 'Seat hold released'),
+    )
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    # Not a foreign key: entries outlive purged and archived events
+    event_id = models.BigIntegerField(db_index=True)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.event_id}"
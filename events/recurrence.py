@@ -0,0 +1,81 @@
+"""
+Recurrence rules of event series (EventSeries.rule).
+
+A rule is an RFC 5545 RRULE value, e.g. FREQ=WEEKLY;BYDAY=TU,TH;COUNT=20 or
+FREQ=MONTHLY;BYMONTHDAY=1;UNTIL=20271231T000000Z (UNTIL in UTC), expanded
+with dateutil from the series' first start. Occurrences keep their wall-clock
+time in the series' time zone, so a 18:00 class stays at 18:00 across
+daylight saving changes.
+"""
+import re
+from datetime import timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import rrulestr
+
+# Sub-daily rules would expand to thousands of events a week
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+re_rule = re.compile(r'[A-Z]+=[^;=\s]+(;[A-Z]+=[^;=\s]+)*')
+
+
+def parts(rule):
+    """{'FREQ': 'WEEKLY', ...}"""
+    return dict(part.split('=', 1) for part in rule.split(';'))
+
+
+def zone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+
+
+def build(rule, starts_at, tz):
+    """The dateutil rrule, or ValueError with a message for the API"""
+    if not re_rule.fullmatch(rule):
+        raise ValueError("Expected an RRULE value such as FREQ=WEEKLY;BYDAY=TU,TH;COUNT=10.")
+    frequency = parts(rule).get('FREQ')
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}.")
+    return rrulestr(rule, dtstart=starts_at.astimezone(zone(tz)))
+
+
+def is_finite(rule):
+    return not {'COUNT', 'UNTIL'}.isdisjoint(parts(rule))
+
+
+def occurrences(rule, starts_at, tz, after, before, excluded=()):
+    """
+    Start times (UTC) of the occurrences in [after, before), ascending, skipping
+    those in `excluded` (ISO strings, see key()). A generator: nothing past the
+    occurrence the caller stops at is computed.
+    """
+    if after >= before:
+        return
+    for start in build(rule, starts_at, tz).xafter(after.astimezone(zone(tz)), inc=True):
+        start = start.astimezone(dt_timezone.utc)
+        if start >= before:
+            return
+        if key(start) not in excluded:
+            yield start
+
+
+def is_occurrence(rule, starts_at, tz, start, excluded=()):
+    found = next(occurrences(rule, starts_at, tz, start, start + timedelta(microseconds=1), excluded), None)
+    return found is not None
+
+
+def last_start(rule, starts_at, tz):
+    """Start of the final occurrence, None for a rule that never ends (or has no occurrences)"""
+    if not is_finite(rule):
+        return None
+    last = None
+    for last in build(rule, starts_at, tz):
+        pass
+    return last and last.astimezone(dt_timezone.utc)
+
+
+def key(start):
+    """How an occurrence start is stored in EventSeries.excluded"""
+    return start.astimezone(dt_timezone.utc).isoformat()
@@ -1,54 +1,185 @@
-from rest_framework import serializers
-from .models import Event, Enrollment
+import copy
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from . import checkin, recurrence
+from .geo import geocode
+from .models import Event, EventSeries, Enrollment, SeatHold
 from django.utils import timezone
+from datetime import timedelta
+
+
+def requested_fields(request, serializer_class):
+    """
+    Field names selected with ?fields=a,b and/or ?omit=c on a read request, in
+    the serializer's order, or None when the request doesn't restrict them
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    fields, omit = params.get('fields'), params.get('omit')
+    if not fields and not omit:
+        return None
+
+    available = serializer_class.Meta.fields
+    fields = [name.strip() for name in fields.split(',') if name.strip()] if fields else list(available)
+    omit = {name.strip() for name in omit.split(',') if name.strip()} if omit else set()
+    unknown = sorted(set(fields) - set(available) | omit - set(available))
+    if unknown:
+        raise serializers.ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}"})
+    return [name for name in available if name in fields and name not in omit]
+
+
+class SparseFieldsMixin:
+    """Drops the fields not selected with ?fields=/?omit= (see requested_fields)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = requested_fields(self.context.get('request'), type(self))
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
 
-class EventSerializer(serializers.ModelSerializer):
+def with_coordinates(data, instance=None):
+    """Checks latitude/longitude come together; looks up a new or moved place given without them"""
+    if ('latitude' in data) != ('longitude' in data):
+        raise serializers.ValidationError("Give both latitude and longitude, or neither.")
+    if 'latitude' not in data and 'location' in data and (
+        instance is None or data['location'] != instance.location
+    ):
+        data['latitude'], data['longitude'] = geocode(data['location']) or (None, None)
+    return data
+
+
+class EventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by_email = serializers.ReadOnlyField(source='created_by.email')
     available_seats = serializers.SerializerMethodField()
     enrolled_count = serializers.SerializerMethodField()
     is_enrolled = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = [
             'id', 'title', 'description', 'language', 'location', 
+            'latitude', 'longitude', 'distance_km',
             'starts_at', 'ends_at', 'capacity', 'available_seats',
-            'enrolled_count', 'is_enrolled',
+            'enrolled_count', 'is_enrolled', 'series', 'occurrence_start',
             'created_by_email', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_by_email', 'created_at', 'updated_at', 'available_seats', 'enrolled_count', 'is_enrolled']
+        read_only_fields = [
+            'created_by_email', 'created_at', 'updated_at', 'available_seats', 'enrolled_count', 'is_enrolled',
+            'distance_km', 'series', 'occurrence_start',
+        ]
+        extra_kwargs = {
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180},
+        }
 
     def get_available_seats(self, obj):
         return obj.available_seats
 
     def get_enrolled_count(self, obj):
         """Return the total number of enrolled users for this event"""
-        return obj.enrollments.filter(status='ENROLLED').count()
+        return obj.enrolled_count
 
     def get_is_enrolled(self, obj):
         """Check if the current user is enrolled in this event"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            annotated = getattr(obj, 'user_is_enrolled', None)
+            if annotated is not None:
+                return annotated
             return obj.enrollments.filter(seeker=request.user, status='ENROLLED').exists()
         return False
 
+    def get_distance_km(self, obj):
+        """Distance from ?near=, when the list was filtered by it"""
+        distance = getattr(obj, 'distance_km', None)
+        return None if distance is None else round(distance, 3)
+
     def validate(self, data):
         if data['starts_at'] >= data['ends_at']:
             raise serializers.ValidationError("End time must be after start time.")
-        return data
+        return with_coordinates(data, self.instance)
+
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EventSeriesSerializer(serializers.ModelSerializer):
+    created_by_email = serializers.ReadOnlyField(source='created_by.email')
+
+    # Fixed once created: stored occurrences were made from them
+    schedule_fields = ('starts_at', 'ends_at', 'rule', 'timezone')
+
+    class Meta:
+        model = EventSeries
+        fields = [
+            'id', 'title', 'description', 'language', 'location', 'latitude', 'longitude', 'capacity',
+            'starts_at', 'ends_at', 'rule', 'timezone', 'last_starts_at',
+            'created_by_email', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['last_starts_at', 'created_by_email', 'created_at', 'updated_at']
+        extra_kwargs = {
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180},
+        }
+
+    def validate_timezone(self, value):
+        try:
+            recurrence.zone(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+    def validate(self, data):
+        if self.instance is not None:
+            changed = [
+                name for name in self.schedule_fields if name in data and data[name] != getattr(self.instance, name)
+            ]
+            if changed:
+                raise serializers.ValidationError({
+                    name: "A series' schedule can't be changed; delete it and create a new one." for name in changed
+                })
+        else:
+            if data['starts_at'] >= data['ends_at']:
+                raise serializers.ValidationError("End time must be after start time.")
+            try:
+                recurrence.build(data['rule'], data['starts_at'], data.get('timezone', 'UTC'))
+            except ValueError as exc:
+                raise serializers.ValidationError({'rule': str(exc)})
+        return with_coordinates(data, self.instance)
+
+
+class OccurrenceSerializer(serializers.Serializer):
+    """Which occurrence of a series: its start in the series schedule"""
+    starts_at = serializers.DateTimeField()
+
+
+class EnrollmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     event_title = serializers.ReadOnlyField(source='event.title')
     event_starts_at = serializers.ReadOnlyField(source='event.starts_at')
+    checkin_token = serializers.SerializerMethodField()
 
     class Meta:
         model = Enrollment
-        fields = ['id', 'event', 'event_title', 'event_starts_at', 'status', 'created_at']
+        fields = ['id', 'event', 'event_title', 'event_starts_at', 'status', 'checkin_token', 'created_at']
         read_only_fields = ['seeker', 'status', 'created_at']
 
+    def get_checkin_token(self, obj):
+        # Shown at the door as a QR code (events/checkin.py)
+        if obj.status != 'ENROLLED':
+            return None
+        return checkin.token_for(obj.pk, obj.event_id, obj.event.ends_at)
+
     def create(self, validated_data):
         event = validated_data['event']
         seeker = self.context['request'].user
+        # Serialize seat checks per event (holds and enrollments alike)
+        Event.objects.select_for_update().only('id').get(pk=event.pk)
         
         enrollment = Enrollment.objects.filter(event=event, seeker=seeker).first()
         
@@ -56,15 +187,180 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             if enrollment.status == 'ENROLLED':
                 raise serializers.ValidationError("You are already enrolled in this event.")
             # Re-enroll
-            if not event.check_capacity:
+            if not event.has_seat_for(seeker):
                 raise serializers.ValidationError("Event is full.")
             enrollment.status = 'ENROLLED'
             enrollment.save()
-            return enrollment
-        
-        # New enrollment
-        if not event.check_capacity:
+            transaction.on_commit(lambda: checkin.reinstate(enrollment.pk))
+        else:
+            # New enrollment
+            if not event.has_seat_for(seeker):
+                raise serializers.ValidationError("Event is full.")
+            validated_data['seeker'] = seeker
+            enrollment = super().create(validated_data)
+
+        # The seeker's seat hold, if any, is now this enrollment
+        SeatHold.objects.filter(event=event, seeker=seeker).delete()
+        return enrollment
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    event_title = serializers.ReadOnlyField(source='event.title')
+    minutes = serializers.IntegerField(
+        write_only=True, required=False, min_value=1, max_value=settings.SEAT_HOLD_MAX_MINUTES
+    )
+
+    class Meta:
+        model = SeatHold
+        fields = ['id', 'event', 'event_title', 'minutes', 'expires_at', 'created_at']
+        read_only_fields = ['expires_at', 'created_at']
+
+    def create(self, validated_data):
+        event = validated_data['event']
+        seeker = self.context['request'].user
+        minutes = validated_data.get('minutes', settings.SEAT_HOLD_MINUTES)
+        Event.objects.select_for_update().only('id').get(pk=event.pk)
+
+        if Enrollment.objects.filter(event=event, seeker=seeker, status='ENROLLED').exists():
+            raise serializers.ValidationError("You are already enrolled in this event.")
+        hold = SeatHold.objects.filter(event=event, seeker=seeker).first()
+        if hold is not None and hold.is_active:
+            raise serializers.ValidationError("You already hold a seat for this event.")
+        if not event.has_seat_for(seeker):
             raise serializers.ValidationError("Event is full.")
-            
-        validated_data['seeker'] = seeker
-        return super().create(validated_data)
+
+        expires_at = timezone.now() + timedelta(minutes=minutes)
+        if hold is not None:
+            # Expired but not swept yet: reuse the row
+            hold.expires_at = expires_at
+            hold.save(update_fields=['expires_at'])
+            return hold
+        return SeatHold.objects.create(event=event, seeker=seeker, expires_at=expires_at)
+
+
+class RowSerializer:
+    """
+    Read-only fast path for list pages: turns `.values()` rows into exactly
+    what `serializer_class` would output for the model instances, without
+    instantiating models or walking serializer fields per row.
+
+    The field list, order and representations are taken from the serializer
+    once, at import; every SerializerMethodField needs a row-based
+    equivalent in `computed`, as (function, row keys it reads), so the two
+    can't silently drift apart. `annotations` are queryset annotations among
+    those keys, fetched when the queryset has them.
+    """
+    # Fields whose to_representation() returns the database value unchanged
+    passthrough_fields = (
+        serializers.ReadOnlyField, serializers.PrimaryKeyRelatedField, serializers.CharField,
+        serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField,
+    )
+
+    def __init__(self, serializer_class, computed=None, annotations=()):
+        computed = computed or {}
+        self.serializer_class = serializer_class
+        self.annotations = list(annotations)
+        self.steps = []
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in computed:
+                    raise ImproperlyConfigured(
+                        f"RowSerializer: no row equivalent for {serializer_class.__name__}.{name}"
+                    )
+                function, requires = computed[name]
+                self.steps.append((name, None, function, requires))
+                continue
+            lookup = field.source.replace('.', '__')
+            if isinstance(field, self.passthrough_fields):
+                convert = None
+            elif self.is_plain_iso_datetime(field):
+                convert = field  # bound to the current timezone per call, see bound_steps()
+            else:
+                convert = field.to_representation
+            self.steps.append((name, lookup, convert, [lookup]))
+        self.lookups = list(dict.fromkeys(key for *_, requires in self.steps for key in requires))
+
+    @staticmethod
+    def is_plain_iso_datetime(field):
+        return (
+            isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone')
+            and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601 and settings.USE_TZ
+        )
+
+    def subset(self, names):
+        """A copy that outputs (and fetches the columns for) only these fields"""
+        if names is None:
+            return self
+        subset = copy.copy(self)
+        subset.steps = [step for step in self.steps if step[0] in names]
+        subset.lookups = list(dict.fromkeys(key for *_, requires in subset.steps for key in requires))
+        return subset
+
+    def values(self, queryset, *extra):
+        present = queryset.query.annotations
+        return queryset.values(
+            *(key for key in self.lookups if key not in self.annotations or key in present), *extra
+        )
+
+    def bound_steps(self):
+        """
+        Steps with DateTimeFields swapped for a direct conversion to the current
+        timezone, resolved once per call rather than per value as DRF does
+        """
+        tz = timezone.get_current_timezone()
+
+        def iso_datetime(field):
+            def convert(value):
+                if value.tzinfo is None:
+                    return field.to_representation(value)
+                value = value.astimezone(tz).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return convert
+
+        return [
+            (name, lookup, iso_datetime(convert) if isinstance(convert, serializers.DateTimeField) else convert)
+            for name, lookup, convert, _ in self.steps
+        ]
+
+    def to_representation(self, row, steps=None):
+        data = {}
+        for name, lookup, convert in steps or self.bound_steps():
+            if lookup is None:
+                data[name] = convert(row)
+            else:
+                value = row[lookup]
+                data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def serialize(self, rows):
+        steps = self.bound_steps()
+        to_representation = self.to_representation
+        return [to_representation(row, steps) for row in rows]
+
+
+event_rows = RowSerializer(
+    EventSerializer,
+    annotations=['num_enrolled', 'num_held', 'user_is_enrolled', 'distance_km'],
+    computed={
+        'available_seats': (
+            lambda row: None if row['capacity'] is None else row['capacity'] - row['num_enrolled'] - row['num_held'],
+            ['capacity', 'num_enrolled', 'num_held'],
+        ),
+        'enrolled_count': (lambda row: row['num_enrolled'], ['num_enrolled']),
+        'is_enrolled': (lambda row: row.get('user_is_enrolled', False), ['user_is_enrolled']),
+        'distance_km': (
+            lambda row: None if row.get('distance_km') is None else round(row['distance_km'], 3),
+            ['distance_km'],
+        ),
+    },
+)
+enrollment_rows = RowSerializer(
+    EnrollmentSerializer,
+    computed={
+        'checkin_token': (
+            lambda row: checkin.token_for(row['id'], row['event'], row['event__ends_at'])
+            if row['status'] == 'ENROLLED' else None,
+            ['id', 'event', 'status', 'event__ends_at'],
+        ),
+    },
+)
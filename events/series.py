@@ -0,0 +1,248 @@
+"""
+Recurring event series (EventSeries) and their occurrences.
+
+An occurrence becomes an Event row (series, occurrence_start) when it starts
+within SERIES_HORIZON_DAYS (materialize_horizon(), from
+events.tasks.materialize_series and on series creation) or when someone
+enrolls in it (materialize()). Everything later is only the rule: the event
+list (EventViewSet.list) expands the occurrences of the series matching its
+filters, up to SERIES_LIST_DAYS ahead, and merges them with the stored
+events in the list's order (Occurrences). They are listed with "id": null
+and their "series" and "occurrence_start", which is what enrolling takes.
+"""
+import heapq
+from datetime import timedelta
+from itertools import islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import geo, live, recurrence
+from .filters import SeriesFilter
+from .models import Event, EventSeries
+
+# Stored occurrences get these from the series when it is edited
+SHARED_FIELDS = ('title', 'description', 'language', 'location', 'latitude', 'longitude', 'capacity')
+SERIES_COLUMNS = {field.name for field in EventSeries._meta.concrete_fields}
+
+
+def horizon():
+    return timezone.now() + timedelta(days=settings.SERIES_HORIZON_DAYS)
+
+
+def unfinished(series):
+    """Series with occurrences from their materialized_until on"""
+    return series.filter(Q(last_starts_at__isnull=True) | Q(last_starts_at__gte=F('materialized_until')))
+
+
+def materialize(series, start):
+    """The Event of the occurrence starting at `start`, created if it isn't yet"""
+    event, _ = Event.objects.get_or_create(
+        series=series, occurrence_start=start, defaults=series.occurrence_fields(start)
+    )
+    return event
+
+
+def materialize_horizon(series_id, until):
+    """Create the Events of a series' occurrences starting before `until`; returns how many were new"""
+    created = 0
+    with transaction.atomic():
+        series = EventSeries.objects.select_for_update().get(pk=series_id)
+        if series.materialized_until >= until:
+            return 0
+        for start in series.occurrences(series.materialized_until, until):
+            _, new = Event.objects.get_or_create(
+                series=series, occurrence_start=start, defaults=series.occurrence_fields(start)
+            )
+            created += new
+        series.materialized_until = until
+        series.save(update_fields=['materialized_until'])
+    return created
+
+
+def exclude(event):
+    """Keep a deleted occurrence from being listed or materialized again"""
+    series = EventSeries.objects.select_for_update().filter(pk=event.series_id).first()
+    if series is not None:
+        series.excluded.append(recurrence.key(event.occurrence_start))
+        series.save(update_fields=['excluded'])
+
+
+def update_occurrences(series, changed):
+    """Copy edited series fields to its stored occurrences that haven't started"""
+    changed = [name for name in changed if name in SHARED_FIELDS]
+    if not changed:
+        return
+    for event in series.events.filter(starts_at__gte=timezone.now()):
+        for name in changed:
+            setattr(event, name, getattr(series, name))
+        event.save(update_fields=changed)
+        live.record('event.updated', event, changed=changed)
+
+
+class Occurrence:
+    """An occurrence of a series that has no Event row"""
+    __slots__ = ('series', 'start', 'distance_km')
+
+    def __init__(self, series, start, distance_km):
+        self.series, self.start, self.distance_km = series, start, distance_km
+
+    def value(self, name):
+        """Its value of an EventViewSet ordering field"""
+        if name == 'starts_at':
+            return self.start
+        if name == 'distance_km':
+            return self.distance_km
+        return getattr(self.series, name)
+
+    def row(self, lookups):
+        """As an event_rows values() row (of an event without enrollments)"""
+        return {
+            lookup: OCCURRENCE_VALUES[lookup](self) if lookup in OCCURRENCE_VALUES else getattr(self.series, lookup)
+            for lookup in lookups
+        }
+
+
+# event_rows lookups that aren't simply the series' field of the same name
+OCCURRENCE_VALUES = {
+    'id': lambda occurrence: None,
+    'starts_at': lambda occurrence: occurrence.start,
+    'ends_at': lambda occurrence: occurrence.start + occurrence.series.duration,
+    'occurrence_start': lambda occurrence: occurrence.start,
+    'series': lambda occurrence: occurrence.series.pk,
+    'distance_km': lambda occurrence: occurrence.distance_km,
+    'num_enrolled': lambda occurrence: 0,
+    'num_held': lambda occurrence: 0,
+    'user_is_enrolled': lambda occurrence: False,
+    'created_by__email': lambda occurrence: occurrence.series.created_by.email,
+}
+# What expanding and ordering occurrences reads
+SCHEDULE_COLUMNS = ('id', 'starts_at', 'ends_at', 'rule', 'timezone', 'excluded', 'materialized_until', 'created_at')
+
+
+def sortable(value):
+    return value.timestamp() if hasattr(value, 'timestamp') else value
+
+
+class Occurrences:
+    """
+    The rows of an event queryset merged with the occurrences of `series` in
+    [after, before) that aren't stored, in the queryset's order: a lazy
+    sequence for the paginator. count() expands the rules without building
+    rows; a slice [a:b] reads the sort keys of the first b stored events
+    (one indexed query), merges them with the first b occurrences and only
+    fetches the stored rows that land on the page.
+    """
+
+    def __init__(self, queryset, rows, series, after, before, distances=None):
+        self.queryset, self.rows, self.series = queryset, rows, series
+        self.after, self.before = after, before
+        self.distances = distances or {}
+        # Ordering fields as (name, descending); the pk breaks ties
+        self.order = [
+            (name.lstrip('-'), name.startswith('-')) for name in queryset.query.order_by
+            if name.lstrip('-') not in ('pk', 'id')
+        ]
+        self.stored = set(
+            Event.all_objects.filter(
+                series__in=series, occurrence_start__gte=min(item.materialized_until for item in series)
+            ).values_list('series_id', 'occurrence_start')
+        )
+        self._count = None
+
+    def key(self, values):
+        return tuple(-sortable(value) if descending else sortable(value)
+                     for value, (_, descending) in zip(values, self.order))
+
+    def occurrences_of(self, series):
+        after = max(self.after, series.materialized_until) if self.after else series.materialized_until
+        distance = self.distances.get(series.pk)
+        for start in series.occurrences(after, self.before):
+            if (series.pk, start) not in self.stored:
+                yield Occurrence(series, start, distance)
+
+    def stream(self):
+        """((sort key, occurrence)), the series' expansions merged lazily"""
+        def keyed(series):
+            occurrences = self.occurrences_of(series)
+            if ('starts_at', True) in self.order:
+                occurrences = reversed(list(occurrences))
+            for occurrence in occurrences:
+                yield (
+                    *self.key([occurrence.value(name) for name, _ in self.order]),
+                    1, series.pk, occurrence.start.timestamp(),
+                ), occurrence
+
+        return heapq.merge(*(keyed(series) for series in self.series), key=itemgetter(0))
+
+    def count(self):
+        if self._count is None:
+            self._count = self.queryset.count() + sum(1 for _ in self.stream())
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[0:self.count()])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        names = [name for name, _ in self.order]
+        keys = self.queryset.order_by(
+            *(f'-{name}' if descending else name for name, descending in self.order), 'pk'
+        ).values_list(*names, 'pk')[:stop]
+        stored = (((*self.key(values[:-1]), 0, values[-1]), None) for values in keys)
+        page = list(islice(heapq.merge(stored, self.stream(), key=itemgetter(0)), start, stop))
+
+        pks = [key[-1] for key, occurrence in page if occurrence is None]
+        by_pk = {row['pk']: row for row in self.rows.values(self.queryset.order_by().filter(pk__in=pks), 'pk')}
+        return [by_pk[key[-1]] if occurrence is None else occurrence.row(self.rows.lookups) for key, occurrence in page]
+
+
+def with_occurrences(queryset, request, rows):
+    """
+    rows.values() of the (filtered) event queryset, merged with the
+    occurrences not stored yet of the series matching the same filters
+    """
+    values = rows.values(queryset)
+    # Only the columns the requested fields need, as event_queryset_for() does
+    columns = {*SCHEDULE_COLUMNS, *(lookup for lookup in rows.lookups if lookup in SERIES_COLUMNS)}
+    series = EventSeries.objects.all()
+    if 'created_by__email' in rows.lookups:
+        series = series.select_related('created_by')
+        columns.add('created_by__email')
+    filterset = SeriesFilter(request.query_params, queryset=series)
+    if not filterset.is_valid():
+        return values
+    params = filterset.form.cleaned_data
+    if params.get('near'):
+        columns.update(('latitude', 'longitude'))
+    after = params.get('starts_after')
+    before = timezone.now() + timedelta(days=settings.SERIES_LIST_DAYS)
+    if params.get('starts_before'):
+        # starts_before is inclusive
+        before = min(before, params['starts_before'] + timedelta(microseconds=1))
+    series = unfinished(filterset.qs).filter(materialized_until__lt=before).only(*columns)
+    if after:
+        series = series.filter(Q(last_starts_at__isnull=True) | Q(last_starts_at__gte=after))
+    series = list(series)
+
+    distances = {}
+    if params.get('near'):
+        latitude, longitude = params['near']
+        radius_km = params.get('radius_km')
+        radius_km = float(settings.GEO_DEFAULT_RADIUS_KM if radius_km is None else radius_km)
+        for item in series:
+            if item.latitude is not None:
+                distances[item.pk] = geo.haversine_km(latitude, longitude, item.latitude, item.longitude)
+        series = [item for item in series if distances.get(item.pk, radius_km + 1) <= radius_km]
+
+    if not series:
+        return values
+    return Occurrences(queryset, rows, series, after, before, distances)
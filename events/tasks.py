@@ -1,9 +1,20 @@
+import logging
+import time
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
 from django.utils import timezone
-from .models import Event, Enrollment
+from events_platform.db.routers import read_from
+from .archive import archive_events
+from . import live
+from .models import Event, EventSeries, Enrollment, OutboxEntry, SeatHold
+from .series import materialize_horizon, unfinished
 from datetime import timedelta
 
+logger = logging.getLogger(__name__)
+
 @shared_task
 def send_followup_email(user_email, event_title):
     subject = f"Thanks for enrolling in {event_title}"
@@ -11,23 +22,214 @@ def send_followup_email(user_email, event_title):
     send_mail(subject, message, 'admin@events.com', [user_email])
 
 @shared_task
-def check_event_reminders():
+def check_event_reminders(using='replica'):
     # Runs periodically (e.g. every 5 mins)
     # Find events starting between 55 mins and 65 mins from now (approx 1 hour)
+    # A few seconds of replica lag doesn't matter for a 10 minute window, so read
+    # from a replica by default; pass using='default' to read from the primary.
     now = timezone.now()
     start_window = now + timedelta(minutes=55)
     end_window = now + timedelta(minutes=65)
-    
-    events = Event.objects.filter(starts_at__range=(start_window, end_window))
-    
-    for event in events:
-        # Find enrollments
-        enrollments = Enrollment.objects.filter(event=event, status='ENROLLED')
-        for enrollment in enrollments:
-            send_reminder_email.delay(enrollment.seeker.email, event.title)
+
+    with read_from(using):
+        events = Event.objects.filter(starts_at__range=(start_window, end_window))
+
+        for event in events:
+            # Find enrollments
+            enrollments = Enrollment.objects.filter(event=event, status='ENROLLED').select_related('seeker')
+            for enrollment in enrollments:
+                send_reminder_email.delay(enrollment.seeker.email, event.title)
 
 @shared_task
 def send_reminder_email(user_email, event_title):
     subject = f"Reminder: {event_title} starts in 1 hour!"
     message = f"Get ready, your event {event_title} is starting soon."
     send_mail(subject, message, 'admin@events.com', [user_email])
+
+
+@shared_task
+def archive_past_events(after_days=None, batch_size=None):
+    """
+    Move events that ended more than `after_days` ago, with their
+    enrollments, into the archive tables, `batch_size` events per transaction
+    (see events/archive.py). Returns a summary of what was moved.
+    """
+    if after_days is None:
+        after_days = getattr(settings, 'EVENT_ARCHIVE_AFTER_DAYS', 30)
+    if batch_size is None:
+        batch_size = getattr(settings, 'EVENT_ARCHIVE_BATCH_SIZE', 200)
+
+    cutoff = timezone.now() - timedelta(days=after_days)
+    stats = {'events_archived': 0, 'enrollments_archived': 0, 'batches': 0, 'batch_durations_ms': []}
+
+    while True:
+        # From the primary: archive_events() moves the rows there, and a lagging replica would return them again
+        ids = list(
+            Event.objects.using('default').filter(ends_at__lt=cutoff)
+            .order_by('ends_at', 'pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        started = time.monotonic()
+        events, enrollments = archive_events(ids, cutoff)
+        duration_ms = (time.monotonic() - started) * 1000
+
+        stats['batches'] += 1
+        stats['events_archived'] += events
+        stats['enrollments_archived'] += enrollments
+        stats['batch_durations_ms'].append(round(duration_ms, 2))
+        logger.info(
+            "Archived batch %s: %s events (%s enrollments) in %.2fms",
+            stats['batches'], events, enrollments, duration_ms
+        )
+
+        if len(ids) < batch_size:
+            break
+
+    logger.info(
+        "Event archival finished: %s events, %s enrollments, %s batches",
+        stats['events_archived'], stats['enrollments_archived'], stats['batches']
+    )
+    return stats
+
+
+@shared_task
+def purge_deleted_event(event_id, batch_size=None):
+    """
+    Finish deleting a soft-deleted event. Its enrollments are deleted
+    `batch_size` rows per transaction, so no single transaction locks tens of
+    thousands of rows, and each batch's attendees are sent a cancellation
+    notice once that batch is committed. Safe to run again for the same event.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'EVENT_PURGE_BATCH_SIZE', 1000)
+    email_batch_size = getattr(settings, 'EVENT_CANCELLATION_EMAIL_BATCH_SIZE', 100)
+
+    event = Event.all_objects.using('default').filter(pk=event_id, deleted_at__isnull=False).only('title').first()
+    if event is None:
+        return {'enrollments_deleted': 0, 'notices_queued': 0, 'batches': 0}
+    stats = {'enrollments_deleted': 0, 'notices_queued': 0, 'batches': 0}
+
+    while True:
+        with transaction.atomic():
+            # Locks the enrollments only, not the joined auth_user rows (logins, profile edits)
+            batch = list(
+                Enrollment.objects.select_for_update(of=('self',)).filter(event_id=event_id)
+                .order_by('pk').values_list('pk', 'status', 'seeker__email')[:batch_size]
+            )
+            if not batch:
+                break
+            Enrollment.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+            emails = [email for _, status, email in batch if status == 'ENROLLED']
+            for i in range(0, len(emails), email_batch_size):
+                chunk = emails[i:i + email_batch_size]
+                transaction.on_commit(
+                    lambda chunk=chunk: send_event_cancellation_notices.delay(chunk, event.title)
+                )
+        stats['batches'] += 1
+        stats['enrollments_deleted'] += len(batch)
+        stats['notices_queued'] += len(emails)
+
+    Event.all_objects.filter(pk=event_id).delete()
+    logger.info(
+        "Purged event %s: %s enrollments in %s batches, %s cancellation notices",
+        event_id, stats['enrollments_deleted'], stats['batches'], stats['notices_queued']
+    )
+    return stats
+
+
+@shared_task
+def purge_deleted_events():
+    """Periodic safety net: purge soft-deleted events whose purge task never ran"""
+    stale = timezone.now() - timedelta(minutes=10)
+    ids = list(Event.all_objects.using('default').filter(deleted_at__lt=stale).values_list('pk', flat=True))
+    for event_id in ids:
+        purge_deleted_event.delay(event_id)
+    return len(ids)
+
+
+@shared_task
+def send_event_cancellation_notices(emails, event_title):
+    """Tell attendees an event was cancelled, over a single SMTP connection"""
+    subject = f"Cancelled: {event_title}"
+    message = (
+        f"Unfortunately, \"{event_title}\" has been cancelled by its organizer "
+        "and your enrollment has been removed.\n\n"
+        "Best regards,\nEvents Platform Team"
+    )
+    messages = [
+        EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+        for email in emails
+    ]
+    sent = get_connection().send_messages(messages) or 0
+    logger.info("Sent %s/%s cancellation notices for %r", sent, len(messages), event_title)
+    return sent
+
+
+@shared_task
+def prune_outbox(retention_hours=None):
+    """Delete live-update outbox entries too old for any client to resume from"""
+    if retention_hours is None:
+        retention_hours = getattr(settings, 'LIVE_UPDATES_RETENTION_HOURS', 24)
+    cutoff = timezone.now() - timedelta(hours=retention_hours)
+    deleted, _ = OutboxEntry.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+@shared_task
+def materialize_series(horizon_days=None):
+    """
+    Store the occurrences of recurring series that start within the next
+    `horizon_days` as events (see events/series.py). Safe to run again.
+    """
+    if horizon_days is None:
+        horizon_days = getattr(settings, 'SERIES_HORIZON_DAYS', 14)
+    until = timezone.now() + timedelta(days=horizon_days)
+    ids = list(
+        unfinished(EventSeries.objects.using('default')).filter(materialized_until__lt=until)
+        .values_list('pk', flat=True)
+    )
+    created = sum(materialize_horizon(series_id, until) for series_id in ids)
+    logger.info("Materialized %s occurrences of %s series", created, len(ids))
+    return {'series': len(ids), 'events_created': created}
+
+
+@shared_task
+def expire_seat_holds(batch_size=None):
+    """
+    Delete expired seat holds, `batch_size` per transaction, and publish each
+    affected event's seat count once per batch. Holds stop counting toward
+    capacity the moment they expire; this only cleans up and tells viewers.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'SEAT_HOLD_SWEEP_BATCH_SIZE', 1000)
+    now = timezone.now()
+    stats = {'holds_expired': 0, 'events': 0, 'batches': 0}
+
+    while True:
+        # Oldest first, on the expires_at index
+        batch = list(
+            SeatHold.objects.using('default').filter(expires_at__lte=now)
+            .order_by('expires_at').values_list('pk', 'event_id')[:batch_size]
+        )
+        if not batch:
+            break
+        event_ids = {event_id for _, event_id in batch}
+        with transaction.atomic():
+            # A hold renewed since it was read isn't expired any more
+            SeatHold.objects.filter(pk__in=[pk for pk, _ in batch], expires_at__lte=now).delete()
+            for event in Event.objects.filter(pk__in=event_ids).only('id', 'capacity'):
+                live.record('hold.released', event)
+        stats['batches'] += 1
+        stats['holds_expired'] += len(batch)
+        stats['events'] += len(event_ids)
+        if len(batch) < batch_size:
+            break
+
+    if stats['holds_expired']:
+        logger.info(
+            "Expired %s seat holds of %s events in %s batches",
+            stats['holds_expired'], stats['events'], stats['batches']
+        )
+    return stats
@@ -1,10 +1,21 @@
+import json
+import os
 import pytest
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.cache import cache
+from django.db import transaction
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+from events_platform.db.middleware import ReplicaRoutingMiddleware
+from events_platform.db.routers import PrimaryReplicaRouter, read_from, recent_write_key
 from django.contrib.auth.models import User
 from users.models import Profile
-from events.models import Event, Enrollment
+from events.models import Attendance, Event, EventSeries, Enrollment, SeatHold
+from events import checkin, series as series_events
 from django.utils import timezone
 from datetime import timedelta
 
@@ -175,3 +186,1422 @@ class TestEnrollment:
         
         assert response.status_code == status.HTTP_200_OK
         assert response.data['is_enrolled'] == False
+
+
+@pytest.mark.django_db
+class TestAsyncReadEndpoints:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+
+        now = timezone.now()
+        for i in range(12):
+            event = Event.objects.create(
+                title=f"Event {i}", description="Desc", language="English", location="Web",
+                starts_at=now + timedelta(days=i - 2), ends_at=now + timedelta(days=i - 2, hours=1),
+                created_by=self.facilitator, capacity=5
+            )
+            if i % 3 == 0:
+                Enrollment.objects.create(event=event, seeker=self.seeker)
+
+        token = RefreshToken.for_user(self.seeker).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_event_list_matches_sync_endpoint(self):
+        # Unstored occurrences of a series are listed by both
+        EventSeries.objects.create(
+            title="Weekly", description="Desc", language="English", location="Web", capacity=5,
+            starts_at=timezone.now() + timedelta(days=20), ends_at=timezone.now() + timedelta(days=20, hours=1),
+            rule='FREQ=WEEKLY;COUNT=4', created_by=self.facilitator,
+        )
+        for query in ['', '?page=2', '?language=English&ordering=-starts_at', '?fields=id,title,starts_at']:
+            sync_response = self.client.get(reverse('event-list') + query)
+            async_response = self.client.get(reverse('async-event-list') + query)
+            assert async_response.status_code == status.HTTP_200_OK
+            sync_data = sync_response.json()
+            async_data = async_response.json()
+            assert async_data['count'] == sync_data['count'] == 16
+            assert async_data['results'] == sync_data['results']
+
+    def test_event_detail_matches_sync_endpoint(self):
+        event = Event.objects.first()
+        sync_response = self.client.get(reverse('event-detail', args=[event.id]))
+        async_response = self.client.get(reverse('async-event-detail', args=[event.id]))
+        assert async_response.json() == sync_response.json()
+        assert self.client.get(reverse('async-event-detail', args=[0])).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_enrollment_lists_match_sync_endpoints(self):
+        for name in ['upcoming', 'past']:
+            sync_response = self.client.get(reverse(f'enrollment-{name}'))
+            async_response = self.client.get(reverse(f'async-enrollment-{name}'))
+            assert async_response.status_code == status.HTTP_200_OK
+            assert async_response.json() == sync_response.json()
+
+    def test_requires_authentication_and_role(self):
+        self.client.credentials()
+        assert self.client.get(reverse('async-event-list')).status_code == status.HTTP_401_UNAUTHORIZED
+
+        token = RefreshToken.for_user(self.facilitator).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        assert self.client.get(reverse('async-enrollment-upcoming')).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db(transaction=True)  # reads inside a transaction always use the primary
+class TestReplicaRouting:
+    @pytest.fixture(autouse=True)
+    def replicas(self, settings):
+        settings.DATABASE_REPLICAS = ['replica_1']
+        settings.REPLICA_STICKY_SECONDS = 30
+
+    def setup_method(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        self.other = User.objects.create_user(username='o', email='o@t.com', password='p')
+
+    def route_request(self, method, user, status_code=200):
+        """Run a request through the middleware and return where an Event read was routed"""
+        routed = {}
+
+        def view(request):
+            request.user = user  # as DRF does after authenticating
+            routed['alias'] = self.router.db_for_read(Event)
+            return HttpResponse(status=status_code)
+
+        request = getattr(self.factory, method)('/events/events/')
+        ReplicaRoutingMiddleware(view)(request)
+        return routed['alias']
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        assert self.route_request('get', self.seeker) == 'replica_1'
+        assert self.router.db_for_read(User) is None
+        assert self.router.db_for_write(Event) == 'default'
+
+    def test_writer_is_pinned_to_primary(self):
+        assert self.route_request('post', self.seeker, status_code=201) == 'default'
+        assert self.route_request('get', self.seeker) == 'default'
+        assert self.route_request('get', self.other) == 'replica_1'
+
+    def test_failed_write_does_not_pin(self):
+        self.route_request('post', self.seeker, status_code=400)
+        assert self.route_request('get', self.seeker) == 'replica_1'
+
+    def test_batched_reads_use_replicas_and_do_not_pin(self, monkeypatch):
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        routed = []
+        db_for_read = PrimaryReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            routed.append(alias)
+            return None if alias == 'replica_1' else alias  # the test database stands in for the replica
+        monkeypatch.setattr(PrimaryReplicaRouter, 'db_for_read', spy)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.seeker).access_token}')
+        response = client.post(reverse('batch'), {'requests': [
+            {'path': '/events/events/'}, {'path': '/events/enrollments/upcoming/'},
+        ]}, format='json')
+        assert [item['status'] for item in response.json()['responses']] == [200, 200]
+        assert 'replica_1' in routed and 'default' not in routed
+        assert cache.get(recent_write_key(self.seeker.pk)) is None
+
+    def test_replicas_require_a_shared_cache(self, monkeypatch):
+        import runpy
+        from django.core.exceptions import ImproperlyConfigured
+        from events_platform import settings as project_settings
+        monkeypatch.setenv('DATABASE_REPLICA_URLS', 'sqlite:///replica.sqlite3')
+        monkeypatch.setenv('CACHE_URL', '')
+        with pytest.raises(ImproperlyConfigured):
+            runpy.run_path(project_settings.__file__)
+        monkeypatch.setenv('CACHE_URL', 'redis://localhost:6379/1')
+        assert runpy.run_path(project_settings.__file__)['DATABASE_REPLICAS'] == ['replica_1']
+
+    def test_read_from_overrides_routing(self):
+        with read_from('default'):
+            assert self.router.db_for_read(Event) == 'default'
+        with read_from('replica'):
+            assert self.router.db_for_read(User) == 'replica_1'
+
+
+@pytest.mark.django_db
+class TestSeedScale:
+    def test_seed_scale_generates_consistent_dataset(self):
+        call_command('seed_scale', users=40, events=10, enrollments=60, seed=3, batch_size=7)
+
+        assert User.objects.filter(email__endswith='.s3@scale.test').count() == 40
+        assert Profile.objects.filter(role='FACILITATOR').count() == 2
+        assert Event.objects.count() == 10
+        assert Enrollment.objects.exists()
+        for event in Event.objects.exclude(capacity=None):
+            assert event.enrollments.filter(status='ENROLLED').count() <= event.capacity
+        assert User.objects.get(email='seeker0.s3@scale.test').check_password('scale-pass-123')
+
+
+@pytest.mark.django_db
+class TestRequestTiming:
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.user, role='SEEKER', is_verified=True)
+        self.client.force_authenticate(user=self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('event-list'))
+        timing = response['Server-Timing']
+        for metric in ['db;dur=', 'view;dur=', 'render;dur=', 'total;dur=']:
+            assert metric in timing
+        assert 'desc="0 queries"' not in timing
+
+    def test_profile_param_requires_token(self, settings, tmp_path, monkeypatch):
+        import cProfile
+        settings.PROFILING_DIR = str(tmp_path)
+        started = []
+        enable = cProfile.Profile.enable
+        monkeypatch.setattr(cProfile.Profile, 'enable', lambda self: started.append(1) or enable(self))
+        url = reverse('event-list') + '?profile=1'
+
+        # Never started without the token, whoever asks (even staff; tokens unset disable it)
+        self.user.is_staff = True
+        self.user.save()
+        assert 'X-Profile-Id' not in self.client.get(url)
+        settings.PROFILING_TOKEN = 'secret'
+        assert 'X-Profile-Id' not in self.client.get(url, HTTP_X_PROFILE_TOKEN='wrong')
+        assert started == [] and list(tmp_path.iterdir()) == []
+
+        self.client.logout()
+        response = self.client.get(url, HTTP_X_PROFILE_TOKEN='secret')
+        assert (tmp_path / f"{response['X-Profile-Id']}.prof").exists()
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    def test_metrics_endpoint(self, settings):
+        settings.METRICS_AUTH_TOKEN = ''
+        assert APIClient().get('/metrics').status_code == status.HTTP_403_FORBIDDEN  # closed by default
+        settings.METRICS_AUTH_TOKEN = 'scrape-token'
+        client = APIClient()
+        facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=seeker, role='SEEKER', is_verified=True)
+        event = Event.objects.create(
+            title="Metered", description="Desc", language="English", location="Web",
+            starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=1),
+            created_by=facilitator
+        )
+        client.force_authenticate(user=seeker)
+        client.get(reverse('event-list'))
+        client.post(reverse('event-enroll', args=[event.id]))
+
+        assert client.get('/metrics').status_code == status.HTTP_403_FORBIDDEN
+        body = client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').content.decode()
+        assert 'http_request_duration_seconds_count{method="GET",view="event-list"}' in body
+        assert 'http_responses_total{method="POST",status="201",view="event-enroll"}' in body
+        assert 'http_request_db_queries_bucket{le="+Inf",view="event-list"}' in body
+        assert 'celery_task_duration_seconds_count{task="events.tasks.send_followup_email"}' in body
+        assert 'events_enrollments_last_minute 1.0' in body
+
+    def test_workers_serve_their_task_metrics(self, settings, monkeypatch):
+        from prometheus_client import generate_latest
+        from events_platform import metrics
+        served = []
+        monkeypatch.setattr(metrics, 'start_http_server', lambda port, registry: served.append((port, registry)))
+        metrics._serve_worker_metrics()
+        assert served == []
+        settings.CELERY_METRICS_PORT = 9808
+        metrics._serve_worker_metrics()
+        [(port, registry)] = served
+        assert port == 9808 and b'celery_task_failures_total' in generate_latest(registry)
+
+
+@pytest.mark.django_db
+class TestQueryInspection:
+    def setup_method(self):
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        for i in range(6):
+            Event.objects.create(
+                title=f"Event {i}", description="Desc", language="English", location="Web",
+                starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=1),
+                created_by=self.facilitator
+            )
+
+    def test_fingerprint_normalizes_parameters(self):
+        from events_platform.querycheck import fingerprint
+        assert fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'x'") == \
+            fingerprint("SELECT  * FROM t WHERE id = 42 AND name = 'it''s'")
+        assert fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s)") == "SELECT * FROM t WHERE id IN (...)"
+
+    def test_strict_inspection_flags_n_plus_one(self):
+        from events_platform.querycheck import inspect_queries
+        with pytest.raises(AssertionError, match='N\\+1\\? 6x .*test_events.py'):
+            with inspect_queries('loop', strict=True):
+                [event.created_by.email for event in Event.objects.all()]
+
+        with inspect_queries('joined', strict=True) as report:
+            [event.created_by.email for event in Event.objects.select_related('created_by')]
+        assert report.total == 1
+
+    @pytest.mark.no_querycheck
+    def test_middleware_reports_requests(self, settings):
+        from events_platform.querycheck import query_problems_detected
+        settings.QUERY_INSPECTION_ENABLED = True
+        settings.SLOW_QUERY_MS = 0
+        reports = []
+
+        def collect(sender, report, **kwargs):
+            reports.append(report)
+
+        query_problems_detected.connect(collect)
+        try:
+            client = APIClient()
+            client.force_authenticate(user=self.facilitator)
+            client.get(reverse('event-list'))
+        finally:
+            query_problems_detected.disconnect(collect)
+        assert reports and reports[0].label == 'GET /events/events/'
+        assert reports[0].slow and not reports[0].repeated
+
+
+@pytest.mark.django_db
+class TestSchema:
+    @pytest.fixture(autouse=True)
+    def schema_dir(self, settings, tmp_path, monkeypatch):
+        from events_platform import schema
+        settings.SCHEMA_CACHE_DIR = str(tmp_path)
+        settings.CODE_VERSION = 'test-1'
+        monkeypatch.setattr(schema, '_documents', {})
+        return tmp_path
+
+    def test_schema_is_built_once_and_served_with_etag(self, schema_dir):
+        client = APIClient()
+        response = client.get(reverse('schema'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('application/vnd.oai.openapi')
+        assert b'/events/events/' in response.content
+        assert sorted(path.name for path in schema_dir.iterdir()) == ['openapi-test-1.json', 'openapi-test-1.yaml']
+
+        etag = response['ETag']
+        assert client.get(reverse('schema'), HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        json_response = client.get(reverse('schema') + '?format=json')
+        assert json_response['ETag'] != etag
+        assert json_response.json()['info']['title'] == 'Events Platform API'
+
+    def test_prebuilt_file_is_served_and_new_version_replaces_it(self, schema_dir, settings, monkeypatch):
+        from events_platform import schema
+        (schema_dir / 'openapi-test-1.yaml').write_bytes(b'openapi: prebuilt\n')
+        assert APIClient().get(reverse('schema')).content == b'openapi: prebuilt\n'
+
+        settings.CODE_VERSION = 'test-2'
+        monkeypatch.setattr(schema, '_documents', {})
+        call_command('build_openapi')
+        assert sorted(path.name for path in schema_dir.iterdir()) == ['openapi-test-2.json', 'openapi-test-2.yaml']
+
+
+@pytest.mark.django_db
+class TestFastJSONAndCompression:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.client.force_authenticate(user=self.facilitator)
+        for i in range(10):
+            Event.objects.create(
+                title=f"Event {i}", description="Long description " * 50, language="English", location="Web",
+                starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=1),
+                created_by=self.facilitator
+            )
+
+    def test_orjson_renderer_matches_drf_renderer(self):
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from events_platform.renderers import ORJSONRenderer
+        data = {
+            'when': timezone.now(), 'price': Decimal('1.50'), 'text': 'line\u2028sep ünïcode',
+            'nested': [{'id': 1, 'none': None}],
+        }
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+        response = self.client.get(reverse('event-list'))
+        assert response.json()['results'][0]['starts_at'].endswith('Z')
+
+    def test_orjson_parser(self):
+        response = self.client.post(reverse('event-list'), data=(
+            '{"title": "Parsed", "description": "D", "language": "English", "location": "Web", '
+            '"starts_at": "2030-01-01T10:00:00Z", "ends_at": "2030-01-01T12:00:00Z"}'
+        ), content_type='application/json')
+        assert response.status_code == status.HTTP_201_CREATED
+        response = self.client.post(reverse('event-list'), data='{"title": ', content_type='application/json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'JSON parse error' in response.json()['detail']
+
+    def test_large_responses_are_compressed(self):
+        import brotli
+        import gzip
+        response = self.client.get(reverse('event-list'), HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        assert response['Content-Encoding'] == 'br'
+        assert response['Vary'].endswith('Accept-Encoding')
+        assert len(brotli.decompress(response.content)) > 1024
+
+        response = self.client.get(reverse('event-list'), HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert b'Long description' in gzip.decompress(response.content)
+
+        small = self.client.get(reverse('event-detail', args=[99999]), HTTP_ACCEPT_ENCODING='br')
+        assert not small.has_header('Content-Encoding')
+
+
+@pytest.mark.django_db
+class TestRowSerializers:
+    """The .values() fast path must render byte-for-byte what the serializers do"""
+
+    def setup_method(self):
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        other = User.objects.create_user(username='o', email='o@t.com', password='p')
+        now = timezone.now()
+        for i, (days, capacity) in enumerate([(2, None), (3, 2), (-3, 5), (5, 1)]):
+            event = Event.objects.create(
+                title=f"Event {i}", description="Desc ü", language="English", location="Web",
+                starts_at=now + timedelta(days=days, microseconds=i), ends_at=now + timedelta(days=days, hours=2),
+                capacity=capacity, created_by=self.facilitator
+            )
+            Enrollment.objects.create(event=event, seeker=other)
+            if i != 3:
+                Enrollment.objects.create(event=event, seeker=self.seeker, status='CANCELED' if i == 1 else 'ENROLLED')
+
+    def render(self, data):
+        from rest_framework.renderers import JSONRenderer
+        return JSONRenderer().render(data)
+
+    @pytest.mark.parametrize('time_zone', ['UTC', 'Asia/Kolkata'])
+    def test_rows_match_serializers(self, settings, time_zone):
+        from django.contrib.auth.models import AnonymousUser
+        from events.serializers import EventSerializer, EnrollmentSerializer, event_rows, enrollment_rows
+        settings.TIME_ZONE = time_zone
+        request = RequestFactory().get('/')
+        for user in (self.seeker, self.facilitator, AnonymousUser()):
+            request.user = user
+            events = Event.objects.with_enrollment_stats(user).select_related('created_by').order_by('id')
+            assert self.render(event_rows.serialize(event_rows.values(events))) == \
+                self.render(EventSerializer(events, many=True, context={'request': request}).data)
+
+        enrollments = Enrollment.objects.filter(seeker=self.seeker).select_related('event').order_by('id')
+        assert self.render(enrollment_rows.serialize(enrollment_rows.values(enrollments))) == \
+            self.render(EnrollmentSerializer(enrollments, many=True).data)
+
+    def test_list_endpoints_match_serializers(self):
+        from events.serializers import EventSerializer, EnrollmentSerializer
+        client = APIClient()
+        client.force_authenticate(user=self.seeker)
+        request = RequestFactory().get('/')
+        request.user = self.seeker
+        events = Event.objects.with_enrollment_stats(self.seeker).order_by('starts_at')
+        response = client.get(reverse('event-list'))
+        assert response.json()['results'] == \
+            json.loads(self.render(EventSerializer(events, many=True, context={'request': request}).data))
+
+        upcoming = Enrollment.objects.filter(seeker=self.seeker, event__starts_at__gt=timezone.now())
+        response = client.get(reverse('enrollment-upcoming'))
+        assert response.json()['results'] == \
+            json.loads(self.render(EnrollmentSerializer(upcoming.order_by('event__starts_at'), many=True).data))
+
+        client.force_authenticate(user=self.facilitator)
+        response = client.get(reverse('event-my-events'))
+        assert [event['id'] for event in response.json()['results']] == [event.id for event in events]
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        self.event = Event.objects.create(
+            title="Sparse", description="Desc", language="English", location="Web", capacity=10,
+            starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=1),
+            created_by=self.facilitator
+        )
+        Enrollment.objects.create(event=self.event, seeker=self.seeker)
+        self.client.force_authenticate(user=self.seeker)
+
+    def get(self, url, params):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_fields_limit_payload_and_query(self):
+        response, sql = self.get(reverse('event-list'), {'fields': 'title,id'})
+        assert response.json()['results'] == [{'id': self.event.id, 'title': 'Sparse'}]
+        assert 'events_enrollment' not in sql and 'description' not in sql and 'auth_user' not in sql
+
+        response, sql = self.get(reverse('event-list'), {'fields': 'id,available_seats,is_enrolled'})
+        assert response.json()['results'] == [{'id': self.event.id, 'available_seats': 9, 'is_enrolled': True}]
+
+    def test_omit_and_retrieve(self):
+        full = self.client.get(reverse('event-detail', args=[self.event.id])).json()
+        response, sql = self.get(reverse('event-detail', args=[self.event.id]), {'omit': 'description,is_enrolled'})
+        assert response.json() == {k: v for k, v in full.items() if k not in ('description', 'is_enrolled')}
+        assert '"events_event"."description"' not in sql and 'U0."seeker_id"' not in sql
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.seeker).access_token}')
+        response, _ = self.get(reverse('async-event-detail', args=[self.event.id]), {'fields': 'title,enrolled_count'})
+        assert response.json() == {'title': 'Sparse', 'enrolled_count': 1}
+
+    def test_enrollments_and_unknown_fields(self):
+        response, sql = self.get(reverse('enrollment-upcoming'), {'fields': 'event_title,status'})
+        assert response.json()['results'] == [{'event_title': 'Sparse', 'status': 'ENROLLED'}]
+
+        response, _ = self.get(reverse('event-list'), {'fields': 'title,secret'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'secret' in response.json()['fields']
+
+
+@pytest.mark.django_db
+class TestEventArchival:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        other = User.objects.create_user(username='o', email='o@t.com', password='p')
+        now = timezone.now()
+        self.events = {}
+        for name, days in [('old', -60), ('older', -90), ('recent', -5), ('upcoming', 5)]:
+            event = Event.objects.create(
+                title=name, description="Desc", language="English", location="Web",
+                starts_at=now + timedelta(days=days), ends_at=now + timedelta(days=days, hours=2),
+                created_by=self.facilitator
+            )
+            Enrollment.objects.create(event=event, seeker=self.seeker)
+            Enrollment.objects.create(event=event, seeker=other, status='CANCELED')
+            self.events[name] = event
+        self.client.force_authenticate(user=self.seeker)
+
+    def test_archives_old_events_in_batches(self):
+        from events.models import ArchivedEvent, ArchivedEnrollment
+        from events.tasks import archive_past_events
+        before = self.client.get(reverse('enrollment-past')).json()
+
+        stats = archive_past_events(after_days=30, batch_size=1)
+        assert stats['events_archived'] == 2 and stats['enrollments_archived'] == 4 and stats['batches'] == 2
+        assert set(Event.objects.values_list('title', flat=True)) == {'recent', 'upcoming'}
+        assert Enrollment.objects.count() == 4
+        archived = ArchivedEvent.objects.get(pk=self.events['old'].pk)
+        assert archived.title == 'old' and archived.created_by == self.facilitator
+        assert ArchivedEnrollment.objects.filter(event=archived, seeker=self.seeker, status='ENROLLED').exists()
+
+        after = self.client.get(reverse('enrollment-past')).json()
+        assert after['count'] == before['count'] == 3
+        assert [row['event_title'] for row in after['results']] == ['recent', 'old', 'older']
+        assert sorted(after['results'], key=lambda row: row['id']) == sorted(before['results'], key=lambda row: row['id'])
+
+        sparse = self.client.get(reverse('enrollment-past'), {'fields': 'event_title'}).json()
+        assert sparse['results'] == [{'event_title': 'recent'}, {'event_title': 'old'}, {'event_title': 'older'}]
+
+    def test_archive_is_a_noop_when_nothing_is_old(self):
+        from events.tasks import archive_past_events
+        assert archive_past_events(after_days=365)['events_archived'] == 0
+        assert Event.objects.count() == 4
+
+
+@pytest.mark.django_db
+class TestEventDeletion:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.seekers = []
+        for i in range(5):
+            seeker = User.objects.create_user(username=f's{i}', email=f's{i}@t.com', password='p')
+            Profile.objects.create(user=seeker, role='SEEKER', is_verified=True)
+            self.seekers.append(seeker)
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Doomed", description="Desc", language="English", location="Web",
+            starts_at=now + timedelta(days=1), ends_at=now + timedelta(days=1, hours=2),
+            created_by=self.facilitator
+        )
+        for i, seeker in enumerate(self.seekers):
+            Enrollment.objects.create(event=self.event, seeker=seeker, status='CANCELED' if i == 0 else 'ENROLLED')
+
+    def test_delete_hides_event_then_purges_in_batches(self, settings, django_capture_on_commit_callbacks):
+        from django.core import mail
+        settings.EVENT_PURGE_BATCH_SIZE = 2
+        settings.EVENT_CANCELLATION_EMAIL_BATCH_SIZE = 1
+        self.client.force_authenticate(user=self.facilitator)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = self.client.delete(reverse('event-detail', args=[self.event.pk]))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert len(callbacks) == 3  # autocomplete and live updates, then the purge
+        assert not Event.objects.exists() and Event.all_objects.filter(deleted_at__isnull=False).exists()
+
+        self.client.force_authenticate(user=self.seekers[1])
+        assert self.client.get(reverse('enrollment-list')).json()['count'] == 0
+        assert self.client.get(reverse('event-detail', args=[self.event.pk])).status_code == 404
+
+        with django_capture_on_commit_callbacks(execute=True):
+            callbacks[-1]()
+        assert not Event.all_objects.exists() and not Enrollment.objects.exists()
+        assert sorted(message.to[0] for message in mail.outbox) == [f's{i}@t.com' for i in range(1, 5)]
+        assert mail.outbox[0].subject == "Cancelled: Doomed"
+
+    def test_purge_is_idempotent(self):
+        from events.tasks import purge_deleted_event
+        assert purge_deleted_event(self.event.pk)['enrollments_deleted'] == 0  # not deleted yet
+        Event.objects.filter(pk=self.event.pk).update(deleted_at=timezone.now())
+        stats = purge_deleted_event(self.event.pk, batch_size=2)
+        assert stats['enrollments_deleted'] == 5 and stats['batches'] == 3
+        assert purge_deleted_event(self.event.pk)['enrollments_deleted'] == 0
+
+
+@pytest.mark.django_db
+class TestLiveUpdates:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        now = timezone.now()
+        self.event, self.other = [
+            Event.objects.create(
+                title=title, description="Desc", language="English", location="Web", capacity=10,
+                starts_at=now + timedelta(days=1), ends_at=now + timedelta(days=1, hours=2),
+                created_by=self.facilitator
+            )
+            for title in ("Live", "Other")
+        ]
+
+    def test_writes_fan_out_deltas(self, django_capture_on_commit_callbacks):
+        import asyncio
+        from events import live
+        loop = asyncio.new_event_loop()
+        watching, elsewhere = loop.run_until_complete(self.subscribe(live, [self.event.pk], [self.other.pk]))
+        try:
+            self.client.force_authenticate(user=self.seeker)
+            with django_capture_on_commit_callbacks(execute=True):
+                self.client.post(reverse('event-enroll', args=[self.event.pk]))
+                self.client.delete(reverse('event-cancel-enrollment', args=[self.event.pk]))
+            self.client.force_authenticate(user=self.facilitator)
+            with django_capture_on_commit_callbacks(execute=True):
+                self.client.patch(reverse('event-detail', args=[self.event.pk]), {
+                    'title': 'Renamed', 'location': 'Web',
+                    'starts_at': self.event.starts_at.isoformat(), 'ends_at': self.event.ends_at.isoformat(),
+                })
+
+            received = [loop.run_until_complete(watching.get(1)) for _ in range(3)]
+            assert [message for message, _ in received] == [
+                {'id': received[0][0]['id'], 'type': 'enrollment.created', 'event': self.event.pk,
+                 'enrolled': 1, 'available_seats': 9},
+                {'id': received[1][0]['id'], 'type': 'enrollment.canceled', 'event': self.event.pk,
+                 'enrolled': 0, 'available_seats': 10},
+                {'id': received[2][0]['id'], 'type': 'event.updated', 'event': self.event.pk,
+                 'enrolled': 0, 'available_seats': 10, 'changed': ['title']},
+            ]
+            assert received[0][1].startswith(b"event: delta\ndata: {")  # no id: see live.replay()
+            assert loop.run_until_complete(elsewhere.get(0.01)) is None
+        finally:
+            live.hub.unsubscribe(watching)
+            live.hub.unsubscribe(elsewhere)
+            loop.close()
+
+    async def subscribe(self, live, *event_ids):
+        return [live.hub.subscribe(ids) for ids in event_ids]
+
+    def test_poll_and_stream_catch_up_from_outbox(self, settings):
+        from events import live
+        settings.LIVE_UPDATES_STREAM_SECONDS = 0
+        token = RefreshToken.for_user(self.seeker).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        start = self.client.get(reverse('live-poll')).json()
+        assert start == {'last_id': 0, 'deltas': []}
+
+        with transaction.atomic():
+            Enrollment.objects.create(event=self.event, seeker=self.seeker)
+            first = live.record('enrollment.created', self.event)
+            second = live.record('event.deleted', self.other)
+
+        polled = self.client.get(reverse('live-poll'), {'after': 0, 'timeout': 0}).json()
+        assert polled['last_id'] == second.id
+        assert [delta['type'] for delta in polled['deltas']] == ['enrollment.created', 'event.deleted']
+        only = self.client.get(reverse('live-poll'), {'after': 0, 'timeout': 0, 'events': self.other.pk}).json()
+        assert [delta['id'] for delta in only['deltas']] == [second.id]
+
+        response = self.client.get(reverse('live-updates'), HTTP_LAST_EVENT_ID=str(first.id))
+        assert response['Content-Type'] == 'text/event-stream'
+        body = b''.join(response).decode()
+        assert f'id: {second.id}\nevent: delta\n' in body and f'id: {first.id}\n' not in body
+
+        assert self.client.get(reverse('live-poll'), {'events': 'x'}).status_code == 400
+        self.client.credentials()
+        assert self.client.get(reverse('live-updates')).status_code == 401
+
+    def test_deltas_committed_out_of_order_are_not_skipped(self, settings):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from events import live
+        from events.async_views import LiveUpdatesView
+        from events.models import OutboxEntry
+        settings.LIVE_UPDATES_HEARTBEAT_SECONDS = 0
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.seeker).access_token}')
+        with transaction.atomic():
+            early = live.record('event.updated', self.event)
+            late = live.record('event.updated', self.other)
+        after = early.id - 1
+        # early's transaction is still running: its id is taken, its row not committed
+        OutboxEntry.objects.filter(pk=early.pk).delete()
+        polled = self.client.get(reverse('live-poll'), {'after': after, 'timeout': 0}).json()
+        assert polled == {'last_id': after, 'deltas': []}
+
+        async def stream():
+            subscription = live.hub.subscribe()
+            frames = LiveUpdatesView().stream(subscription, None, after, await sync_to_async(live.replay)(after))
+            try:
+                assert (await anext(frames)).startswith(b'retry: ')
+                subscription.put(live.delta(late), b'late')
+                assert await anext(frames) == b'late'
+                # early commits and is pushed after late, then late again
+                await sync_to_async(early.save)(force_insert=True)
+                subscription.put(live.delta(early), b'early')
+                subscription.put(live.delta(late), b'late')
+                # Read back from the outbox once the gap is filled; the pushed copies are dropped
+                assert (await anext(frames)).startswith(f'id: {early.id}\nevent: delta\n'.encode())
+                assert await anext(frames) == f'id: {late.id}\n\n'.encode()
+                assert await anext(frames) == b': keep-alive\n\n'
+            finally:
+                await frames.aclose()
+        async_to_sync(stream)()
+
+        polled = self.client.get(reverse('live-poll'), {'after': after, 'timeout': 0}).json()
+        assert [delta['id'] for delta in polled['deltas']] == [early.id, late.id] and polled['last_id'] == late.id
+
+        # A gap older than LIVE_UPDATES_GAP_SECONDS is a rolled back transaction
+        OutboxEntry.objects.filter(pk=early.pk).delete()
+        assert live.replay(after).held
+        settings.LIVE_UPDATES_GAP_SECONDS = 0
+        assert live.replay(after) == live.Replay([live.delta(late)], late.id, False)
+
+
+@pytest.mark.django_db
+class TestIdempotencyKeys:
+    def setup_method(self):
+        cache.clear()
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        self.event = Event.objects.create(
+            title="Retry", description="Desc", language="English", location="Web", capacity=5,
+            starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=2),
+            created_by=self.facilitator
+        )
+
+    def test_enroll_retry_is_replayed(self):
+        from django.core import mail
+        self.client.force_authenticate(user=self.seeker)
+        url = reverse('event-enroll', args=[self.event.pk])
+        first = self.client.post(url, HTTP_IDEMPOTENCY_KEY='enroll-1')
+        retry = self.client.post(url, HTTP_IDEMPOTENCY_KEY='enroll-1')
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json() and retry['Idempotent-Replayed'] == 'true'
+        assert 'Idempotent-Replayed' not in first
+        assert len(mail.outbox) == 1  # follow-up email scheduled once
+
+        # Without the key, or with a new one, the action runs again
+        assert self.client.post(url).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.client.post(url, HTTP_IDEMPOTENCY_KEY='enroll-2').status_code == status.HTTP_400_BAD_REQUEST
+        # Keys are per user
+        other = User.objects.create_user(username='s2', email='s2@t.com', password='p')
+        Profile.objects.create(user=other, role='SEEKER', is_verified=True)
+        self.client.force_authenticate(user=other)
+        response = self.client.post(url, HTTP_IDEMPOTENCY_KEY='enroll-1')
+        assert response.status_code == status.HTTP_201_CREATED and 'Idempotent-Replayed' not in response
+        assert Enrollment.objects.filter(event=self.event).count() == 2
+
+    def test_create_retry_is_replayed_and_key_bound_to_body(self):
+        self.client.force_authenticate(user=self.facilitator)
+        data = {
+            'title': 'Once', 'description': 'D', 'language': 'English', 'location': 'Web',
+            'starts_at': (timezone.now() + timedelta(days=2)).isoformat(),
+            'ends_at': (timezone.now() + timedelta(days=2, hours=1)).isoformat(),
+        }
+        first = self.client.post(reverse('event-list'), data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        retry = self.client.post(reverse('event-list'), data, format='json', HTTP_IDEMPOTENCY_KEY='create-1')
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.json()['id'] == first.json()['id']
+        assert Event.objects.filter(title='Once').count() == 1
+
+        changed = self.client.post(
+            reverse('event-list'), {**data, 'title': 'Twice'}, format='json', HTTP_IDEMPOTENCY_KEY='create-1'
+        )
+        assert changed.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert self.client.post(
+            reverse('event-list'), data, format='json', HTTP_IDEMPOTENCY_KEY='x' * 256
+        ).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_concurrent_duplicate_waits_for_the_first_response(self, settings):
+        import threading
+        from events_platform import idempotency
+        settings.IDEMPOTENCY_WAIT_SECONDS = 5
+        self.client.force_authenticate(user=self.seeker)
+        url = reverse('event-enroll', args=[self.event.pk])
+        request = RequestFactory().post(url, {}, content_type='application/json')
+        request.user = self.seeker
+        key = idempotency.cache_key(request, 'in-flight')
+        # The first attempt is still running...
+        cache.set(f'{key}:lock', 'other', 30)
+        finish = threading.Timer(0.2, lambda: cache.set(key, {
+            'fingerprint': idempotency.fingerprint(request), 'status': 201,
+            'data': {'id': 99, 'status': 'ENROLLED'}, 'headers': {},
+        }))
+        finish.start()
+        response = self.client.post(url, {}, format='json', HTTP_IDEMPOTENCY_KEY='in-flight')
+        finish.join()
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json() == {'id': 99, 'status': 'ENROLLED'} and response['Idempotent-Replayed'] == 'true'
+        assert not Enrollment.objects.exists()
+
+        settings.IDEMPOTENCY_WAIT_SECONDS = 0
+        cache.set(f'{idempotency.cache_key(request, "stuck")}:lock', 'other', 30)
+        stuck = self.client.post(url, HTTP_IDEMPOTENCY_KEY='stuck')
+        assert stuck.status_code == status.HTTP_409_CONFLICT and stuck['Retry-After'] == '1'
+
+
+@pytest.mark.django_db
+class TestBatchRequests:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        self.event = Event.objects.create(
+            title="Batched", description="Desc", language="English", location="Web", capacity=5,
+            starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=2),
+            created_by=self.facilitator
+        )
+        Enrollment.objects.create(event=self.event, seeker=self.seeker, status='ENROLLED')
+        token = RefreshToken.for_user(self.seeker).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def batch(self, *requests):
+        return self.client.post(reverse('batch'), {'requests': list(requests)}, format='json')
+
+    def test_sub_requests_share_one_authentication(self, monkeypatch):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+
+        decodes = []
+        get_validated_token = JWTAuthentication.get_validated_token
+        monkeypatch.setattr(JWTAuthentication, 'get_validated_token',
+                            lambda self, raw: decodes.append(raw) or get_validated_token(self, raw))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.batch(
+                {'id': 'upcoming', 'path': '/events/enrollments/upcoming/'},
+                {'id': 'past', 'path': '/events/enrollments/past/'},
+                {'path': '/events/events/?q=Batched'},
+            )
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()['responses']
+        assert [(item['id'], item['status']) for item in results] == [('upcoming', 200), ('past', 200), ('2', 200)]
+        assert [item['event_title'] for item in results[0]['body']['results']] == ['Batched']
+        assert results[2]['body']['results'][0]['id'] == self.event.pk
+        assert len(decodes) == 1
+        user_queries = [q['sql'] for q in queries.captured_queries if 'FROM "auth_user"' in q['sql']]
+        profile_queries = [q['sql'] for q in queries.captured_queries if 'FROM "users_profile"' in q['sql']]
+        assert len(user_queries) == 1 and len(profile_queries) == 1
+
+    def test_each_sub_request_keeps_its_own_status(self):
+        response = self.batch(
+            {'path': '/events/events/999999/'},
+            {'path': '/nowhere/'},
+            {'path': '/api/batch/'},
+            {'path': '/events/live/'},
+            {'path': f'/events/events/{self.event.pk}/'},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['status'] for item in response.json()['responses']] == [404, 404, 400, 400, 200]
+
+    def test_limits(self, settings):
+        settings.BATCH_MAX_REQUESTS = 2
+        path = {'path': '/events/enrollments/upcoming/'}
+        assert self.batch(path, path, path).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.batch({'method': 'POST', 'path': '/events/events/'}).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.batch().status_code == status.HTTP_400_BAD_REQUEST
+
+        # Out of time: nothing further is started
+        settings.BATCH_MAX_SECONDS = 0
+        response = self.batch(path, path)
+        assert [item['status'] for item in response.json()['responses']] == [504, 504]
+
+        self.client.credentials()
+        assert self.batch(path).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestProximitySearch:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.client.force_authenticate(user=self.facilitator)
+
+    def create(self, title, location, **coordinates):
+        return Event.objects.create(
+            title=title, description="Desc", language="English", location=location, capacity=5,
+            starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=2),
+            created_by=self.facilitator, **coordinates
+        )
+
+    def test_near_filters_by_radius_and_orders_by_distance(self):
+        from events import geo
+        pune = self.create("Pune", "Pune", latitude=18.5204, longitude=73.8567)
+        hinjewadi = self.create("Hinjewadi", "Hinjewadi", latitude=18.5913, longitude=73.7389)
+        self.create("Mumbai", "Mumbai", latitude=19.0760, longitude=72.8777)
+        self.create("Online", "Online")
+        assert pune.geohash == geo.encode(18.5204, 73.8567) and len(pune.geohash) == geo.GEOHASH_PRECISION
+
+        response = self.client.get(reverse('event-list'), {'near': '18.60,73.74', 'radius_km': 50})
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()['results']
+        assert [event['id'] for event in results] == [hinjewadi.pk, pune.pk]
+        assert results[0]['distance_km'] < 1 < results[1]['distance_km']
+        assert results[1]['distance_km'] == pytest.approx(geo.haversine_km(18.60, 73.74, 18.5204, 73.8567), abs=0.01)
+
+        # Default radius (25 km), and a radius that also reaches Mumbai (~120 km)
+        assert len(self.client.get(reverse('event-list'), {'near': '18.60,73.74'}).json()['results']) == 2
+        assert self.client.get(reverse('event-list'), {'near': '18.60,73.74', 'radius_km': 200}).json()['count'] == 3
+        # radius_km=0 is a radius, not the default
+        assert self.client.get(reverse('event-list'), {'near': '18.5204,73.8567', 'radius_km': 0}).json()['count'] == 1
+        # Without near=, no distance
+        assert self.client.get(reverse('event-list')).json()['results'][0]['distance_km'] is None
+
+    def test_geohash_ranges_cover_the_circle(self):
+        import math
+        import random
+        from events import geo
+        rng = random.Random(7)
+        for _ in range(500):
+            lat, lon = rng.uniform(-85, 85), rng.uniform(-180, 180)
+            radius = rng.choice([1, 10, 50, 300])
+            ranges = geo.prefix_ranges(geo.covering_cells(geo.bounding_boxes(lat, lon, radius)))
+            assert len(ranges) <= geo.MAX_CELLS
+            # A point on the circle's edge, in a random direction
+            bearing, delta = rng.uniform(0, 2 * math.pi), radius * 0.999 / geo.EARTH_RADIUS_KM
+            phi = math.radians(lat)
+            edge_lat = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(bearing))
+            edge_lon = math.radians(lon) + math.atan2(
+                math.sin(bearing) * math.sin(delta) * math.cos(phi), math.cos(delta) - math.sin(phi) * math.sin(edge_lat)
+            )
+            cell = geo.encode(math.degrees(edge_lat), (math.degrees(edge_lon) + 540) % 360 - 180)
+            assert any(low <= cell < high for low, high in ranges)
+
+    def test_coordinates_from_gazetteer_and_validation(self):
+        data = {
+            'title': 'Meetup', 'description': 'D', 'language': 'English', 'location': 'Pune, India',
+            'starts_at': (timezone.now() + timedelta(days=2)).isoformat(),
+            'ends_at': (timezone.now() + timedelta(days=2, hours=1)).isoformat(),
+        }
+        response = self.client.post(reverse('event-list'), data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert (response.json()['latitude'], response.json()['longitude']) == (18.5204, 73.8567)
+        assert Event.objects.get(pk=response.json()['id']).geohash.startswith('te')
+
+        # Explicit coordinates win; both or neither
+        response = self.client.post(reverse('event-list'), {**data, 'latitude': 10, 'longitude': 20}, format='json')
+        assert (response.json()['latitude'], response.json()['longitude']) == (10, 20)
+        assert self.client.post(reverse('event-list'), {**data, 'latitude': 10}, format='json').status_code == 400
+        assert self.client.post(reverse('event-list'), {**data, 'latitude': 91, 'longitude': 0},
+                                format='json').status_code == 400
+
+        unknown = self.client.post(reverse('event-list'), {**data, 'location': 'Somewhere'}, format='json').json()
+        assert unknown['latitude'] is None
+
+        for params in ({'near': 'pune'}, {'near': '100,0'}, {'near': '1,2', 'radius_km': -1},
+                       {'near': '1,2', 'radius_km': 100000}):
+            assert self.client.get(reverse('event-list'), params).status_code == 400
+
+    def test_geocode_events_backfills_coordinates(self):
+        event = self.create("Old", "Mumbai")
+        Event.objects.filter(pk=event.pk).update(latitude=None, longitude=None, geohash='')
+        call_command('geocode_events', stdout=open(os.devnull, 'w'))
+        event.refresh_from_db()
+        assert (event.latitude, event.longitude) == (19.0760, 72.8777) and event.geohash.startswith('te')
+
+
+@pytest.mark.django_db
+class TestFacets:
+    def setup_method(self):
+        cache.clear()
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.client.force_authenticate(user=self.facilitator)
+        self.url = reverse('event-facets')
+        self.start = timezone.now().replace(day=10, hour=12) + timedelta(days=40)
+        for language, location, months, coordinates in [
+            ('English', 'Pune', 0, (18.52, 73.85)),
+            ('English', 'Pune', 0, (18.53, 73.86)),
+            ('Hindi', 'Pune', 1, (18.52, 73.85)),
+            ('English', 'Mumbai', 1, (19.07, 72.87)),
+        ]:
+            self.create(language, location, self.start + timedelta(days=31 * months), coordinates)
+
+    def create(self, language, location, starts_at, coordinates=(None, None)):
+        return Event.objects.create(
+            title="Faceted", description="Desc", language=language, location=location, capacity=5,
+            starts_at=starts_at, ends_at=starts_at + timedelta(hours=2), created_by=self.facilitator,
+            latitude=coordinates[0], longitude=coordinates[1],
+        )
+
+    def test_counts_follow_the_filters(self):
+        first, second = f'{self.start:%Y-%m}', f'{self.start + timedelta(days=31):%Y-%m}'
+        data = self.client.get(self.url).json()
+        assert data == {
+            'total': 4,
+            'language': [{'value': 'English', 'count': 3}, {'value': 'Hindi', 'count': 1}],
+            'location': [{'value': 'Pune', 'count': 3}, {'value': 'Mumbai', 'count': 1}],
+            'month': [{'value': first, 'count': 2}, {'value': second, 'count': 2}],
+        }
+        data = self.client.get(self.url, {'location': 'Pune'}).json()
+        assert data['total'] == 3 and data['language'] == [{'value': 'English', 'count': 2}, {'value': 'Hindi', 'count': 1}]
+        data = self.client.get(self.url, {'near': '18.52,73.85', 'radius_km': 10}).json()
+        assert data['location'] == [{'value': 'Pune', 'count': 3}]
+
+    def test_cached_per_filter_and_invalidated_by_event_changes(self, django_assert_num_queries):
+        with django_assert_num_queries(3):  # one grouped aggregate per facet
+            self.client.get(self.url, {'language': 'English', 'page': 2})
+        # Same filters, however spelled: served from the cache
+        with django_assert_num_queries(0):
+            assert self.client.get(self.url, {'page': 1, 'language': ' English'}).json()['total'] == 3
+        with django_assert_num_queries(3):
+            self.client.get(self.url, {'language': 'Hindi'})
+
+        event = self.create('English', 'Delhi', self.start)
+        assert self.client.get(self.url, {'language': 'English'}).json()['total'] == 4
+        event.delete()
+        assert self.client.get(self.url, {'language': 'English'}).json()['total'] == 3
+
+
+@pytest.mark.django_db
+class TestAutocomplete:
+    def setup_method(self):
+        from events.autocomplete import autocomplete
+        cache.clear()
+        autocomplete.reset()
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.client.force_authenticate(user=self.facilitator)
+        self.url = reverse('event-autocomplete')
+
+    def create(self, title, location):
+        return Event.objects.create(
+            title=title, description="Desc", language="English", location=location, capacity=5,
+            starts_at=timezone.now() + timedelta(days=1), ends_at=timezone.now() + timedelta(days=1, hours=2),
+            created_by=self.facilitator
+        )
+
+    def suggest(self, q, **params):
+        return [(item['kind'], item['text'], item['count'])
+                for item in self.client.get(self.url, {'q': q, **params}).json()['results']]
+
+    def test_prefix_matches_from_the_index(self, django_assert_num_queries):
+        self.create("Django Workshop", "Pune")
+        self.create("Django Meetup", "Pune")
+        self.create("Café Crème", "Paris")
+        assert self.suggest('dj') == [('title', 'Django Meetup', 1), ('title', 'Django Workshop', 1)]
+        with django_assert_num_queries(0):
+            # Word starts, accents and case are normalized
+            assert self.suggest('WORK') == [('title', 'Django Workshop', 1)]
+            assert self.suggest('creme') == [('title', 'Café Crème', 1)]
+            assert self.suggest('p') == [('location', 'Pune', 2), ('location', 'Paris', 1)]
+            assert self.suggest('p', kind='title') == []
+            assert self.suggest('') == [] and self.suggest('zz') == []
+
+    def test_kept_fresh_by_event_changes(self, settings, django_capture_on_commit_callbacks):
+        event = self.create("Yoga Basics", "Goa")
+        assert self.suggest('yoga') == [('title', 'Yoga Basics', 1)]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            event.title = "Yoga Advanced"
+            event.save()
+            self.create("Yoga Basics", "Goa")
+        assert self.suggest('yoga') == [('title', 'Yoga Advanced', 1), ('title', 'Yoga Basics', 1)]
+        assert self.suggest('goa') == [('location', 'Goa', 2)]
+
+        # Soft delete (as the API does) and hard delete
+        with django_capture_on_commit_callbacks(execute=True):
+            self.client.delete(reverse('event-detail', args=[event.pk]))
+        assert self.suggest('yoga') == [('title', 'Yoga Basics', 1)]
+        with django_capture_on_commit_callbacks(execute=True):
+            Event.objects.filter(title="Yoga Basics").delete()
+        assert self.suggest('yoga') == []
+
+    def test_changes_elsewhere_trigger_a_rebuild(self, settings, monkeypatch):
+        from events import autocomplete as module
+        self.create("Pottery", "Delhi")
+        assert self.suggest('pot') == [('title', 'Pottery', 1)]
+        # Another process changed events: this one's version is now behind
+        cache.incr(module.VERSION_KEY)
+        Event.objects.filter(title="Pottery").update(title="Painting")
+        monkeypatch.setattr(module.Autocomplete, 'rebuild_in_background', module.Autocomplete.build)
+        settings.AUTOCOMPLETE_CHECK_SECONDS = 0
+        assert self.suggest('pa') == [('title', 'Painting', 1)]
+
+    def test_rebuilt_on_a_timer_without_a_shared_cache(self, settings, monkeypatch):
+        from events import autocomplete as module
+        self.create("Pottery", "Delhi")
+        assert self.suggest('pot') == [('title', 'Pottery', 1)]
+        # Changed by another process whose version counter this one can't see
+        Event.objects.filter(title="Pottery").update(title="Painting")
+        monkeypatch.setattr(module.Autocomplete, 'rebuild_in_background', module.Autocomplete.build)
+        settings.AUTOCOMPLETE_CHECK_SECONDS = 0
+        settings.AUTOCOMPLETE_REBUILD_SECONDS = 60
+        assert self.suggest('pa') == []
+        module.autocomplete.built_at -= 61
+        assert self.suggest('pa') == [('title', 'Painting', 1)]
+        settings.AUTOCOMPLETE_REBUILD_SECONDS = 0  # never, with a shared cache
+        Event.objects.filter(title="Painting").update(title="Pottery")
+        module.autocomplete.built_at -= 61
+        assert self.suggest('pa') == [('title', 'Painting', 1)]
+
+    def test_memory_bound(self):
+        from events.autocomplete import PrefixIndex
+        index = PrefixIndex.build([(f"Event {i}", "Pune") for i in range(10)], max_suggestions=5)
+        assert len(index.suggestions) == 5 and index.suggestions['location', 'Pune'].count == 10
+        index.add("One more", "Mumbai")
+        assert ('title', 'One more') not in index.suggestions
+        index.remove("Event 0", "Pune")
+        assert index.search('event', limit=20) == [('title', f'Event {i}', 1) for i in (1, 2, 3)]
+
+
+@pytest.mark.django_db
+class TestEventSeries:
+    def setup_method(self):
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.seeker = User.objects.create_user(username='s', email='s@t.com', password='p')
+        Profile.objects.create(user=self.seeker, role='SEEKER', is_verified=True)
+        # Weekly from tomorrow 18:00: with a 14 day horizon the first two are stored
+        self.base = (timezone.now() + timedelta(days=1)).replace(hour=18, minute=0, second=0, microsecond=0)
+        self.client.force_authenticate(user=self.facilitator)
+        response = self.client.post(reverse('series-list'), {
+            'title': "Weekly Yoga", 'description': "Desc", 'language': 'English', 'location': 'Goa',
+            'capacity': 5, 'starts_at': self.base.isoformat(), 'ends_at': (self.base + timedelta(hours=1)).isoformat(),
+            'rule': 'FREQ=WEEKLY;COUNT=10',
+        })
+        assert response.status_code == status.HTTP_201_CREATED, response.content
+        self.series = EventSeries.objects.get()
+        for days, location in [(2, 'Pune'), (20, 'Pune'), (200, 'Goa')]:
+            Event.objects.create(
+                title="One-off", description="Desc", language='English', location=location, capacity=5,
+                starts_at=self.base + timedelta(days=days), ends_at=self.base + timedelta(days=days, hours=1),
+                created_by=self.facilitator,
+            )
+
+    def listing(self, **params):
+        results, page = [], 1
+        while True:
+            data = self.client.get(reverse('event-list'), {**params, 'page': page}).json()
+            results += data['results']
+            if not data['next']:
+                return data['count'], results
+            page += 1
+
+    def test_creation_stores_occurrences_within_the_horizon(self):
+        stored = Event.objects.filter(series=self.series).order_by('starts_at')
+        assert [event.occurrence_start for event in stored] == [self.base, self.base + timedelta(days=7)]
+        assert stored[0].title == "Weekly Yoga" and stored[0].ends_at == self.base + timedelta(hours=1)
+        assert self.series.last_starts_at == self.base + timedelta(weeks=9)
+
+        bad = {**self.client.get(reverse('series-detail', args=[self.series.pk])).json(), 'rule': 'FREQ=HOURLY'}
+        response = self.client.post(reverse('series-list'), bad)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST and 'rule' in response.json()
+
+    def test_list_merges_stored_events_and_occurrences(self):
+        count, results = self.listing()
+        assert count == 13 and len(results) == 13  # 2 stored + 8 expanded occurrences, 3 one-off events
+        starts = [item['starts_at'] for item in results]
+        assert starts == sorted(starts)
+        expanded = [item for item in results if item['id'] is None]
+        assert len(expanded) == 8 and all(item['series'] == self.series.pk for item in expanded)
+        assert expanded[0]['occurrence_start'] == expanded[0]['starts_at']
+        assert expanded[0]['available_seats'] == 5 and expanded[0]['title'] == "Weekly Yoga"
+
+        _, descending = self.listing(ordering='-starts_at')
+        assert descending == results[::-1]
+        count, results = self.listing(location='Goa', starts_before=(self.base + timedelta(days=30)).isoformat())
+        assert count == 5 and {item['series'] for item in results} == {self.series.pk}
+        count, _ = self.listing(q='one-off')
+        assert count == 3
+        # radius_km=0 is a radius, not the default: nothing 1 km from Goa
+        near = f'{self.series.latitude + 0.01},{self.series.longitude}'
+        assert self.listing(near=near)[0] == 10
+        assert self.listing(near=near, radius_km=0)[0] == 0
+
+    def test_enrolling_stores_the_occurrence(self):
+        occurrence = self.base + timedelta(weeks=4)
+        self.client.force_authenticate(user=self.seeker)
+        url = reverse('series-enroll', args=[self.series.pk])
+        response = self.client.post(url, {'starts_at': (occurrence + timedelta(hours=1)).isoformat()})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = self.client.post(url, {'starts_at': occurrence.isoformat()})
+        assert response.status_code == status.HTTP_201_CREATED
+        event = Event.objects.get(series=self.series, occurrence_start=occurrence)
+        assert response.json()['event'] == event.pk and event.enrolled_count == 1
+
+        count, results = self.listing()
+        assert count == 13
+        listed = next(item for item in results if item['occurrence_start'] == response.json()['event_starts_at'])
+        assert listed['id'] == event.pk and listed['is_enrolled'] and listed['available_seats'] == 4
+
+    def test_deleted_occurrences_stay_deleted(self):
+        from events.tasks import materialize_series
+        event = series_events.materialize(self.series, self.base + timedelta(weeks=5))
+        assert self.client.delete(reverse('event-detail', args=[event.pk])).status_code == 204
+        assert self.listing()[0] == 12
+
+        assert materialize_series(horizon_days=60) == {'series': 1, 'events_created': 6}
+        assert not Event.objects.filter(occurrence_start=event.occurrence_start).exists()
+        assert self.listing()[0] == 12
+        self.series.refresh_from_db()
+        assert not self.series.is_occurrence(event.occurrence_start)
+
+    def test_edits_reach_stored_occurrences_but_not_the_schedule(self):
+        url = reverse('series-detail', args=[self.series.pk])
+        assert self.client.patch(url, {'title': "Sunset Yoga"}).status_code == 200
+        assert set(Event.objects.filter(series=self.series).values_list('title', flat=True)) == {"Sunset Yoga"}
+        response = self.client.patch(url, {'rule': 'FREQ=DAILY'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST and 'rule' in response.json()
+
+    def test_wall_clock_time_kept_across_daylight_saving(self):
+        from datetime import datetime, timezone as dt_timezone
+        from events import recurrence
+        first = datetime(2026, 10, 13, 16, 0, tzinfo=dt_timezone.utc)  # 18:00 in Berlin (CEST)
+        starts = list(recurrence.occurrences(
+            'FREQ=WEEKLY;COUNT=4', first, 'Europe/Berlin', first, first + timedelta(days=60), excluded={
+                recurrence.key(first + timedelta(weeks=1)),
+            }
+        ))
+        assert [start.hour for start in starts] == [16, 17, 17]  # CET from October 25th
+
+
+@pytest.mark.django_db
+class TestSeatHolds:
+    def setup_method(self):
+        self.client = APIClient()
+        facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=facilitator, role='FACILITATOR', is_verified=True)
+        self.seekers = []
+        for i in range(3):
+            seeker = User.objects.create_user(username=f's{i}', email=f's{i}@t.com', password='p')
+            Profile.objects.create(user=seeker, role='SEEKER', is_verified=True)
+            self.seekers.append(seeker)
+        self.event = Event.objects.create(
+            title="Paid Class", description="Desc", language="English", location="Pune", capacity=2,
+            starts_at=timezone.now() + timedelta(days=3), ends_at=timezone.now() + timedelta(days=3, hours=2),
+            created_by=facilitator,
+        )
+        self.hold_url = reverse('event-hold', args=[self.event.pk])
+
+    def hold(self, seeker, **data):
+        self.client.force_authenticate(user=seeker)
+        return self.client.post(self.hold_url, data)
+
+    def seats(self):
+        listed = self.client.get(reverse('event-list')).json()['results'][0]['available_seats']
+        assert self.client.get(reverse('event-detail', args=[self.event.pk])).json()['available_seats'] == listed
+        return listed
+
+    def test_holds_count_toward_capacity_until_confirmed(self):
+        response = self.hold(self.seekers[0], minutes=5)
+        assert response.status_code == status.HTTP_201_CREATED
+        hold = response.json()
+        assert 4 * 60 < (timezone.datetime.fromisoformat(hold['expires_at']) - timezone.now()).total_seconds() <= 5 * 60
+        assert self.seats() == 1
+        assert self.hold(self.seekers[0]).json() == ["You already hold a seat for this event."]
+        assert self.hold(self.seekers[0], minutes=999).status_code == status.HTTP_400_BAD_REQUEST
+
+        assert self.hold(self.seekers[1]).status_code == status.HTTP_201_CREATED
+        assert self.seats() == 0
+        # Full: no hold and no enrollment for anyone else, but the holders still get in
+        assert self.hold(self.seekers[2]).json() == ["Event is full."]
+        assert self.client.post(reverse('event-enroll', args=[self.event.pk])).status_code == 400
+
+        self.client.force_authenticate(user=self.seekers[0])
+        assert [item['id'] for item in self.client.get(reverse('hold-list')).json()['results']] == [hold['id']]
+        response = self.client.post(reverse('hold-confirm', args=[hold['id']]))
+        assert response.status_code == status.HTTP_201_CREATED and response.json()['status'] == 'ENROLLED'
+        assert not SeatHold.objects.filter(seeker=self.seekers[0]).exists()
+        assert self.seats() == 0
+        # Enrolling directly converts a hold too
+        self.client.force_authenticate(user=self.seekers[1])
+        assert self.client.post(reverse('event-enroll', args=[self.event.pk])).status_code == 201
+        assert not SeatHold.objects.exists() and self.event.enrolled_count == 2
+
+    def test_release_and_expiry(self):
+        first = self.hold(self.seekers[0]).json()
+        self.client.force_authenticate(user=self.seekers[0])
+        assert self.client.delete(reverse('hold-detail', args=[first['id']])).status_code == 204
+        assert self.seats() == 2
+
+        holds = [self.hold(seeker).json() for seeker in self.seekers[:2]]
+        SeatHold.objects.filter(seeker=self.seekers[0]).update(expires_at=timezone.now() - timedelta(seconds=1))
+        # An expired hold stops counting at once, before any sweep
+        assert self.seats() == 1
+        self.client.force_authenticate(user=self.seekers[0])
+        assert self.client.post(reverse('hold-confirm', args=[holds[0]['id']])).status_code == status.HTTP_410_GONE
+        assert self.client.get(reverse('hold-list')).json()['results'] == []
+        assert self.hold(self.seekers[2]).status_code == status.HTTP_201_CREATED
+        assert self.hold(self.seekers[0]).json() == ["Event is full."]
+
+    def test_sweeper_deletes_expired_holds_in_batches(self):
+        from events.models import OutboxEntry
+        from events.tasks import expire_seat_holds
+        for seeker in self.seekers[:2]:
+            self.hold(seeker)
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        released = OutboxEntry.objects.filter(kind='hold.released')
+        assert expire_seat_holds(batch_size=1) == {'holds_expired': 2, 'events': 2, 'batches': 2}
+        assert not SeatHold.objects.exists()
+        assert released.count() == 2 and released.last().payload['available_seats'] == 2
+        assert expire_seat_holds() == {'holds_expired': 0, 'events': 0, 'batches': 0}
+
+
+@pytest.mark.django_db
+class TestCheckIn:
+    def setup_method(self):
+        cache.clear()
+        self.client = APIClient()
+        self.facilitator = User.objects.create_user(username='f', email='f@t.com', password='p')
+        Profile.objects.create(user=self.facilitator, role='FACILITATOR', is_verified=True)
+        self.other = User.objects.create_user(username='o', email='o@t.com', password='p')
+        Profile.objects.create(user=self.other, role='FACILITATOR', is_verified=True)
+        self.event = Event.objects.create(
+            title="Conference", description="Desc", language="English", location="Pune", capacity=10,
+            starts_at=timezone.now() + timedelta(hours=1), ends_at=timezone.now() + timedelta(hours=8),
+            created_by=self.facilitator,
+        )
+        self.tokens = []
+        for i in range(3):
+            seeker = User.objects.create_user(username=f's{i}', email=f's{i}@t.com', password='p')
+            Profile.objects.create(user=seeker, role='SEEKER', is_verified=True)
+            self.client.force_authenticate(user=seeker)
+            self.tokens.append(self.client.post(reverse('event-enroll', args=[self.event.pk])).json()['checkin_token'])
+
+    def teardown_method(self):
+        checkin.attendance_writer.take()
+
+    def scan(self, token, user=None):
+        self.client.force_authenticate(user=user or self.facilitator)
+        return self.client.post(reverse('check-in-list'), {'token': token}, format='json')
+
+    def test_scan_verifies_the_token_alone_and_buffers_attendance(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        enrollment = Enrollment.objects.get(seeker__username='s0')
+        self.client.force_authenticate(user=enrollment.seeker)
+        listed = self.client.get(reverse('enrollment-upcoming')).json()['results'][0]
+        assert listed['checkin_token'] == self.tokens[0] and len(self.tokens[0]) < 40
+
+        self.scan(self.tokens[1])  # warms the event owner cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.scan(self.tokens[0])
+        assert response.status_code == 200
+        assert response.json()['status'] == 'checked_in' and response.json()['enrollment'] == enrollment.pk
+        assert not any('events_' in query['sql'] for query in queries.captured_queries)
+        assert not Attendance.objects.exists()
+        assert self.scan(self.tokens[0]).json()['status'] == 'already_checked_in'
+
+        assert sorted(checkin.attendance_writer.flush()['created']) == sorted(
+            Enrollment.objects.filter(seeker__username__in=['s0', 's1']).values_list('pk', flat=True)
+        )
+        attendance = Attendance.objects.get(enrollment=enrollment)
+        assert attendance.source == 'SCAN' and attendance.checked_in_by == self.facilitator
+
+    def test_scans_survive_a_lost_buffer_and_a_failed_flush(self, settings, monkeypatch):
+        assert self.scan(self.tokens[0]).json()['status'] == 'checked_in'
+        checkin.attendance_writer.take()  # the process died before flushing
+        # The rescan reports the first scan and queues its row again
+        assert self.scan(self.tokens[0]).json()['status'] == 'already_checked_in'
+        assert checkin.attendance_writer.flush()['created'] == [Enrollment.objects.get(seeker__username='s0').pk]
+
+        settings.CHECKIN_BUFFER_SIZE = 1
+        write_attendance = checkin.write_attendance
+        monkeypatch.setattr(checkin, 'write_attendance', lambda rows: 1 / 0)
+        assert self.scan(self.tokens[1]).status_code == 200
+        # Still pending, with its retry scheduled
+        assert len(checkin.attendance_writer) == 1 and checkin.attendance_writer._timer is not None
+        monkeypatch.setattr(checkin, 'write_attendance', write_attendance)
+        checkin.attendance_writer.flush()
+        assert Attendance.objects.count() == 2
+
+    def test_rejects_bad_expired_and_foreign_tokens(self, settings):
+        enrollment_id, event_id, _, signature = self.tokens[0].split('.')
+        tampered = '.'.join([enrollment_id, 'zz', _, signature])
+        assert self.scan(tampered).json() == {"error": "Invalid check-in token."}
+        assert self.scan('not-a-token').status_code == 400
+        expired = checkin.token_for(int(enrollment_id, 36), self.event.pk, timezone.now() - timedelta(days=1))
+        assert self.scan(expired).json() == {"error": "This check-in token has expired."}
+        assert self.scan(self.tokens[0], user=self.other).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_canceled_tickets_are_refused(self, settings, django_capture_on_commit_callbacks):
+        enrollment = Enrollment.objects.get(seeker__username='s0')
+        self.client.force_authenticate(user=enrollment.seeker)
+        with django_capture_on_commit_callbacks(execute=True):
+            self.client.delete(reverse('event-cancel-enrollment', args=[self.event.pk]))
+        assert self.scan(self.tokens[0]).json() == {"error": "This enrollment was canceled."}
+        assert not len(checkin.attendance_writer)
+
+        # Re-enrolling keeps the enrollment, and its token works again
+        self.client.force_authenticate(user=enrollment.seeker)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.post(reverse('event-enroll', args=[self.event.pk]))
+        assert response.json()['checkin_token'] == self.tokens[0]
+        assert self.scan(self.tokens[0]).json()['status'] == 'checked_in'
+
+        # Canceled other than through the API: it scans, but is dropped when written
+        checkin.attendance_writer.take()
+        settings.CHECKIN_BUFFER_SIZE = 1
+        Enrollment.objects.filter(seeker__username='s1').update(status='CANCELED')
+        assert self.scan(self.tokens[1]).status_code == 200
+        assert not Attendance.objects.exists()
+
+    def test_offline_sync_writes_each_scan_at_its_time(self):
+        scanned_at = timezone.now() - timedelta(minutes=30)
+        scans = [
+            {'token': self.tokens[0], 'scanned_at': (scanned_at + timedelta(minutes=5)).isoformat()},
+            {'token': self.tokens[0], 'scanned_at': scanned_at.isoformat()},
+            {'token': self.tokens[1]},
+            {'token': 'garbage'},
+            {'token': self.tokens[2], 'scanned_at': 'yesterday'},
+        ]
+        self.client.force_authenticate(user=self.facilitator)
+        response = self.client.post(reverse('check-in-sync'), {'scans': scans}, format='json')
+        assert response.status_code == 200
+        assert response.json() == {
+            'checked_in': 2, 'already_checked_in': 1,
+            'rejected': [{'index': 3, 'error': "Invalid check-in token."}, {'index': 4, 'error': "Invalid scanned_at."}],
+        }
+        first = Attendance.objects.get(enrollment__seeker__username='s0')
+        assert first.checked_in_at == scanned_at and first.source == 'SYNC'
+        # The door sees synced tickets as used, and a second upload changes nothing
+        assert self.scan(self.tokens[1]).json()['status'] == 'already_checked_in'
+        again = self.client.post(reverse('check-in-sync'), {'scans': scans[:3]}, format='json').json()
+        assert again == {'checked_in': 0, 'already_checked_in': 3, 'rejected': []}
+        assert Attendance.objects.count() == 2
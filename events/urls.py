@@ -1,11 +1,31 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet, EnrollmentViewSet
+from .views import CheckInViewSet, EventViewSet, EventSeriesViewSet, EnrollmentViewSet, SeatHoldViewSet
+from .async_views import (
+    AsyncEventListView, AsyncEventDetailView,
+    AsyncUpcomingEnrollmentsView, AsyncPastEnrollmentsView,
+    LiveUpdatesView, LivePollView,
+)
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet, basename='event')
+router.register(r'series', EventSeriesViewSet, basename='series')
 router.register(r'enrollments', EnrollmentViewSet, basename='enrollment')
+router.register(r'holds', SeatHoldViewSet, basename='hold')
+router.register(r'check-in', CheckInViewSet, basename='check-in')
+
+# Async read endpoints (same payloads as the viewset actions), best served under ASGI
+async_urlpatterns = [
+    path('events/', AsyncEventListView.as_view(), name='async-event-list'),
+    path('events/<int:pk>/', AsyncEventDetailView.as_view(), name='async-event-detail'),
+    path('enrollments/upcoming/', AsyncUpcomingEnrollmentsView.as_view(), name='async-enrollment-upcoming'),
+    path('enrollments/past/', AsyncPastEnrollmentsView.as_view(), name='async-enrollment-past'),
+]
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/', include(async_urlpatterns)),
+    # Live seat counts and event changes (events/live.py)
+    path('live/', LiveUpdatesView.as_view(), name='live-updates'),
+    path('live/poll/', LivePollView.as_view(), name='live-poll'),
 ]
@@ -1,66 +1,209 @@
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework import mixins, viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
-from .models import Event, Enrollment
-from .serializers import EventSerializer, EnrollmentSerializer
+from .models import Event, EventSeries, Enrollment, SeatHold
+from .serializers import (
+    EventSerializer, EventSeriesSerializer, EnrollmentSerializer, OccurrenceSerializer, SeatHoldSerializer,
+    event_rows, enrollment_rows, requested_fields,
+)
 from .permissions import IsFacilitator, IsSeeker, IsEventOwner
 from .filters import EventFilter
-from .tasks import send_followup_email
+from .archive import past_enrollments
+from . import checkin, facets as event_facets, live, series as event_series
+from .autocomplete import autocomplete as event_autocomplete
+from .tasks import purge_deleted_event, send_followup_email
+from events_platform.idempotency import idempotent
+from events_platform.metrics import ENROLLMENT_ACTIONS
 
-class EventViewSet(viewsets.ModelViewSet):
+MODEL_COLUMNS = {
+    model: {field.name for field in model._meta.concrete_fields} for model in (Event, Enrollment)
+}
+
+
+def event_queryset_for(queryset, user, fields=None):
+    """
+    Shape an Event queryset for the serializer fields requested (None = all):
+    only the enrollment annotations and columns those fields need
+    """
+    def wants(*names):
+        return fields is None or any(name in fields for name in names)
+
+    counts = wants('enrolled_count', 'available_seats')
+    if counts or wants('is_enrolled'):
+        queryset = queryset.with_enrollment_stats(user if wants('is_enrolled') else None, counts=counts)
+    if wants('created_by_email'):
+        queryset = queryset.select_related('created_by')
+    if fields is not None:
+        columns = {'id', *(name for name in fields if name in MODEL_COLUMNS[Event])}
+        if 'available_seats' in fields:
+            columns.add('capacity')
+        if 'created_by_email' in fields:
+            columns.add('created_by__email')
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+def enrollment_queryset_for(queryset, fields=None):
+    """Enrollment counterpart of event_queryset_for"""
+    if fields is None or {'event_title', 'event_starts_at', 'checkin_token'} & set(fields):
+        queryset = queryset.select_related('event')
+    if fields is not None:
+        columns = {'id', *(name for name in fields if name in MODEL_COLUMNS[Enrollment])}
+        columns.update(f'event__{name[6:]}' for name in fields if name in ('event_title', 'event_starts_at'))
+        if 'checkin_token' in fields:
+            columns.update(('event', 'status', 'event__ends_at'))
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+def enroll_seeker(request, event):
+    """Enroll the requesting seeker in `event` (EventViewSet.enroll, EventSeriesViewSet.enroll)"""
+    serializer = EnrollmentSerializer(data={'event': event.id}, context={'request': request})
+    if serializer.is_valid():
+        with transaction.atomic():
+            enrollment = serializer.save()
+            live.record('enrollment.created', event)
+        ENROLLMENT_ACTIONS.labels('enroll').inc()
+        # Bonus: Send follow-up email 1 hour later
+        # We assume enrollment object was returned.
+        # If it was an existing enrollment updated, we might not want to re-send?
+        # Serializer create updates status if re-enrolling.
+        # Let's send it anyway or check created_at? 
+        # Simple approach: schedule it.
+        send_followup_email.apply_async(
+            args=[request.user.email, event.title],
+            countdown=3600 # 1 hour
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RowListMixin:
+    """List responses built from .values() rows (see RowSerializer) instead of model instances"""
+
+    def list_rows(self, queryset, rows):
+        rows = rows.subset(requested_fields(self.request, rows.serializer_class))
+        return self.paginate_rows(rows.values(queryset), rows)
+
+    def paginate_rows(self, values, rows):
+        page = self.paginate_queryset(values)
+        if page is not None:
+            return self.get_paginated_response(rows.serialize(page))
+        return Response(rows.serialize(values))
+
+
+class EventViewSet(RowListMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all().order_by('starts_at') # Default ordering 'upcoming first' (closest start time)
     serializer_class = EventSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = EventFilter
     ordering_fields = ['starts_at', 'created_at']
 
+    def get_queryset(self):
+        fields = requested_fields(self.request, EventSerializer)
+        return event_queryset_for(super().get_queryset(), self.request.user, fields)
+
     def get_permissions(self):
         if self.action in ['create']:
             permission_classes = [permissions.IsAuthenticated, IsFacilitator]
         elif self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [permissions.IsAuthenticated, IsFacilitator, IsEventOwner]
+        elif self.action == 'hold':
+            permission_classes = [permissions.IsAuthenticated, IsSeeker]
         else: # list, retrieve
             permission_classes = [permissions.IsAuthenticated] # Seekers and Facilitators can view
         return [permission() for permission in permission_classes]
 
+    def list(self, request, *args, **kwargs):
+        # Stored events, and the occurrences of recurring series not stored yet (events/series.py)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = event_rows.subset(requested_fields(request, EventSerializer))
+        return self.paginate_rows(event_series.with_occurrences(queryset, request, rows), rows)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def perform_update(self, serializer):
+        before = {name: getattr(serializer.instance, name) for name in serializer.validated_data}
+        with transaction.atomic():
+            event = serializer.save()
+            changed = [name for name, value in before.items() if getattr(event, name) != value]
+            if changed:
+                live.record('event.updated', event, changed=changed)
+
+    def perform_destroy(self, instance):
+        # Soft delete so the request returns at once; enrollments are deleted
+        # in batches and attendees notified by a background task
+        with transaction.atomic():
+            instance.deleted_at = timezone.now()
+            instance.save(update_fields=['deleted_at'])
+            if instance.series_id:
+                event_series.exclude(instance)
+            live.record('event.deleted', instance)
+        transaction.on_commit(lambda: purge_deleted_event.delay(instance.pk))
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsFacilitator])
     def my_events(self, request):
         # Facilitator: List my events with counts
-        events = Event.objects.filter(created_by=request.user)
+        events = self.get_queryset().filter(created_by=request.user)
         # Counts are properties in model/serializer (available_seats), or can annotate
         # Model has available_seats property. Total enrollments needed?
         # Serializer doesn't have total_enrollments field. Let's add it dynamically or just use the model property if we added one.
         # Simplest: use standard serializer which has available_seats, and maybe update serializer to include 'total_enrollments'
-        
-        page = self.paginate_queryset(events)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        return self.list_rows(events, event_rows)
 
-        serializer = self.get_serializer(events, many=True)
-        return Response(serializer.data)
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        # Counts per language, location and start month for the list's filter params
+        key = event_facets.cache_key(request.query_params)
+        data = cache.get(key)
+        if data is None:
+            data = event_facets.facet_counts(self.filter_queryset(Event.objects.all()))
+            cache.set(key, data, settings.FACETS_CACHE_SECONDS)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        # Title and location suggestions for ?q=, from the in-memory index (no database query)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 20))
+        except ValueError:
+            limit = 10
+        kind = request.query_params.get('kind')
+        if kind not in (None, 'title', 'location'):
+            return Response({'kind': "Must be 'title' or 'location'."}, status=status.HTTP_400_BAD_REQUEST)
+        matches = event_autocomplete.get_index().search(request.query_params.get('q', ''), limit, kind)
+        return Response({'results': [
+            {'kind': match_kind, 'text': text, 'count': count} for match_kind, text, count in matches
+        ]})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsSeeker])
+    @idempotent
     def enroll(self, request, pk=None):
+        return enroll_seeker(request, self.get_object())
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsSeeker])
+    @idempotent
+    def hold(self, request, pk=None):
+        """Keep a seat for the seeker for `minutes` (default SEAT_HOLD_MINUTES) while they check out"""
         event = self.get_object()
-        serializer = EnrollmentSerializer(data={'event': event.id}, context={'request': request})
+        data = {'event': event.id}
+        if 'minutes' in request.data:
+            data['minutes'] = request.data['minutes']
+        serializer = SeatHoldSerializer(data=data, context={'request': request})
         if serializer.is_valid():
-            enrollment = serializer.save()
-            # Bonus: Send follow-up email 1 hour later
-            # We assume enrollment object was returned.
-            # If it was an existing enrollment updated, we might not want to re-send?
-            # Serializer create updates status if re-enrolling.
-            # Let's send it anyway or check created_at? 
-            # Simple approach: schedule it.
-            send_followup_email.apply_async(
-                args=[request.user.email, event.title],
-                countdown=3600 # 1 hour
-            )
+            with transaction.atomic():
+                serializer.save()
+                live.record('hold.created', event)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -70,31 +213,147 @@ class EventViewSet(viewsets.ModelViewSet):
         event = self.get_object()
         try:
             enrollment = Enrollment.objects.get(event=event, seeker=request.user, status='ENROLLED')
-            enrollment.status = 'CANCELED'
-            enrollment.save()
+            with transaction.atomic():
+                enrollment.status = 'CANCELED'
+                enrollment.save()
+                live.record('enrollment.canceled', event)
+                transaction.on_commit(lambda: checkin.revoke(enrollment.pk, event.ends_at))
+            ENROLLMENT_ACTIONS.labels('cancel').inc()
             return Response({"message": "Enrollment canceled successfully."}, status=status.HTTP_200_OK)
         except Enrollment.DoesNotExist:
             return Response({"error": "You are not enrolled in this event."}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class EnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
+class EventSeriesViewSet(viewsets.ModelViewSet):
+    queryset = EventSeries.objects.select_related('created_by').order_by('starts_at')
+    serializer_class = EventSeriesSerializer
+
+    def get_permissions(self):
+        if self.action in ['create']:
+            permission_classes = [permissions.IsAuthenticated, IsFacilitator]
+        elif self.action in ['update', 'partial_update', 'destroy']:
+            permission_classes = [permissions.IsAuthenticated, IsFacilitator, IsEventOwner]
+        elif self.action == 'enroll':
+            permission_classes = [permissions.IsAuthenticated, IsSeeker]
+        else:
+            permission_classes = [permissions.IsAuthenticated]
+        return [permission() for permission in permission_classes]
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            series = serializer.save(created_by=self.request.user)
+            event_series.materialize_horizon(series.pk, event_series.horizon())
+
+    def perform_update(self, serializer):
+        before = {name: getattr(serializer.instance, name) for name in serializer.validated_data}
+        with transaction.atomic():
+            series = serializer.save()
+            event_series.update_occurrences(
+                series, [name for name, value in before.items() if getattr(series, name) != value]
+            )
+
+    # Deleting a series ends it: stored occurrences stay, as standalone events
+
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def enroll(self, request, pk=None):
+        """Enroll in the occurrence starting at `starts_at`, storing it as an event if it isn't yet"""
+        series = self.get_object()
+        occurrence = OccurrenceSerializer(data=request.data)
+        occurrence.is_valid(raise_exception=True)
+        starts_at = occurrence.validated_data['starts_at']
+        if not series.is_occurrence(starts_at):
+            return Response({"starts_at": ["Not an occurrence of this series."]}, status=status.HTTP_400_BAD_REQUEST)
+        return enroll_seeker(request, event_series.materialize(series, starts_at))
+
+
+class SeatHoldViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                      viewsets.GenericViewSet):
+    """The seeker's seat holds: list the unexpired ones, confirm one into an enrollment, or release it"""
+    serializer_class = SeatHoldSerializer
+    permission_classes = [permissions.IsAuthenticated, IsSeeker]
+
+    def get_queryset(self):
+        holds = SeatHold.objects.filter(seeker=self.request.user).select_related('event').order_by('expires_at')
+        if self.action == 'list':
+            holds = holds.active()
+        return holds
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            live.record('hold.released', instance.event)
+
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def confirm(self, request, pk=None):
+        """Turn the hold into an enrollment, before it expires"""
+        hold = self.get_object()
+        if not hold.is_active:
+            return Response({"error": "This seat hold has expired."}, status=status.HTTP_410_GONE)
+        return enroll_seeker(request, hold.event)
+
+
+class CheckInViewSet(viewsets.ViewSet):
+    """
+    Check-in at the door with enrollment check-in tokens (events/checkin.py):
+    a live scan, or a scanner's offline scans synced in one request
+    """
+    permission_classes = [permissions.IsAuthenticated, IsFacilitator]
+
+    def create(self, request):
+        token = request.data.get('token')
+        if not isinstance(token, str):
+            return Response({"token": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            checkin_pass, checked_in_at, first = checkin.check_in(token, request.user)
+        except ValueError as error:
+            code = status.HTTP_403_FORBIDDEN if str(error) == checkin.NOT_YOUR_EVENT else status.HTTP_400_BAD_REQUEST
+            return Response({"error": str(error)}, status=code)
+        return Response({
+            "enrollment": checkin_pass.enrollment_id,
+            "event": checkin_pass.event_id,
+            "status": "checked_in" if first else "already_checked_in",
+            "checked_in_at": checked_in_at,
+        })
+
+    @action(detail=False, methods=['post'])
+    def sync(self, request):
+        """Upload offline scans: {"scans": [{"token": ..., "scanned_at": ...}]}"""
+        scans = request.data.get('scans')
+        if not isinstance(scans, list) or not scans:
+            return Response({"scans": ["Expected a list of scans."]}, status=status.HTTP_400_BAD_REQUEST)
+        if len(scans) > settings.CHECKIN_SYNC_MAX_SCANS:
+            return Response(
+                {"scans": [f"At most {settings.CHECKIN_SYNC_MAX_SCANS} scans per request."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Checked by checkin.sync() rather than a serializer per scan: there are thousands
+        scans = [
+            (scan.get('token'), scan.get('scanned_at')) if isinstance(scan, dict) else (None, None)
+            for scan in scans
+        ]
+        return Response(checkin.sync(scans, request.user))
+
+
+class EnrollmentViewSet(RowListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated, IsSeeker]
 
     def get_queryset(self):
-        return Enrollment.objects.filter(seeker=self.request.user)
+        fields = requested_fields(self.request, EnrollmentSerializer)
+        return enrollment_queryset_for(
+            Enrollment.objects.filter(seeker=self.request.user, event__deleted_at__isnull=True), fields
+        )
 
     @action(detail=False, methods=['get'])
     def past(self, request):
         # Events already ended
         now = timezone.now()
+        # Together with the enrollments of archived events (events/archive.py)
         enrollments = self.get_queryset().filter(event__ends_at__lt=now)
-        page = self.paginate_queryset(enrollments)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(enrollments, many=True)
-        return Response(serializer.data)
+        rows = enrollment_rows.subset(requested_fields(request, EnrollmentSerializer))
+        return self.paginate_rows(past_enrollments(enrollments, request.user, rows), rows)
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
@@ -102,20 +361,19 @@ class EnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
         # Events starting in future? Or generally "Active" enrollments where event hasn't ended? 
         # Usually upcoming means starts_at > now.
         enrollments = self.get_queryset().filter(event__starts_at__gt=now).order_by('event__starts_at')
-        page = self.paginate_queryset(enrollments)
-        if page is not None:
-             serializer = self.get_serializer(page, many=True)
-             return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(enrollments, many=True)
-        return Response(serializer.data)
+        return self.list_rows(enrollments, enrollment_rows)
 
     @action(detail=True, methods=['post'], url_path='cancel')
     def cancel(self, request, pk=None):
         """Cancel a specific enrollment"""
         try:
             enrollment = self.get_queryset().get(pk=pk, status='ENROLLED')
-            enrollment.status = 'CANCELED'
-            enrollment.save()
+            with transaction.atomic():
+                enrollment.status = 'CANCELED'
+                enrollment.save()
+                live.record('enrollment.canceled', enrollment.event)
+                transaction.on_commit(lambda: checkin.revoke(enrollment.pk, enrollment.event.ends_at))
+            ENROLLMENT_ACTIONS.labels('cancel').inc()
             return Response({"message": "Enrollment canceled successfully."}, status=status.HTTP_200_OK)
         except Enrollment.DoesNotExist:
             return Response({"error": "Enrollment not found or already canceled."}, status=status.HTTP_404_NOT_FOUND)
@@ -1,3 +1,5 @@
 from .celery import app as celery_app
+# Imported early so every database connection gets the per-request query recorder
+from . import instrumentation  # noqa: F401
 
 __all__ = ('celery_app',)
@@ -0,0 +1,159 @@
+"""
+Batched GET requests: POST /api/batch/.
+
+The frontend's first paint needs several API reads (events, upcoming and
+past enrollments, my_events). Sent one by one, each repeats the JWT
+decoding, user and profile lookups and the middleware stack. Batched, the
+batch request is authenticated once and every sub-request runs in-process
+against the same user object (so request.user.profile is loaded at most
+once), skipping the middleware:
+
+    POST /api/batch/
+    {"requests": [{"id": "upcoming", "path": "/events/enrollments/upcoming/"},
+                  {"id": "past", "path": "/events/enrollments/past/?page=2"}]}
+
+    200 {"responses": [{"id": "upcoming", "status": 200, "body": [...]},
+                       {"id": "past", "status": 200, "body": {...}}]}
+
+Each sub-request gets its own status; one failing does not fail the batch.
+At most BATCH_MAX_REQUESTS sub-requests are accepted, and once the batch has
+run for BATCH_MAX_SECONDS the remaining ones are not started and come back
+as 504 (a sub-request already running is not interrupted).
+"""
+import json
+import logging
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db.routers import RequestRoutingState, _request_state
+
+logger = logging.getLogger(__name__)
+
+# Headers of the batch request that describe its body, not the sub-requests'
+BODY_META = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IDEMPOTENCY_KEY', 'wsgi.input')
+
+
+class SubRequestSerializer(serializers.Serializer):
+    id = serializers.CharField(max_length=100, required=False)
+    method = serializers.ChoiceField(choices=['GET'], default='GET')
+    path = serializers.CharField(max_length=2000)
+
+    def validate_path(self, value):
+        if not value.startswith('/'):
+            raise serializers.ValidationError("Must be an absolute path, e.g. /events/events/.")
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch."
+            )
+        return value
+
+
+def error(status_code, detail):
+    return status_code, {'detail': detail}
+
+
+def sub_request(request, path, query_string):
+    """A GET for `path` carrying the batch request's headers and authenticated user"""
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {key: value for key, value in request.META.items() if key not in BODY_META}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query_string)
+    sub.GET = QueryDict(query_string)
+    sub.COOKIES = request.COOKIES
+    sub.user = request.user
+    # DRF takes these instead of running its authenticators again (no second JWT decode)
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def response_body(response):
+    data = getattr(response, 'data', None)
+    if data is not None:
+        # DRF response: use the data as is rather than rendering and re-parsing it
+        return data
+    if 'json' in response.get('Content-Type', ''):
+        return json.loads(response.content or b'null')
+    return response.content.decode(response.charset or 'utf-8', errors='replace')
+
+
+def run(request, path):
+    """(status, body) for one sub-request"""
+    url = urlsplit(path)
+    try:
+        match = resolve(url.path)
+    except Resolver404:
+        return error(status.HTTP_404_NOT_FOUND, "Not found.")
+    view_class = getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None)
+    if view_class is BatchView:
+        return error(status.HTTP_400_BAD_REQUEST, "Batches cannot be nested.")
+    if iscoroutinefunction(match.func):
+        # The async views stream or hold the connection open (live updates)
+        return error(status.HTTP_400_BAD_REQUEST, "This endpoint cannot be batched.")
+
+    sub = sub_request(request, url.path, url.query)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Http404:
+        return error(status.HTTP_404_NOT_FOUND, "Not found.")
+    except PermissionDenied:
+        return error(status.HTTP_403_FORBIDDEN, "You do not have permission to perform this action.")
+    except Exception:
+        logger.exception("Batched request for %s failed", path)
+        return error(status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error.")
+    if response.streaming:
+        return error(status.HTTP_400_BAD_REQUEST, "This endpoint cannot be batched.")
+    return response.status_code, response_body(response)
+
+
+class BatchView(APIView):
+    """Run several GET requests in one round trip, authenticated once"""
+    # Only GETs run, so the POST neither pins its reads nor its user to the primary
+    reads_only = True
+
+    @extend_schema(
+        request=BatchRequestSerializer,
+        responses=inline_serializer('BatchResponse', {
+            'responses': serializers.ListField(child=serializers.DictField()),
+        }),
+    )
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Loaded once here, then shared by every sub-request's permission checks
+        getattr(request.user, 'profile', None)
+
+        deadline = time.monotonic() + settings.BATCH_MAX_SECONDS
+        responses = []
+        # Routed like GETs: to a replica unless the user wrote recently
+        routing = _request_state.set(RequestRoutingState(request))
+        try:
+            for index, item in enumerate(serializer.validated_data['requests']):
+                if time.monotonic() >= deadline:
+                    code, body = error(status.HTTP_504_GATEWAY_TIMEOUT, "Batch time limit exceeded; not run.")
+                else:
+                    code, body = run(request, item['path'])
+                responses.append({'id': item.get('id', str(index)), 'status': code, 'body': body})
+        finally:
+            _request_state.reset(routing)
+        return Response({'responses': responses})
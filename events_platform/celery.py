@@ -3,6 +3,9 @@ from celery import Celery
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_platform.settings')
+# Workers otherwise run every Django system check (templates, admin, DRF, ...)
+# on startup; the web deploy already runs them via manage.py check/migrate.
+os.environ.setdefault('CELERY_SKIP_CHECKS', '1')
 
 app = Celery('events_platform')
 
@@ -15,6 +18,9 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Task runtime/failure metrics (signal handlers)
+from . import metrics  # noqa: E402,F401
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -0,0 +1,62 @@
+import asyncio
+
+from django.core.cache import cache
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .routers import RequestRoutingState, _request_state, recent_write_key, replica_aliases
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _begin(request):
+    # Unsafe requests read from the primary for their whole duration
+    return _request_state.set(RequestRoutingState(request, pinned=request.method not in SAFE_METHODS))
+
+
+def _reads_only(request):
+    """Whether the view is an unsafe method that never writes (`reads_only = True`, e.g. BatchView)"""
+    match = getattr(request, 'resolver_match', None)
+    view_class = match and (getattr(match.func, 'view_class', None) or getattr(match.func, 'cls', None))
+    return getattr(view_class, 'reads_only', False)
+
+
+def _wrote(request, response):
+    user = getattr(request, 'user', None)
+    return (
+        bool(replica_aliases())
+        and request.method not in SAFE_METHODS
+        and response.status_code < 400
+        and user is not None
+        and user.is_authenticated
+        and not _reads_only(request)
+    )
+
+
+@sync_and_async_middleware
+def ReplicaRoutingMiddleware(get_response):
+    """
+    Tracks per-request read routing and records successful writes so the
+    user's following requests read from the primary (read-your-writes).
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _begin(request)
+            try:
+                response = await get_response(request)
+                if _wrote(request, response):
+                    await cache.aset(recent_write_key(request.user.pk), True, settings.REPLICA_STICKY_SECONDS)
+                return response
+            finally:
+                _request_state.reset(token)
+    else:
+        def middleware(request):
+            token = _begin(request)
+            try:
+                response = get_response(request)
+                if _wrote(request, response):
+                    cache.set(recent_write_key(request.user.pk), True, settings.REPLICA_STICKY_SECONDS)
+                return response
+            finally:
+                _request_state.reset(token)
+    return middleware
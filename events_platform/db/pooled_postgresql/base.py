@@ -0,0 +1,113 @@
+"""
+PostgreSQL backend that hands out connections from an in-process pool.
+
+Django closes its connection at the end of every request when CONN_MAX_AGE
+is 0; with this backend "closing" returns the connection to a per-process
+psycopg2 pool instead, so requests skip the TCP/TLS/auth handshake without
+relying on thread-bound persistent connections (which leak under ASGI).
+
+Configured through OPTIONS:
+    POOL_MIN_SIZE  connections opened eagerly when the pool is created
+    POOL_MAX_SIZE  hard cap on connections per process
+    POOL_TIMEOUT   seconds to wait for a free connection before failing
+"""
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db.utils import OperationalError
+
+if is_psycopg3:
+    raise ImproperlyConfigured("The pooled PostgreSQL backend requires psycopg2.")
+
+import psycopg2.extensions
+import psycopg2.extras
+from psycopg2.pool import ThreadedConnectionPool
+
+POOL_OPTIONS = ('POOL_MIN_SIZE', 'POOL_MAX_SIZE', 'POOL_TIMEOUT')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """ThreadedConnectionPool that blocks (up to a timeout) instead of failing when exhausted"""
+
+    def __init__(self, conn_params, min_size, max_size, timeout):
+        self.pool = ThreadedConnectionPool(min_size, max_size, **conn_params)
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.timeout = timeout
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(f"No database connection available within {self.timeout}s.")
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            self.pool.putconn(connection, close=close)
+        finally:
+            self.slots.release()
+
+
+def get_pool(alias, conn_params, options):
+    # Keyed by pid too: a pool inherited across fork() must never be shared
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(
+                    conn_params,
+                    min_size=int(options.get('POOL_MIN_SIZE', 1)),
+                    max_size=int(options.get('POOL_MAX_SIZE', 10)),
+                    timeout=float(options.get('POOL_TIMEOUT', 10)),
+                )
+    return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in POOL_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        pool = get_pool(self.alias, conn_params, options)
+        while True:
+            connection = pool.getconn()
+            if not connection.closed:
+                break
+            # Server went away while the connection sat idle in the pool
+            pool.putconn(connection, close=True)
+
+        if 'isolation_level' in options:
+            self.isolation_level = base.IsolationLevel(options['isolation_level'])
+            connection.isolation_level = self.isolation_level
+        else:
+            self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = get_pool(self.alias, self.get_connection_params(), self.settings_dict['OPTIONS'])
+        connection = self.connection
+        broken = bool(connection.closed)
+        if not broken:
+            try:
+                if connection.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except psycopg2.Error:
+                broken = True
+        pool.putconn(connection, close=broken)
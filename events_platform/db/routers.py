@@ -0,0 +1,94 @@
+"""
+Primary/replica routing for the events app.
+
+Reads of `events` models go to a random alias from settings.DATABASE_REPLICAS;
+everything else, all writes, and reads inside a transaction go to `default`.
+A user who wrote recently stays pinned to the primary for
+REPLICA_STICKY_SECONDS so they always read their own writes (e.g.
+`is_enrolled` right after enrolling). See middleware.py for how requests
+feed the stickiness state.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Per-request routing state, installed by ReplicaRoutingMiddleware
+_request_state = ContextVar('db_request_state', default=None)
+# Explicit alias chosen with read_from(), e.g. by Celery tasks
+_read_alias = ContextVar('db_read_alias', default=None)
+
+REPLICA = 'replica'
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def recent_write_key(user_id):
+    return f'db-recent-write:{user_id}'
+
+
+class RequestRoutingState:
+    def __init__(self, request, pinned=False):
+        self.request = request
+        self.pinned = pinned
+        self.checked_recent_write = False
+
+    def is_pinned(self):
+        if self.pinned:
+            return True
+        if not self.checked_recent_write:
+            # Resolved lazily: the user is only known once DRF has authenticated the request
+            user = getattr(self.request, 'user', None)
+            if user is not None and user.is_authenticated:
+                self.checked_recent_write = True
+                self.pinned = bool(cache.get(recent_write_key(user.pk)))
+        return self.pinned
+
+
+@contextmanager
+def read_from(alias):
+    """
+    Route reads inside the block to `alias`: a DATABASES key, or 'replica' for
+    any replica (falling back to the primary when none are configured).
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class PrimaryReplicaRouter:
+    route_app_labels = {'events'}
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        alias = _read_alias.get()
+        if alias is not None:
+            if alias == REPLICA:
+                return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+            return alias
+
+        if not replicas or model._meta.app_label not in self.route_app_labels:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state = _request_state.get()
+        if state is not None and state.is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,110 @@
+"""
+Idempotency-Key support for unsafe API actions.
+
+A client that retries a POST with the same `Idempotency-Key` header gets the
+first attempt's response replayed (with `Idempotent-Replayed: true`) instead
+of the action running again. A retry that arrives while the first attempt is
+still running waits for its result, up to IDEMPOTENCY_WAIT_SECONDS.
+
+Results live in the default cache for IDEMPOTENCY_TTL_SECONDS, keyed by user,
+method, path and key, so they are shared by all workers when the cache is
+Redis (CACHE_URL). Server errors are not stored: retrying those runs again.
+"""
+import functools
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# Response headers worth replaying
+STORED_HEADERS = ('Location', 'Content-Location')
+
+
+def cache_key(request, key):
+    user = request.user.pk if request.user.is_authenticated else 'anonymous'
+    scope = hashlib.sha256(f'{request.method} {request.path} {key}'.encode()).hexdigest()
+    return f'idempotency:{user}:{scope}'
+
+
+def fingerprint(request):
+    # Read before the view parses request.data, which would consume the stream
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def error(detail, status_code):
+    return Response({'detail': detail}, status=status_code)
+
+
+def replay(stored, body_fingerprint):
+    if stored['fingerprint'] != body_fingerprint:
+        return error(
+            f"This {HEADER} was already used with a different request body.",
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(stored['data'], status=stored['status'], headers=stored['headers'])
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def store(key, body_fingerprint, response):
+    cache.set(key, {
+        'fingerprint': body_fingerprint,
+        'status': response.status_code,
+        # Plain JSON types, not serializer ReturnDicts (which hold the serializer)
+        'data': json.loads(json.dumps(response.data, cls=JSONEncoder)),
+        'headers': {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+    }, settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+def idempotent(view_method):
+    """
+    Make a DRF view method replay its response for repeated Idempotency-Keys.
+    Runs after authentication and permission checks, like the view itself.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return error(f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters.", status.HTTP_400_BAD_REQUEST)
+
+        body_fingerprint = fingerprint(request)
+        result_key = cache_key(request, key)
+        lock_key = f'{result_key}:lock'
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            stored = cache.get(result_key)
+            if stored is not None:
+                return replay(stored, body_fingerprint)
+
+            token = uuid.uuid4().hex
+            if cache.add(lock_key, token, settings.IDEMPOTENCY_LOCK_SECONDS):
+                try:
+                    response = view_method(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        store(result_key, body_fingerprint, response)
+                    return response
+                finally:
+                    if cache.get(lock_key) == token:
+                        cache.delete(lock_key)
+
+            # Another request with this key is running: wait for its response
+            if time.monotonic() >= deadline:
+                response = error(
+                    f"A request with this {HEADER} is still being processed.", status.HTTP_409_CONFLICT
+                )
+                response['Retry-After'] = '1'
+                return response
+            time.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+
+    return wrapper
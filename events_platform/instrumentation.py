@@ -0,0 +1,92 @@
+"""
+Per-request performance counters.
+
+A RequestStats object lives in a context variable for the duration of a
+request, so it follows the request into sync_to_async threads. Every database
+connection gets an execute wrapper (installed on connect) that charges query
+count and time to the current request's stats, and passes each query to the
+listener installed with listen_to_queries(), if any.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_current_stats = ContextVar('request_stats', default=None)
+_query_listener = ContextVar('query_listener', default=None)
+
+
+class RequestStats:
+    __slots__ = ('started', 'view_started', 'render_started', 'render_finished', 'db_queries', 'db_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.render_started = None
+        self.render_finished = None
+        self.db_queries = 0
+        self.db_time = 0.0
+
+    def timings(self, finished):
+        """Phase durations in milliseconds"""
+        total = finished - self.started
+        view_started = self.view_started or self.started
+        view_finished = self.render_started or finished
+        render = (self.render_finished or finished) - self.render_started if self.render_started else 0.0
+        return {
+            'total': total * 1000,
+            'view': (view_finished - view_started) * 1000,
+            'render': render * 1000,
+            'db': self.db_time * 1000,
+        }
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+def begin_request():
+    """Start collecting stats for the current context; returns (stats, reset token)"""
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token):
+    _current_stats.reset(token)
+
+
+@contextmanager
+def listen_to_queries(listener):
+    """Call listener(sql, duration_seconds) for every query run inside the block"""
+    token = _query_listener.set(listener)
+    try:
+        yield listener
+    finally:
+        _query_listener.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    listener = _query_listener.get()
+    if stats is None and listener is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if stats is not None:
+            stats.db_time += duration
+            stats.db_queries += 1
+        if listener is not None:
+            listener(sql, duration)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Insert at the front: execute_wrapper() blocks that are open right now pop
+    # from the end when they exit, and must remove their own wrapper, not ours
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
@@ -0,0 +1,150 @@
+"""
+Prometheus metrics for the API and Celery workers.
+
+The API serves its own at /metrics (tasks run eagerly in a request included).
+With several gunicorn worker processes, point PROMETHEUS_MULTIPROC_DIR at a
+directory shared by all of them (cleared on startup, see gunicorn.conf.py);
+each process then writes its samples there and /metrics aggregates them.
+
+Celery workers run apart from the API, so each worker serves its task runtime
+and failure metrics itself, on CELERY_METRICS_PORT, to be scraped as a target
+of its own. A prefork worker aggregates its pool processes the same way, through
+a PROMETHEUS_MULTIPROC_DIR of its own that it clears on startup.
+"""
+import os
+import time
+from datetime import timedelta
+
+from celery.signals import (
+    celeryd_init, task_failure, task_postrun, task_prerun, worker_process_shutdown, worker_ready,
+)
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by view', ['view', 'method'],
+)
+RESPONSES = Counter(
+    'http_responses_total', 'Responses by view and status code', ['view', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')),
+)
+TASK_RUNTIME = Histogram(
+    'celery_task_duration_seconds', 'Celery task runtime', ['task'],
+)
+TASK_FAILURES = Counter(
+    'celery_task_failures_total', 'Celery task failures', ['task'],
+)
+ENROLLMENT_ACTIONS = Counter(
+    'events_enrollment_actions_total', 'Enrollments created or canceled', ['action'],
+)
+
+
+def observe_request(request, response, timings, db_queries):
+    match = getattr(request, 'resolver_match', None)
+    # URL names give viewset actions, e.g. event-list, event-enroll, enrollment-upcoming
+    view = (match.url_name or match.view_name) if match else 'unmatched'
+    REQUEST_LATENCY.labels(view, request.method).observe(timings['total'] / 1000)
+    RESPONSES.labels(view, request.method, str(response.status_code)).inc()
+    REQUEST_DB_QUERIES.labels(view).observe(db_queries)
+
+
+class BusinessMetricsCollector:
+    """Gauges computed from the database at scrape time"""
+
+    def describe(self):
+        # Lets the registry learn the metric names without querying the database
+        return [self.enrollments_last_minute()]
+
+    def enrollments_last_minute(self):
+        return GaugeMetricFamily(
+            'events_enrollments_last_minute', 'Enrollments (new or re-enrolled) in the last minute',
+        )
+
+    def collect(self):
+        from events.models import Enrollment
+
+        since = timezone.now() - timedelta(minutes=1)
+        enrolled = self.enrollments_last_minute()
+        enrolled.add_metric([], Enrollment.objects.filter(status='ENROLLED', updated_at__gte=since).count())
+        yield enrolled
+
+
+_business_collector = BusinessMetricsCollector()
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    REGISTRY.register(_business_collector)
+
+
+def collecting_registry(business=True):
+    """The registry to expose: this process's, or every process's in multiprocess mode"""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    if business:
+        registry.register(_business_collector)
+    return registry
+
+
+def metrics_view(request):
+    # Closed unless METRICS_AUTH_TOKEN is set: every scrape counts enrollments in the database
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    if not token or not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(collecting_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+# Celery task instrumentation (workers and eager execution alike)
+_task_started = {}
+
+
+@celeryd_init.connect
+def _clear_worker_metrics(**kwargs):
+    # Like gunicorn.conf.py's on_starting: each worker run starts with an empty metrics directory
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+@worker_ready.connect
+def _serve_worker_metrics(**kwargs):
+    """Serve the worker's task metrics on CELERY_METRICS_PORT (0: not served)"""
+    port = getattr(settings, 'CELERY_METRICS_PORT', 0)
+    if port:
+        # No enrollment gauge here: /metrics reports it
+        start_http_server(port, registry=collecting_registry(business=False))
+
+
+@worker_process_shutdown.connect
+def _drop_pool_process_metrics(pid=None, **kwargs):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.labels(task.name).observe(time.perf_counter() - started)
+
+
+@task_failure.connect
+def _task_failure(sender=None, **kwargs):
+    TASK_FAILURES.labels(sender.name).inc()
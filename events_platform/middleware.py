@@ -0,0 +1,179 @@
+import cProfile
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject, empty
+
+from .instrumentation import begin_request, end_request
+from .metrics import observe_request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+logger = logging.getLogger('events_platform.requests')
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+def resolved_user(request):
+    """The request's user, without triggering a (possibly sync-only) lazy session lookup"""
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+class RequestTimingMiddleware:
+    """
+    Measures total, view, render and database time for every request.
+
+    Timings are returned in a Server-Timing header, logged as one JSON line
+    per request and recorded in the Prometheus metrics. A sample of requests (PROFILING_SAMPLE_RATE), plus requests
+    with ?profile=1 and an X-Profile-Token header matching PROFILING_TOKEN, are
+    also profiled with cProfile and the .prof files written to PROFILING_DIR
+    (inspect with `python -m pstats` or snakeviz).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.profile_dir = Path(getattr(settings, 'PROFILING_DIR', 'profiles'))
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = begin_request()
+        request._timing_stats = stats
+        profiler = self.start_profiler(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, stats, profiler)
+
+    async def __acall__(self, request):
+        stats, token = begin_request()
+        request._timing_stats = stats
+        # cProfile only follows the event loop thread, not sync_to_async workers
+        profiler = self.start_profiler(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, stats, profiler)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_stats.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses render lazily right after this hook
+        stats = request._timing_stats
+        stats.render_started = time.perf_counter()
+
+        def render_finished(rendered):
+            stats.render_finished = time.perf_counter()
+
+        response.add_post_render_callback(render_finished)
+        return response
+
+    def profile_requested(self, request):
+        # Checked before the profiler starts: the user is only known once the view has run
+        token = getattr(settings, 'PROFILING_TOKEN', '')
+        return (
+            request.GET.get('profile') == '1' and bool(token)
+            and constant_time_compare(request.headers.get('X-Profile-Token', ''), token)
+        )
+
+    def start_profiler(self, request):
+        sampled = bool(self.sample_rate) and random.random() < self.sample_rate
+        if not sampled and not self.profile_requested(request):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return None
+        return profiler
+
+    def finish(self, request, response, stats, profiler):
+        finished = time.perf_counter()
+        timings = stats.timings(finished)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings["db"]:.2f};desc="{stats.db_queries} queries"',
+            f'view;dur={timings["view"]:.2f}',
+            f'render;dur={timings["render"]:.2f}',
+            f'total;dur={timings["total"]:.2f}',
+        ])
+
+        user = resolved_user(request)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+        if profiler is not None:
+            profiler.disable()
+            profile_id = self.save_profile(request, profiler, timings['total'])
+            if profile_id:
+                response['X-Profile-Id'] = profile_id
+
+        observe_request(request, response, timings, stats.db_queries)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user_id': user_id,
+            'db_queries': stats.db_queries,
+            **{f'{name}_ms': round(value, 2) for name, value in timings.items()},
+        }))
+        return response
+
+    def save_profile(self, request, profiler, total_ms):
+        slug = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-') or 'root'
+        profile_id = f'{timezone.now():%Y%m%dT%H%M%S%f}-{request.method}-{slug}-{total_ms:.0f}ms'
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.profile_dir / f'{profile_id}.prof')
+        return profile_id
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses responses of at least COMPRESSION_MIN_BYTES (large list pages,
+    the schema): brotli when the client accepts it and the brotli package is
+    installed, gzip otherwise. Streaming responses are left alone.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+        if brotli is None or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+
+        compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # The body is no longer byte-for-byte the one the ETag was computed for
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,57 @@
+"""
+pytest plugin: run QueryInspectionMiddleware during tests.
+
+    pytest --querycheck           # report repeated/slow queries per request
+    pytest --querycheck-strict    # ...and fail the test that caused them
+
+Enabled for this project in pytest.ini. Tests that provoke query problems on
+purpose opt out with @pytest.mark.no_querycheck.
+"""
+import pytest
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('querycheck', 'N+1 and slow query detection')
+    group.addoption('--querycheck', action='store_true', help="Report repeated and slow queries per request.")
+    group.addoption('--querycheck-strict', action='store_true', help="Fail tests whose requests have them.")
+    group.addoption('--querycheck-threshold', type=int, default=None,
+                    help="Repeats of one query fingerprint that count as an N+1 (QUERY_REPEAT_THRESHOLD).")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'no_querycheck: skip query inspection for this test')
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    config = item.config
+    strict = config.getoption('querycheck_strict')
+    enabled = strict or config.getoption('querycheck')
+    if not enabled or item.get_closest_marker('no_querycheck'):
+        return (yield)
+
+    from django.test import override_settings
+    from events_platform.querycheck import query_problems_detected
+
+    overrides = {'QUERY_INSPECTION_ENABLED': True}
+    if config.getoption('querycheck_threshold'):
+        overrides['QUERY_REPEAT_THRESHOLD'] = config.getoption('querycheck_threshold')
+
+    reports = []
+
+    def collect(sender, report, **kwargs):
+        reports.append(report)
+
+    query_problems_detected.connect(collect)
+    try:
+        with override_settings(**overrides):
+            result = yield
+    finally:
+        query_problems_detected.disconnect(collect)
+
+    if reports:
+        text = '\n'.join(report.format() for report in reports)
+        if strict:
+            pytest.fail(text, pytrace=False)
+        item.add_report_section('call', 'querycheck', text)
+    return result
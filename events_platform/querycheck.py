@@ -0,0 +1,137 @@
+"""
+N+1 and slow query detection for development, staging and tests.
+
+Queries are fingerprinted (literals and placeholders normalized, IN lists
+collapsed) so the same statement with different parameters counts as one.
+A fingerprint repeated QUERY_REPEAT_THRESHOLD times within one request is
+reported as a likely N+1, and any query slower than SLOW_QUERY_MS is reported
+as slow; both with the project stack frame that issued them.
+
+Enable per request with QueryInspectionMiddleware (QUERY_INSPECTION_ENABLED),
+around arbitrary code with inspect_queries(), or for the test suite with the
+events_platform.pytest_querycheck plugin.
+"""
+import logging
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.dispatch import Signal
+
+from .instrumentation import listen_to_queries
+
+logger = logging.getLogger('events_platform.queries')
+
+# Sent with a QueryReport whenever a request had repeated or slow queries
+query_problems_detected = Signal()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_PROJECT_DIR = str(Path(settings.BASE_DIR).resolve()) if settings.configured else None
+_SKIP_FILES = {__file__, sys.modules[listen_to_queries.__module__].__file__}
+
+
+def fingerprint(sql):
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def query_origin():
+    """The innermost stack frame in project code, skipping this module and libraries"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename not in _SKIP_FILES
+            and _PROJECT_DIR and filename.startswith(_PROJECT_DIR)
+            and 'site-packages' not in filename
+        ):
+            return f'{Path(filename).relative_to(_PROJECT_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryReport:
+    def __init__(self, label, repeat_threshold=None, slow_ms=None):
+        self.label = label
+        self.repeat_threshold = repeat_threshold or getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(settings, 'SLOW_QUERY_MS', 100)
+        self.fingerprints = {}
+        self.slow = []
+        self.total = 0
+
+    def __call__(self, sql, duration):
+        self.total += 1
+        key = fingerprint(sql)
+        entry = self.fingerprints.get(key)
+        if entry is None:
+            entry = self.fingerprints[key] = {'count': 0, 'ms': 0.0, 'sql': sql, 'origin': None}
+        entry['count'] += 1
+        entry['ms'] += duration * 1000
+        if entry['count'] == 2:
+            # Walking the stack is costly; only do it once a statement repeats
+            entry['origin'] = query_origin()
+
+        if duration * 1000 >= self.slow_ms:
+            self.slow.append({'ms': duration * 1000, 'sql': sql, 'origin': query_origin()})
+
+    @property
+    def repeated(self):
+        return sorted(
+            (entry for entry in self.fingerprints.values() if entry['count'] >= self.repeat_threshold),
+            key=lambda entry: -entry['count'],
+        )
+
+    @property
+    def has_problems(self):
+        return bool(self.repeated or self.slow)
+
+    def format(self):
+        lines = [f'Query report for {self.label}: {self.total} queries']
+        for entry in self.repeated:
+            lines.append(
+                f"  N+1? {entry['count']}x ({entry['ms']:.1f}ms) from {entry['origin']}: {entry['sql'][:300]}"
+            )
+        for entry in self.slow:
+            lines.append(f"  slow {entry['ms']:.1f}ms from {entry['origin']}: {entry['sql'][:300]}")
+        return '\n'.join(lines)
+
+
+@contextmanager
+def inspect_queries(label, strict=False, **thresholds):
+    """Report repeated/slow queries run inside the block; raise AssertionError when strict"""
+    report = QueryReport(label, **thresholds)
+    with listen_to_queries(report):
+        yield report
+    if report.has_problems:
+        logger.warning(report.format())
+        if strict:
+            raise AssertionError(report.format())
+
+
+class QueryInspectionMiddleware:
+    """Logs a query report for each request with repeated or slow queries (opt-in)"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTION_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        report = QueryReport(f'{request.method} {request.path}')
+        with listen_to_queries(report):
+            response = self.get_response(request)
+        if report.has_problems:
+            logger.warning(report.format())
+            query_problems_detected.send(sender=self.__class__, report=report, request=request)
+        return response
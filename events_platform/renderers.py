@@ -0,0 +1,46 @@
+"""
+orjson-backed JSON renderer and parser for the REST API.
+
+Drop-in replacements for DRF's JSONRenderer/JSONParser with the same output:
+datetimes as ISO 8601 with a trailing Z, Decimal/lazy strings/querysets via
+DRF's encoder. Selected in REST_FRAMEWORK when orjson is installed
+(FAST_JSON setting).
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = _OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=options)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits; let the stdlib renderer handle the odd case
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same JavaScript-safety escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read() if stream is not None else b'')
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,137 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the schema with drf-spectacular walks every viewset and serializer,
+so instead it is built once per code version (`manage.py build_openapi` at
+image build time, or lazily on the first request), written to SCHEMA_CACHE_DIR
+and served from memory with a strong ETag.
+
+The code version is CODE_VERSION when set (e.g. the git SHA in CI), otherwise
+a hash of the project's Python sources, so a stale file is never served.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+from django.views.decorators.http import condition, require_safe
+
+FORMATS = {
+    'yaml': 'application/vnd.oai.openapi; charset=utf-8',
+    'json': 'application/vnd.oai.openapi+json; charset=utf-8',
+}
+
+_documents = {}
+_lock = threading.Lock()
+
+
+def code_version():
+    if settings.CODE_VERSION:
+        return settings.CODE_VERSION
+
+    import drf_spectacular
+
+    digest = hashlib.sha256(drf_spectacular.__version__.encode())
+    digest.update(repr(sorted(settings.SPECTACULAR_SETTINGS.items())).encode())
+    base_dir = Path(settings.BASE_DIR)
+    packages = {Path(__file__).parent} | {
+        Path(config.path) for config in apps.get_app_configs() if Path(config.path).is_relative_to(base_dir)
+    }
+    for package in sorted(packages):
+        for path in sorted(package.rglob('*.py')):
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def schema_path(fmt, version=None):
+    return Path(settings.SCHEMA_CACHE_DIR) / f'openapi-{version or code_version()}.{fmt}'
+
+
+def generate_schema():
+    """The schema rendered in every format: {'yaml': bytes, 'json': bytes}"""
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+
+def build_schema_files(version=None):
+    """Write the schema in every format for this code version and drop older versions"""
+    version = version or code_version()
+    directory = Path(settings.SCHEMA_CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = [_write(schema_path(fmt, version), content) for fmt, content in generate_schema().items()]
+    for stale in directory.glob('openapi-*.*'):
+        if stale not in paths:
+            stale.unlink(missing_ok=True)
+    return paths
+
+
+def _write(path, content):
+    # Written to a temp file and renamed, so concurrent workers never read half a file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.openapi-')
+    with os.fdopen(fd, 'wb') as tmp_file:
+        tmp_file.write(content)
+    os.replace(tmp, path)
+    return path
+
+
+def get_schema_document(fmt):
+    """(content, etag) of the schema, from memory, the cache file, or generated once"""
+    document = _documents.get(fmt)
+    if document is None:
+        with _lock:
+            document = _documents.get(fmt)
+            if document is None:
+                path = schema_path(fmt)
+                try:
+                    content = path.read_bytes()
+                except FileNotFoundError:
+                    build_schema_files()
+                    content = path.read_bytes()
+                document = _documents[fmt] = (content, hashlib.sha256(content).hexdigest()[:32])
+    return document
+
+
+def _requested_format(request):
+    fmt = request.GET.get('format')
+    if fmt in FORMATS:
+        return fmt
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+@require_safe
+@condition(etag_func=lambda request: get_schema_document(_requested_format(request))[1])
+def schema_view(request):
+    fmt = _requested_format(request)
+    content, _ = get_schema_document(fmt)
+    response = HttpResponse(content, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'inline; filename="{settings.SPECTACULAR_SETTINGS["TITLE"]}.{fmt}"'
+    response['Cache-Control'] = 'public, no-cache'
+    response['Vary'] = 'Accept'
+    return response
+
+
+def lazy_view(view_path, **initkwargs):
+    """URLconf entry for a class-based view imported on its first request, not at startup"""
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
@@ -1,7 +1,10 @@
 from pathlib import Path
 from datetime import timedelta
+import importlib.util
 import os
+from corsheaders.defaults import default_headers
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,6 +45,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'events_platform.middleware.RequestTimingMiddleware',
+    'events_platform.querycheck.QueryInspectionMiddleware',
+    'events_platform.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -50,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'events_platform.db.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'events_platform.urls'
@@ -71,6 +78,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'events_platform.wsgi.application'
+ASGI_APPLICATION = 'events_platform.asgi.application'
 
 
 # Database
@@ -78,12 +86,80 @@ WSGI_APPLICATION = 'events_platform.wsgi.application'
 
 import dj_database_url
 
+# DB_POOL_MODE picks how connections are reused:
+# - persistent: one connection per worker thread kept for DB_CONN_MAX_AGE seconds.
+#               Under ASGI each request's sync code may run in a new thread, so a
+#               kept connection would leak: DB_CONN_MAX_AGE defaults to 0 there
+# - pool:       in-process psycopg2 pool (PostgreSQL only); preferred under ASGI
+# - pgbouncer:  connect through PgBouncer in transaction pooling mode, which
+#               cannot keep named (server-side) cursors open across transactions
+DB_POOL_MODE = config('DB_POOL_MODE', default='persistent')
+# Same setting and default as gunicorn.conf.py
+SERVER_MODE = config('SERVER_MODE', default='asgi')
+
 DATABASES = {
     'default': dj_database_url.config(
-        default=config('DATABASE_URL', default='sqlite:///db.sqlite3')
+        default=config('DATABASE_URL', default='sqlite:///db.sqlite3'),
+        conn_max_age=config('DB_CONN_MAX_AGE', default=0 if SERVER_MODE == 'asgi' else 60, cast=int),
+        conn_health_checks=config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        disable_server_side_cursors=(DB_POOL_MODE == 'pgbouncer'),
     )
 }
 
+if DB_POOL_MODE == 'pool' and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['ENGINE'] = 'events_platform.db.pooled_postgresql'
+    # Connections go back to the pool at the end of every request
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {}).update({
+        'POOL_MIN_SIZE': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+        'POOL_MAX_SIZE': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'POOL_TIMEOUT': config('DB_POOL_TIMEOUT', default=10, cast=float),
+    })
+
+# Read replicas: comma-separated URLs, registered as replica_1, replica_2, ...
+# Locally, two SQLite files work too (copy db.sqlite3 to refresh the "replica").
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, config('DATABASE_REPLICA_URLS', default='').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=DATABASES['default']['CONN_HEALTH_CHECKS'],
+        disable_server_side_cursors=(DB_POOL_MODE == 'pgbouncer'),
+    )
+    # Tests read replicas through the default test database
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['events_platform.db.routers.PrimaryReplicaRouter']
+
+# Users who wrote recently read from the primary for this many seconds
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+
+# Cache
+# Redis when CACHE_URL is set (shared by all workers), otherwise per-process memory
+
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+if DATABASE_REPLICAS and not CACHE_URL:
+    # Read-your-writes marks users who wrote in the cache: in per-process memory,
+    # the user's next request on another worker would read a stale replica
+    raise ImproperlyConfigured("DATABASE_REPLICA_URLS requires CACHE_URL (a cache shared by all workers).")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -127,6 +203,13 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
+# orjson-backed API renderer/parser (events_platform.renderers), when installed
+FAST_JSON = config('FAST_JSON', default=True, cast=bool) and importlib.util.find_spec('orjson') is not None
+
+# Response compression (events_platform.middleware.CompressionMiddleware)
+COMPRESSION_MIN_BYTES = config('COMPRESSION_MIN_BYTES', default=1024, cast=int)
+BROTLI_QUALITY = config('BROTLI_QUALITY', default=4, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -140,6 +223,15 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'events_platform.renderers.ORJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'events_platform.renderers.ORJSONParser' if FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # Simple JWT Configuration
@@ -160,9 +252,51 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Precomputed OpenAPI schema (events_platform.schema); CODE_VERSION defaults to a source hash
+CODE_VERSION = config('CODE_VERSION', default='')
+SCHEMA_CACHE_DIR = config('SCHEMA_CACHE_DIR', default=str(BASE_DIR / 'build' / 'openapi'))
+
+# Request instrumentation (events_platform.middleware.RequestTimingMiddleware)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+# Secret for profiling one request: ?profile=1 with an X-Profile-Token header; empty disables it
+PROFILING_TOKEN = config('PROFILING_TOKEN', default='')
+
+# N+1 / slow query detection (events_platform.querycheck), opt-in
+QUERY_INSPECTION_ENABLED = config('QUERY_INSPECTION_ENABLED', default=False, cast=bool)
+QUERY_REPEAT_THRESHOLD = config('QUERY_REPEAT_THRESHOLD', default=5, cast=int)
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=100, cast=int)
+
+# Bearer token required to scrape /metrics; empty disables the endpoint
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+# Port each Celery worker serves its task metrics on (0: not served)
+CELERY_METRICS_PORT = config('CELERY_METRICS_PORT', default=0, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'events_platform.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        'events_platform.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Cors Headers
 CORS_ALLOW_ALL_ORIGINS = True # For development
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'last-event-id')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Email Configuration
 # =====================
@@ -177,6 +311,187 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@eventsplatfor
 # OTP Settings
 OTP_EXPIRY_MINUTES = config('OTP_EXPIRY_MINUTES', default=5, cast=int)
 
-# Celery Testing
-CELERY_TASK_ALWAYS_EAGER = True
+# Unverified account cleanup
+UNVERIFIED_ACCOUNT_MAX_AGE_HOURS = config('UNVERIFIED_ACCOUNT_MAX_AGE_HOURS', default=72, cast=int)
+UNVERIFIED_REAPER_BATCH_SIZE = config('UNVERIFIED_REAPER_BATCH_SIZE', default=500, cast=int)
+
+# Celery
+# Tasks run inline in the caller (eager) unless a broker is configured, e.g.
+# redis://redis:6379/0. Other brokers: memory:// (in-process, used by the
+# tests' worker) and filesystem:// (a local worker without Redis; messages
+# under build/celery-broker).
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not CELERY_BROKER_URL, cast=bool)
 CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='') or None
+CELERY_TASK_IGNORE_RESULT = CELERY_RESULT_BACKEND is None
+CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+if CELERY_BROKER_URL.startswith('filesystem://'):
+    LOCAL_BROKER_DIR = config('LOCAL_BROKER_DIR', default=str(BASE_DIR / 'build' / 'celery-broker'))
+    os.makedirs(LOCAL_BROKER_DIR, exist_ok=True)  # kombu doesn't create it
+    CELERY_BROKER_TRANSPORT_OPTIONS = {
+        'data_folder_in': LOCAL_BROKER_DIR,
+        'data_folder_out': LOCAL_BROKER_DIR,
+    }
+
+# Queues: each gets its own workers (docker-compose.yml), so a burst of emails
+# never waits behind an hour-long archival run. Unlisted tasks go to 'default'.
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+TASK_QUEUES = {
+    'email': [
+        'events.tasks.send_followup_email',
+        'events.tasks.send_reminder_email',
+        'events.tasks.send_event_cancellation_notices',
+        'users.tasks.send_otp_email',
+        'users.tasks.send_invitation_emails',
+    ],
+    'reminders': [
+        'events.tasks.check_event_reminders',
+        'events.tasks.expire_seat_holds',
+    ],
+    'maintenance': [
+        'events.tasks.archive_past_events',
+        'events.tasks.purge_deleted_event',
+        'events.tasks.purge_deleted_events',
+        'events.tasks.prune_outbox',
+        'events.tasks.materialize_series',
+        'users.tasks.reap_unverified_accounts',
+    ],
+}
+# Worker tuning per queue, overridable as e.g. CELERY_EMAIL_CONCURRENCY.
+# email: SMTP-bound, so many (thread) slots with a few messages prefetched
+#   each; acked on receipt, since a redelivered email is a duplicate email.
+# maintenance: long batched jobs, one at a time and acked late so a job lost
+#   with its worker is re-run (they are all safe to re-run).
+QUEUE_WORKER_SETTINGS = {
+    queue: {
+        'concurrency': config(f'CELERY_{queue.upper()}_CONCURRENCY', default=concurrency, cast=int),
+        'prefetch_multiplier': config(f'CELERY_{queue.upper()}_PREFETCH_MULTIPLIER', default=prefetch, cast=int),
+        'acks_late': config(f'CELERY_{queue.upper()}_ACKS_LATE', default=acks_late, cast=bool),
+    }
+    for queue, concurrency, prefetch, acks_late in [
+        ('default', 2, 4, False),
+        ('email', 16, 4, False),
+        ('reminders', 2, 1, True),
+        ('maintenance', 1, 1, True),
+    ]
+}
+CELERY_TASK_ROUTES = {task: {'queue': queue} for queue, tasks in TASK_QUEUES.items() for task in tasks}
+CELERY_TASK_ANNOTATIONS = {
+    task: {'acks_late': QUEUE_WORKER_SETTINGS[queue]['acks_late']}
+    for queue, tasks in TASK_QUEUES.items() for task in tasks
+}
+# A worker started with WORKER_QUEUE=<queue> (and -Q <queue>) takes that queue's settings
+WORKER_QUEUE = config('WORKER_QUEUE', default='default')
+CELERY_WORKER_CONCURRENCY = QUEUE_WORKER_SETTINGS[WORKER_QUEUE]['concurrency']
+CELERY_WORKER_PREFETCH_MULTIPLIER = QUEUE_WORKER_SETTINGS[WORKER_QUEUE]['prefetch_multiplier']
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+
+# Archival of past events and their enrollments (events.tasks.archive_past_events)
+EVENT_ARCHIVE_AFTER_DAYS = config('EVENT_ARCHIVE_AFTER_DAYS', default=30, cast=int)
+EVENT_ARCHIVE_BATCH_SIZE = config('EVENT_ARCHIVE_BATCH_SIZE', default=200, cast=int)
+# PostgreSQL: create the archive tables range-partitioned by month (read at migrate time)
+EVENT_ARCHIVE_PARTITIONED = config('EVENT_ARCHIVE_PARTITIONED', default=True, cast=bool)
+
+# Deleted events are purged in the background (events.tasks.purge_deleted_event)
+EVENT_PURGE_BATCH_SIZE = config('EVENT_PURGE_BATCH_SIZE', default=1000, cast=int)
+EVENT_CANCELLATION_EMAIL_BATCH_SIZE = config('EVENT_CANCELLATION_EMAIL_BATCH_SIZE', default=100, cast=int)
+
+# Live seat counts and event changes (events/live.py)
+# Redis pub/sub carries deltas between processes; without it only subscribers
+# of the writing process get them live (the others catch up on reconnect)
+LIVE_UPDATES_REDIS_URL = config('LIVE_UPDATES_REDIS_URL', default=CACHE_URL)
+LIVE_UPDATES_QUEUE_SIZE = config('LIVE_UPDATES_QUEUE_SIZE', default=1000, cast=int)
+LIVE_UPDATES_REPLAY_LIMIT = config('LIVE_UPDATES_REPLAY_LIMIT', default=500, cast=int)
+LIVE_UPDATES_STREAM_SECONDS = config('LIVE_UPDATES_STREAM_SECONDS', default=300, cast=int)
+LIVE_UPDATES_HEARTBEAT_SECONDS = config('LIVE_UPDATES_HEARTBEAT_SECONDS', default=15, cast=int)
+LIVE_UPDATES_RETRY_MS = config('LIVE_UPDATES_RETRY_MS', default=3000, cast=int)
+LIVE_UPDATES_POLL_SECONDS = config('LIVE_UPDATES_POLL_SECONDS', default=25, cast=int)
+LIVE_UPDATES_RETENTION_HOURS = config('LIVE_UPDATES_RETENTION_HOURS', default=24, cast=int)
+# Longest a transaction may hold an outbox id before committing: replay() waits
+# that long for a missing id before taking it for a rollback
+LIVE_UPDATES_GAP_SECONDS = config('LIVE_UPDATES_GAP_SECONDS', default=10, cast=int)
+
+# Idempotency-Key replay for enroll and event create (events_platform/idempotency.py)
+IDEMPOTENCY_TTL_SECONDS = config('IDEMPOTENCY_TTL_SECONDS', default=24 * 60 * 60, cast=int)
+# How long a request holds a key, and how long a concurrent duplicate waits for its result
+IDEMPOTENCY_LOCK_SECONDS = config('IDEMPOTENCY_LOCK_SECONDS', default=30, cast=int)
+IDEMPOTENCY_WAIT_SECONDS = config('IDEMPOTENCY_WAIT_SECONDS', default=10, cast=float)
+IDEMPOTENCY_POLL_SECONDS = 0.05
+
+# Proximity search (?near=lat,lon&radius_km=, events/geo.py). Event coordinates
+# are geocoded from the location with a built-in city list, extended by a CSV
+# file of name,latitude,longitude rows (e.g. a GeoNames cities export)
+GEO_GAZETTEER_FILE = config('GEO_GAZETTEER_FILE', default='')
+GEO_DEFAULT_RADIUS_KM = config('GEO_DEFAULT_RADIUS_KM', default=25, cast=float)
+GEO_MAX_RADIUS_KM = config('GEO_MAX_RADIUS_KM', default=500, cast=float)
+
+# GET /events/events/facets/ (events/facets.py): values per facet, and how long
+# counts are cached (any event change invalidates them sooner, but without
+# CACHE_URL only in its own process: the others serve them until they expire)
+FACETS_LIMIT = config('FACETS_LIMIT', default=20, cast=int)
+FACETS_CACHE_SECONDS = config('FACETS_CACHE_SECONDS', default=10 * 60 if CACHE_URL else 30, cast=int)
+
+# GET /events/events/autocomplete/ (events/autocomplete.py): distinct titles and
+# locations kept in each process's index, how often a process checks whether
+# another one changed events, and, since without CACHE_URL no other process's
+# change reaches it, how often it rebuilds regardless (0: never)
+AUTOCOMPLETE_MAX_SUGGESTIONS = config('AUTOCOMPLETE_MAX_SUGGESTIONS', default=100_000, cast=int)
+AUTOCOMPLETE_CHECK_SECONDS = config('AUTOCOMPLETE_CHECK_SECONDS', default=5, cast=float)
+AUTOCOMPLETE_REBUILD_SECONDS = config('AUTOCOMPLETE_REBUILD_SECONDS', default=0 if CACHE_URL else 60, cast=float)
+
+# Seat holds (POST /events/events/{id}/hold/): default and longest hold, and
+# how many expired holds events.tasks.expire_seat_holds deletes per transaction
+SEAT_HOLD_MINUTES = config('SEAT_HOLD_MINUTES', default=10, cast=int)
+SEAT_HOLD_MAX_MINUTES = config('SEAT_HOLD_MAX_MINUTES', default=30, cast=int)
+SEAT_HOLD_SWEEP_BATCH_SIZE = config('SEAT_HOLD_SWEEP_BATCH_SIZE', default=1000, cast=int)
+
+# Check-in at the door (events/checkin.py): how long after an event ends its
+# check-in tokens stay valid; live scans are written CHECKIN_BUFFER_SIZE at a
+# time or CHECKIN_FLUSH_SECONDS after the first one; offline syncs take up to
+# CHECKIN_SYNC_MAX_SCANS scans, written CHECKIN_WRITE_BATCH_SIZE per transaction
+CHECKIN_TOKEN_GRACE_HOURS = config('CHECKIN_TOKEN_GRACE_HOURS', default=6, cast=int)
+CHECKIN_BUFFER_SIZE = config('CHECKIN_BUFFER_SIZE', default=200, cast=int)
+CHECKIN_FLUSH_SECONDS = config('CHECKIN_FLUSH_SECONDS', default=2, cast=float)
+CHECKIN_SYNC_MAX_SCANS = config('CHECKIN_SYNC_MAX_SCANS', default=10_000, cast=int)
+CHECKIN_WRITE_BATCH_SIZE = config('CHECKIN_WRITE_BATCH_SIZE', default=1000, cast=int)
+CHECKIN_OWNER_CACHE_SECONDS = config('CHECKIN_OWNER_CACHE_SECONDS', default=10 * 60, cast=int)
+
+# Recurring event series (events/series.py): occurrences starting within
+# SERIES_HORIZON_DAYS are stored as events (events.tasks.materialize_series);
+# the event list expands later ones from the rule, up to SERIES_LIST_DAYS ahead
+SERIES_HORIZON_DAYS = config('SERIES_HORIZON_DAYS', default=14, cast=int)
+SERIES_LIST_DAYS = config('SERIES_LIST_DAYS', default=90, cast=int)
+
+# POST /api/batch/ (events_platform/batch.py): sub-requests per batch, and the
+# time after which the remaining sub-requests are not started
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=10, cast=int)
+BATCH_MAX_SECONDS = config('BATCH_MAX_SECONDS', default=5, cast=float)
+
+# Periodic tasks
+CELERY_BEAT_SCHEDULE = {
+    'reap-unverified-accounts': {
+        'task': 'users.tasks.reap_unverified_accounts',
+        'schedule': timedelta(hours=1),
+    },
+    'archive-past-events': {
+        'task': 'events.tasks.archive_past_events',
+        'schedule': timedelta(hours=1),
+    },
+    'purge-deleted-events': {
+        'task': 'events.tasks.purge_deleted_events',
+        'schedule': timedelta(hours=1),
+    },
+    'prune-outbox': {
+        'task': 'events.tasks.prune_outbox',
+        'schedule': timedelta(hours=1),
+    },
+    'materialize-series': {
+        'task': 'events.tasks.materialize_series',
+        'schedule': timedelta(hours=1),
+    },
+    'expire-seat-holds': {
+        'task': 'events.tasks.expire_seat_holds',
+        'schedule': timedelta(minutes=1),
+    },
+}
@@ -0,0 +1,19 @@
+import api from './client';
+
+export type BatchResponse<T = any> = { id: string; status: number; body: T };
+
+/**
+ * Fetch several GET endpoints in one round trip through /api/batch/.
+ * Resolves to the bodies in the order of `paths`; rejects if any failed.
+ */
+export const batchGet = async (paths: string[]): Promise<any[]> => {
+    const response = await api.post('/api/batch/', {
+        requests: paths.map((path) => ({ path })),
+    });
+    const responses: BatchResponse[] = response.data.responses;
+    const failed = responses.find((item) => item.status >= 400);
+    if (failed) {
+        throw new Error(`${paths[Number(failed.id)]}: ${failed.status}`);
+    }
+    return responses.map((item) => item.body);
+};
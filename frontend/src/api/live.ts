@@ -0,0 +1,93 @@
+import { useEffect } from 'react';
+import api from './client';
+
+export type Delta = {
+    id: number;
+    type: 'enrollment.created' | 'enrollment.canceled' | 'event.updated' | 'event.deleted' | 'hold.created' | 'hold.released';
+    event: number;
+    enrolled?: number;
+    available_seats?: number | null;
+    changed?: string[];
+};
+
+// id is null for an occurrence of a recurring series that isn't stored yet
+type SeatCounts = { id: number | null; available_seats: number | null };
+
+// Apply a delta to a list of events: new seat counts, or drop a deleted event
+export const applyDelta = <T extends SeatCounts>(events: T[], delta: Delta): T[] => {
+    if (delta.type === 'event.deleted') {
+        return events.filter((event) => event.id !== delta.event);
+    }
+    if (delta.available_seats === undefined) return events;
+    return events.map((event) =>
+        event.id === delta.event ? { ...event, available_seats: delta.available_seats ?? null } : event
+    );
+};
+
+/**
+ * Subscribe to /events/live/ (server-sent events) while mounted. Uses fetch
+ * rather than EventSource so the JWT can go in the Authorization header, and
+ * reconnects with Last-Event-ID so no delta is missed. Only `id:` lines move
+ * Last-Event-ID: the server sends them once everything before is committed.
+ */
+export const useLiveUpdates = (onDelta: (delta: Delta) => void, onReset?: () => void, eventIds?: number[]) => {
+    const key = eventIds?.join(',') ?? '';
+
+    useEffect(() => {
+        const controller = new AbortController();
+        let lastId: string | null = null;
+        const latest = new Map<number, number>(); // event id -> id of the last delta applied
+
+        const connect = async () => {
+            while (!controller.signal.aborted) {
+                try {
+                    const token = localStorage.getItem('access_token');
+                    const headers: Record<string, string> = { Accept: 'text/event-stream' };
+                    if (token) headers.Authorization = `Bearer ${token}`;
+                    if (lastId) headers['Last-Event-ID'] = lastId;
+                    const url = `${api.defaults.baseURL}/events/live/${key ? `?events=${key}` : ''}`;
+                    const response = await fetch(url, { headers, signal: controller.signal });
+                    if (!response.ok || !response.body) throw new Error(`live updates: ${response.status}`);
+
+                    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                    let buffer = '';
+                    for (;;) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        buffer += value;
+                        let end;
+                        while ((end = buffer.indexOf('\n\n')) !== -1) {
+                            const frame = buffer.slice(0, end);
+                            buffer = buffer.slice(end + 2);
+                            const fields = Object.fromEntries(
+                                frame.split('\n').filter((line) => line && !line.startsWith(':'))
+                                    .map((line) => [line.slice(0, line.indexOf(':')), line.slice(line.indexOf(':') + 2)])
+                            );
+                            // The server's cursor; pushed deltas don't move it
+                            if (fields.id !== undefined) lastId = fields.id;
+                            if (fields.event === 'delta') {
+                                const delta: Delta = JSON.parse(fields.data);
+                                // Deltas are snapshots of their event: a replay after reconnecting
+                                // can repeat ones already applied, or older ones
+                                if (delta.id > (latest.get(delta.event) ?? 0)) {
+                                    latest.set(delta.event, delta.id);
+                                    onDelta(delta);
+                                }
+                            } else if (fields.event === 'reset') {
+                                // Missed too much to replay: refetch instead
+                                lastId = JSON.parse(fields.data).id.toString();
+                                onReset?.();
+                            }
+                        }
+                    }
+                } catch (error) {
+                    if (controller.signal.aborted) return;
+                    await new Promise((resolve) => setTimeout(resolve, 3000));
+                }
+            }
+        };
+        connect();
+        return () => controller.abort();
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [key]);
+};
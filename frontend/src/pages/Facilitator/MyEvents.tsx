@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import api from '../../api/client';
+import { applyDelta, useLiveUpdates } from '../../api/live';
 import toast from 'react-hot-toast';
 import { Calendar, MapPin, Users, Plus, Clock, TrendingUp, Eye, MoreVertical, Globe } from 'lucide-react';
 
@@ -24,6 +25,8 @@ const MyEvents: React.FC = () => {
         fetchEvents();
     }, []);
 
+    useLiveUpdates((delta) => setEvents((current) => applyDelta(current, delta)), () => fetchEvents());
+
     const fetchEvents = async () => {
         try {
             const response = await api.get('/events/events/my_events/');
@@ -1,11 +1,14 @@
 import React, { useEffect, useState } from 'react';
 import { useForm } from 'react-hook-form';
 import api from '../../api/client';
+import { applyDelta, useLiveUpdates } from '../../api/live';
 import toast from 'react-hot-toast';
 import { Search, Filter, Calendar, MapPin } from 'lucide-react';
 
 type Event = {
-    id: number;
+    id: number | null;  // null: an occurrence of a recurring series, stored once someone enrolls
+    series: number | null;
+    occurrence_start: string | null;
     title: string;
     description: string;
     starts_at: string;
@@ -15,6 +18,9 @@ type Event = {
     capacity: number | null;
 };
 
+type FacetValue = { value: string; count: number };
+type Facets = { total: number; language: FacetValue[]; location: FacetValue[]; month: FacetValue[] };
+
 type FilterData = {
     q?: string;
     location?: string;
@@ -26,6 +32,7 @@ type FilterData = {
 const EventsList: React.FC = () => {
     const [events, setEvents] = useState<Event[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [facets, setFacets] = useState<Facets | null>(null);
     const { register, handleSubmit, watch } = useForm<FilterData>();
 
     // Debounce search? Or just search on submit/button. 
@@ -39,9 +46,13 @@ const EventsList: React.FC = () => {
                 if (value) params.append(key, value);
             });
 
-            const response = await api.get(`/events/events/?${params.toString()}`);
+            const [response, facetsResponse] = await Promise.all([
+                api.get(`/events/events/?${params.toString()}`),
+                api.get(`/events/events/facets/?${params.toString()}`),
+            ]);
             const data = Array.isArray(response.data) ? response.data : response.data.results;
             setEvents(data);
+            setFacets(facetsResponse.data);
         } catch (error) {
             toast.error('Failed to load events');
         } finally {
@@ -53,16 +64,41 @@ const EventsList: React.FC = () => {
         fetchEvents();
     }, []);
 
+    // Typeahead for the search box, served from the server's in-memory index
+    const [suggestions, setSuggestions] = useState<string[]>([]);
+    const query = watch('q');
+    useEffect(() => {
+        if (!query) {
+            setSuggestions([]);
+            return;
+        }
+        const timer = setTimeout(async () => {
+            try {
+                const response = await api.get('/events/events/autocomplete/', { params: { q: query, kind: 'title' } });
+                setSuggestions(response.data.results.map((item: { text: string }) => item.text));
+            } catch (error) {
+                setSuggestions([]);
+            }
+        }, 150);
+        return () => clearTimeout(timer);
+    }, [query]);
+
+    // Seat counts update live instead of re-polling the list
+    useLiveUpdates((delta) => setEvents((current) => applyDelta(current, delta)), () => fetchEvents(watch()));
+
     const onSubmit = (data: FilterData) => {
         fetchEvents(data);
     };
 
-    const handleEnroll = async (eventId: number) => {
+    const handleEnroll = async (event: Event) => {
         try {
-            await api.post(`/events/events/${eventId}/enroll/`);
+            if (event.id === null) {
+                await api.post(`/events/series/${event.series}/enroll/`, { starts_at: event.occurrence_start });
+                fetchEvents(watch());
+            } else {
+                await api.post(`/events/events/${event.id}/enroll/`);
+            }
             toast.success('Enrolled successfully!');
-            // Refresh to update seat counts
-            fetchEvents(watch());
         } catch (error: any) {
             toast.error(error.response?.data?.join(' ') || error.response?.data?.message || 'Enrollment failed');
         }
@@ -80,17 +116,30 @@ const EventsList: React.FC = () => {
                         <div>
                             <label className="block text-xs font-medium text-gray-500">Search</label>
                             <div className="relative mt-1">
-                                <input {...register('q')} placeholder="Keywords..." className="block w-full pl-8 pr-3 py-2 border border-gray-300 rounded-md shadow-sm text-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500" />
+                                <input {...register('q')} list="q-suggestions" autoComplete="off" placeholder="Keywords..." className="block w-full pl-8 pr-3 py-2 border border-gray-300 rounded-md shadow-sm text-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500" />
                                 <Search className="h-4 w-4 text-gray-400 absolute left-2 top-2.5" />
+                                <datalist id="q-suggestions">
+                                    {suggestions.map((text) => <option key={text} value={text} />)}
+                                </datalist>
                             </div>
                         </div>
                         <div>
                             <label className="block text-xs font-medium text-gray-500">Location</label>
-                            <input {...register('location')} className="mt-1 block w-full border border-gray-300 rounded-md shadow-sm py-2 px-3 text-sm focus:ring-indigo-500 focus:border-indigo-500" />
+                            <input {...register('location')} list="location-facets" className="mt-1 block w-full border border-gray-300 rounded-md shadow-sm py-2 px-3 text-sm focus:ring-indigo-500 focus:border-indigo-500" />
+                            <datalist id="location-facets">
+                                {facets?.location.map((facet) => (
+                                    <option key={facet.value} value={facet.value}>{facet.count} events</option>
+                                ))}
+                            </datalist>
                         </div>
                         <div>
                             <label className="block text-xs font-medium text-gray-500">Language</label>
-                            <input {...register('language')} className="mt-1 block w-full border border-gray-300 rounded-md shadow-sm py-2 px-3 text-sm focus:ring-indigo-500 focus:border-indigo-500" />
+                            <input {...register('language')} list="language-facets" className="mt-1 block w-full border border-gray-300 rounded-md shadow-sm py-2 px-3 text-sm focus:ring-indigo-500 focus:border-indigo-500" />
+                            <datalist id="language-facets">
+                                {facets?.language.map((facet) => (
+                                    <option key={facet.value} value={facet.value}>{facet.count} events</option>
+                                ))}
+                            </datalist>
                         </div>
                         <div>
                             <label className="block text-xs font-medium text-gray-500">Starts After</label>
@@ -117,7 +166,7 @@ const EventsList: React.FC = () => {
                 ) : (
                     <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-2 xl:grid-cols-3">
                         {events.map(event => (
-                            <div key={event.id} className="bg-white flex flex-col justify-between overflow-hidden shadow rounded-lg border border-gray-100 hover:shadow-lg transition-all duration-200">
+                            <div key={event.id ?? `${event.series}-${event.occurrence_start}`} className="bg-white flex flex-col justify-between overflow-hidden shadow rounded-lg border border-gray-100 hover:shadow-lg transition-all duration-200">
                                 <div className="p-5">
                                     <div className="flex justify-between items-start">
                                         <h3 className="text-lg font-bold text-gray-900 line-clamp-2">{event.title}</h3>
@@ -144,7 +193,7 @@ const EventsList: React.FC = () => {
                                             : 'Open Capacity'}
                                     </span>
                                     <button
-                                        onClick={() => handleEnroll(event.id)}
+                                        onClick={() => handleEnroll(event)}
                                         className="inline-flex items-center px-3 py-1.5 border border-transparent text-xs font-medium rounded-md text-white bg-indigo-600 hover:bg-indigo-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 shadow-sm"
                                     >
                                         Enroll Now
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import api from '../../api/client';
+import { batchGet } from '../../api/batch';
 import toast from 'react-hot-toast';
 import { Calendar, CheckCircle, Clock } from 'lucide-react';
 
@@ -9,6 +9,7 @@ type Enrollment = {
     event_title: string;
     event_starts_at: string;
     status: 'ENROLLED' | 'CANCELED';
+    checkin_token: string | null;
 };
 
 const MyEnrollments: React.FC = () => {
@@ -20,12 +21,12 @@ const MyEnrollments: React.FC = () => {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const [upRes, pastRes] = await Promise.all([
-                    api.get('/events/enrollments/upcoming/'),
-                    api.get('/events/enrollments/past/')
+                const [upData, pastData] = await batchGet([
+                    '/events/enrollments/upcoming/',
+                    '/events/enrollments/past/'
                 ]);
-                setUpcoming(Array.isArray(upRes.data) ? upRes.data : upRes.data.results);
-                setPast(Array.isArray(pastRes.data) ? pastRes.data : pastRes.data.results);
+                setUpcoming(Array.isArray(upData) ? upData : upData.results);
+                setPast(Array.isArray(pastData) ? pastData : pastData.results);
             } catch (error) {
                 toast.error('Failed to load enrollments');
             } finally {
@@ -80,6 +81,11 @@ const MyEnrollments: React.FC = () => {
                                                 <Calendar className="flex-shrink-0 mr-1.5 h-4 w-4 text-gray-400" />
                                                 {new Date(enrollment.event_starts_at).toLocaleString()}
                                             </p>
+                                            {activeTab === 'upcoming' && enrollment.checkin_token && (
+                                                <p className="mt-1 text-xs text-gray-400 font-mono" title="Show this at the door">
+                                                    Ticket: {enrollment.checkin_token}
+                                                </p>
+                                            )}
                                         </div>
                                         <div className="ml-2 flex-shrink-0 flex">
                                             <p className={`px-2 inline-flex text-xs leading-5 font-semibold rounded-full ${enrollment.status === 'ENROLLED' ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800'}`}>
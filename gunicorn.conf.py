@@ -0,0 +1,67 @@
+# Gunicorn configuration, driven by environment variables.
+#
+# SERVER_MODE=asgi (default) runs events_platform.asgi under uvicorn workers so
+# async views and slow I/O don't tie up a whole worker; SERVER_MODE=wsgi runs
+# the classic WSGI app on threaded sync workers.
+import multiprocessing
+import os
+
+from decouple import config as env  # "config" is itself a gunicorn setting name
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = env('WEB_CONCURRENCY', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+
+SERVER_MODE = env('SERVER_MODE', default='asgi')
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'events_platform.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'events_platform.wsgi:application'
+    worker_class = 'gthread'
+    threads = env('GUNICORN_THREADS', default=4, cast=int)
+
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Recycle workers periodically to cap memory growth
+max_requests = env('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', default=100, cast=int)
+
+accesslog = '-'
+
+# Import Django, the URLconf, the OpenAPI schema and the autocomplete index once in the master; workers
+# (including the ones max_requests recycles) fork with all of it already loaded
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool)
+
+
+# Prometheus multiprocess mode: start each run with an empty metrics directory
+# and drop the files of workers that exit
+def on_starting(server):
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import connections
+    from django.urls import get_resolver
+    from events.autocomplete import autocomplete
+    from events_platform.schema import FORMATS, get_schema_document
+
+    get_resolver().url_patterns
+    for fmt in FORMATS:
+        get_schema_document(fmt)
+    autocomplete.build()
+    # Never hand a database connection opened here to the forked workers
+    connections.close_all()
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,24 @@
+import factory
+from django.contrib.auth.models import User
+
+from .models import Profile
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+
+    email = factory.Sequence(lambda n: f'user{n}@example.com')
+    username = factory.LazyAttribute(lambda o: o.email)
+    first_name = factory.Faker('first_name')
+    last_name = factory.Faker('last_name')
+    password = factory.django.Password('password123')
+
+
+class ProfileFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Profile
+
+    user = factory.SubFactory(UserFactory)
+    role = 'SEEKER'
+    is_verified = True
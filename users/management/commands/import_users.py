@@ -0,0 +1,155 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from users.models import Profile
+from users.tasks import send_invitation_emails
+
+ROLES = {role for role, _ in Profile.ROLE_CHOICES}
+
+
+def _init_worker(settings_module):
+    # Spawned workers (macOS/Windows) start without Django configured
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _hash_password(raw_password):
+    return make_password(raw_password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create users from a CSV file with columns email, role and an optional password. "
+        "Passwords are hashed across a process pool and rows are written with bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="Path to a CSV file with a header row")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Users written per transaction")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Hashing processes (1 hashes in-process)")
+        parser.add_argument('--email-batch-size', type=int, default=100,
+                            help="Invitation emails per queued task")
+        parser.add_argument('--no-invite', action='store_true', help="Do not queue invitation emails")
+        parser.add_argument('--unverified', action='store_true',
+                            help="Create profiles as unverified instead of verified")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows, skipped = self.read_rows(options['csv_path'])
+
+        executor = None
+        if options['workers'] > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'events_platform.settings'),),
+            )
+
+        created = 0
+        try:
+            chunk_size = options['chunk_size']
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                chunk_created, chunk_skipped = self.import_chunk(chunk, executor, options)
+                created += len(chunk_created)
+                skipped += chunk_skipped
+
+                if chunk_created and not options['no_invite']:
+                    self.queue_invitations(chunk_created, options['email_batch_size'])
+
+                self.stdout.write(f"Imported {created}/{len(rows)} users")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} users, skipped {skipped} rows in {elapsed:.1f}s"
+        ))
+
+    def read_rows(self, path):
+        """Parse and validate the CSV, dropping invalid rows and duplicate emails"""
+        try:
+            handle = open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+
+        rows = []
+        seen = set()
+        skipped = 0
+        with handle:
+            reader = csv.DictReader(handle)
+            if not reader.fieldnames or not {'email', 'role'} <= set(reader.fieldnames):
+                raise CommandError("CSV must have at least 'email' and 'role' columns.")
+
+            for line_no, row in enumerate(reader, start=2):
+                email = (row.get('email') or '').strip().lower()
+                role = (row.get('role') or '').strip().upper()
+                try:
+                    validate_email(email)
+                except ValidationError:
+                    self.stderr.write(f"Line {line_no}: invalid email {email!r}, skipping")
+                    skipped += 1
+                    continue
+                if role not in ROLES:
+                    self.stderr.write(f"Line {line_no}: invalid role {role!r}, skipping")
+                    skipped += 1
+                    continue
+                if email in seen:
+                    skipped += 1
+                    continue
+                seen.add(email)
+                rows.append((email, role, row.get('password') or ''))
+        return rows, skipped
+
+    def import_chunk(self, chunk, executor, options):
+        """Create users and profiles for one chunk; returns (created emails, skipped count)"""
+        emails = [email for email, _, _ in chunk]
+        existing = set()
+        for email, username in User.objects.filter(
+            Q(email__in=emails) | Q(username__in=emails)
+        ).values_list('email', 'username'):
+            existing.update((email, username))
+        new_rows = [row for row in chunk if row[0] not in existing]
+        if not new_rows:
+            return [], len(chunk)
+
+        passwords = [password for _, _, password in new_rows]
+        if executor is not None:
+            chunksize = max(1, len(passwords) // (options['workers'] * 4))
+            hashed = list(executor.map(_hash_password, passwords, chunksize=chunksize))
+        else:
+            hashed = [_hash_password(password) for password in passwords]
+
+        users = [
+            User(username=email, email=email, password=password_hash)
+            for (email, _, _), password_hash in zip(new_rows, hashed)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # Not every backend returns primary keys from bulk_create, so look them up
+            user_ids = dict(
+                User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'id')
+            )
+            Profile.objects.bulk_create([
+                Profile(user_id=user_ids[email], role=role, is_verified=not options['unverified'])
+                for email, role, _ in new_rows
+            ])
+
+        return [email for email, _, _ in new_rows], len(chunk) - len(new_rows)
+
+    def queue_invitations(self, emails, batch_size):
+        for start in range(0, len(emails), batch_size):
+            send_invitation_emails.delay(emails[start:start + batch_size])
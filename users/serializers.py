@@ -2,7 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from .models import Profile
-from .utils import generate_otp, send_otp_email
+from .tasks import send_otp_email
+from .utils import generate_otp
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
@@ -43,7 +44,7 @@ class SignupSerializer(serializers.ModelSerializer):
         )
         
         # Send OTP email
-        send_otp_email(email, otp)
+        send_otp_email.delay(email, otp)
 
         return user
 
@@ -142,7 +143,7 @@ class ResendOTPSerializer(serializers.Serializer):
         profile.save()
         
         # Send OTP email
-        send_otp_email(user.email, otp)
+        send_otp_email.delay(user.email, otp)
         
         return user
 
@@ -174,7 +175,7 @@ class PasswordResetRequestSerializer(serializers.Serializer):
             profile.save()
             
             # Send OTP email
-            send_otp_email(user.email, otp)
+            send_otp_email.delay(user.email, otp)
         except User.DoesNotExist:
             pass  # Silently fail to prevent email enumeration
         
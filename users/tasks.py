@@ -0,0 +1,95 @@
+import logging
+import time
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .utils import send_otp_email as deliver_otp_email
+
+logger = logging.getLogger(__name__)
+
+
+def stale_unverified_users(cutoff):
+    """Users who never verified their email and signed up before `cutoff`"""
+    return User.objects.filter(profile__is_verified=False, date_joined__lt=cutoff)
+
+
+@shared_task
+def reap_unverified_accounts(max_age_hours=None, batch_size=None):
+    """
+    Delete unverified accounts older than `max_age_hours` in fixed-size batches.
+
+    Each batch is deleted in its own short transaction so the cascade to
+    Profile (and anything else hanging off the user) never holds locks on
+    auth_user for long. Returns a summary of what was reaped.
+    """
+    if max_age_hours is None:
+        max_age_hours = getattr(settings, 'UNVERIFIED_ACCOUNT_MAX_AGE_HOURS', 72)
+    if batch_size is None:
+        batch_size = getattr(settings, 'UNVERIFIED_REAPER_BATCH_SIZE', 500)
+
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    stats = {'users_deleted': 0, 'rows_deleted': 0, 'batches': 0, 'batch_durations_ms': []}
+
+    while True:
+        ids = list(
+            stale_unverified_users(cutoff).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        started = time.monotonic()
+        with transaction.atomic():
+            # Re-apply the filter so a user who verified after we picked the ids is kept
+            rows, per_model = stale_unverified_users(cutoff).filter(pk__in=ids).delete()
+        duration_ms = (time.monotonic() - started) * 1000
+
+        users_deleted = per_model.get('auth.User', 0)
+        stats['batches'] += 1
+        stats['users_deleted'] += users_deleted
+        stats['rows_deleted'] += rows
+        stats['batch_durations_ms'].append(round(duration_ms, 2))
+        logger.info(
+            "Reaped batch %s: %s users (%s rows) in %.2fms",
+            stats['batches'], users_deleted, rows, duration_ms
+        )
+
+        if len(ids) < batch_size:
+            break
+
+    logger.info(
+        "Unverified account reaper finished: %s users, %s rows, %s batches",
+        stats['users_deleted'], stats['rows_deleted'], stats['batches']
+    )
+    return stats
+
+
+@shared_task
+def send_otp_email(email, otp):
+    """Send an OTP verification email off the request (on the 'email' queue)"""
+    return deliver_otp_email(email, otp)
+
+
+@shared_task
+def send_invitation_emails(emails):
+    """Send invitation emails for imported accounts over a single SMTP connection"""
+    subject = 'You have been invited to Events Platform'
+    message = (
+        "An Events Platform account has been created for you.\n\n"
+        "If you were not given a password, use \"Forgot password\" on the login page "
+        "to set one with your email address.\n\n"
+        "Best regards,\nEvents Platform Team"
+    )
+    messages = [
+        EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+        for email in emails
+    ]
+    connection = get_connection()
+    sent = connection.send_messages(messages) or 0
+    logger.info("Sent %s/%s invitation emails", sent, len(messages))
+    return sent
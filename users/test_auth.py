@@ -4,7 +4,11 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from users.models import Profile
+from users.tasks import reap_unverified_accounts
 from django.utils import timezone
+from django.core import mail
+from django.core.management import call_command
+from datetime import timedelta
 
 @pytest.mark.django_db
 class TestAuth:
@@ -162,3 +166,75 @@ class TestPasswordReset:
         }
         response = self.client.post(self.password_reset_confirm_url, data)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestUnverifiedReaper:
+    def make_user(self, email, verified, age_hours):
+        user = User.objects.create_user(username=email, email=email, password='password123')
+        User.objects.filter(pk=user.pk).update(date_joined=timezone.now() - timedelta(hours=age_hours))
+        Profile.objects.create(user=user, role='SEEKER', is_verified=verified)
+        return user
+
+    def test_reaps_only_stale_unverified_accounts(self):
+        for i in range(5):
+            self.make_user(f'stale{i}@test.com', verified=False, age_hours=100)
+        fresh = self.make_user('fresh@test.com', verified=False, age_hours=1)
+        verified = self.make_user('verified@test.com', verified=True, age_hours=100)
+
+        stats = reap_unverified_accounts(max_age_hours=72, batch_size=2)
+
+        assert stats['users_deleted'] == 5
+        assert stats['batches'] == 3
+        assert len(stats['batch_durations_ms']) == 3
+        assert set(User.objects.values_list('pk', flat=True)) == {fresh.pk, verified.pk}
+        assert Profile.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestImportUsers:
+    def test_import_users_from_csv(self, tmp_path):
+        User.objects.create_user(username='existing@test.com', email='existing@test.com', password='password123')
+        csv_file = tmp_path / 'users.csv'
+        csv_file.write_text(
+            "email,role,password\n"
+            "fac@test.com,FACILITATOR,password123\n"
+            "seek@test.com,seeker,\n"
+            "existing@test.com,SEEKER,password123\n"
+            "not-an-email,SEEKER,password123\n"
+            "fac@test.com,FACILITATOR,password123\n"
+        )
+
+        call_command('import_users', str(csv_file), '--workers', '2', '--chunk-size', '1')
+
+        fac = User.objects.get(email='fac@test.com')
+        assert fac.check_password('password123')
+        assert fac.profile.role == 'FACILITATOR'
+        assert fac.profile.is_verified is True
+        seeker = User.objects.get(email='seek@test.com')
+        assert seeker.profile.role == 'SEEKER'
+        assert not seeker.has_usable_password()
+        assert User.objects.count() == 3
+        assert sorted(m.to[0] for m in mail.outbox) == ['fac@test.com', 'seek@test.com']
+
+
+@pytest.mark.django_db
+class TestTaskQueues:
+    def test_tasks_are_routed_to_their_queues(self, settings):
+        from events_platform.celery import app
+        for queue, tasks in settings.TASK_QUEUES.items():
+            for name in tasks:
+                assert name in app.tasks, name
+                assert app.amqp.router.route({}, name)['queue'].name == queue
+                assert app.tasks[name].acks_late == settings.QUEUE_WORKER_SETTINGS[queue]['acks_late']
+        assert app.amqp.router.route({}, 'events_platform.celery.debug_task')['queue'].name == 'default'
+
+    def test_signup_otp_is_sent_by_the_email_worker(self, memory_worker):
+        worker = memory_worker('email')
+        response = APIClient().post(reverse('signup'), {
+            "email": "queued@test.com", "password": "password123", "role": "SEEKER"
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert worker.wait(1) == [('users.tasks.send_otp_email', 'SUCCESS')]
+        assert mail.outbox[-1].to == ["queued@test.com"]
+        assert User.objects.get(email="queued@test.com").profile.otp in mail.outbox[-1].body